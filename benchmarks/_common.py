@@ -0,0 +1,126 @@
+"""
+Shared helpers of the benchmark suite: timing, synthetic inputs, and the
+results store used by run_all.py.
+
+Nothing here touches the network. Filesets point at files that don't exist,
+and analyses use fake_builder, a builder-mode function with a configurable
+per-file cost, instead of coffea's Runner.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Fastest wall time of repeat calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def synthetic_fileset(n_files: int, n_datasets: int = 10) -> dict:
+    """n_files file entries spread evenly over n_datasets datasets (the files need not exist)."""
+    fileset = {f"dataset_{d}": {"files": {}, "metadata": {"xsec": 1.0 + d}} for d in range(n_datasets)}
+    for i in range(n_files):
+        fileset[f"dataset_{i % n_datasets}"]["files"][f"root://eos.example//store/{i:07d}.root"] = "Events"
+    return fileset
+
+
+def fake_builder(cost_per_file: float = 0.0, n_bins: int = 50):
+    """
+    A builder-mode analysis that spins cost_per_file seconds of CPU per file and returns
+    an Ok((acc, metrics)) like coffea's Runner. When it is given a coffea executor with a
+    Dask client (sequential mode on a cluster), the files are spread over the cluster, as
+    coffea would spread the chunk's work items.
+
+    Built in a closure so cloudpickle ships it by value to workers that can't import
+    this module.
+    """
+    def spin(n_files):
+        import time
+        end = time.perf_counter() + cost_per_file * n_files
+        while time.perf_counter() < end:
+            pass
+        return n_files
+
+    def analysis(fileset, executor=None):
+        import hist
+        from coffea.processor import Ok
+        files = [f for spec in fileset.values() for f in spec["files"]]
+        client = getattr(executor, "client", None)
+        t0 = time.perf_counter()
+        if client is not None:
+            client.gather(client.map(spin, [1] * len(files), pure=False))
+        else:
+            spin(len(files))
+        h = hist.Hist.new.StrCat([], name="dataset", growth=True).Reg(n_bins, 0, 1, name="x").Weight()
+        for ds, spec in fileset.items():
+            h.fill(dataset=ds, x=[0.5] * len(spec["files"]))
+        metrics = {"entries": 1000 * len(files), "processtime": time.perf_counter() - t0}
+        return Ok(({"hist": h, "n_files": len(files)}, metrics))
+
+    return analysis
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results: dict[str, dict[str, float]], results_dir: Path = RESULTS_DIR) -> Path:
+    """Write one run's results as <results_dir>/<UTC time>-<commit>.json."""
+    now = datetime.now(timezone.utc)
+    commit = git_commit()
+    record = {
+        "commit": commit,
+        "timestamp": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{now:%Y%m%dT%H%M%S}-{commit}.json"
+    path.write_text(json.dumps(record, indent=2, sort_keys=True))
+    return path
+
+
+def load_previous(results_dir: Path = RESULTS_DIR, exclude: Path | None = None) -> dict | None:
+    """The most recent stored run (other than exclude), or None."""
+    paths = sorted(p for p in results_dir.glob("*.json") if p != exclude)
+    return json.loads(paths[-1].read_text()) if paths else None
+
+
+def compare(current: dict[str, dict[str, float]], previous: dict, threshold: float = 0.10) -> list[str]:
+    """
+    Lines comparing every metric present in both runs. Metrics are times (lower is
+    better) unless their name ends in "_per_s"; changes beyond threshold are flagged.
+    """
+    lines = []
+    for bench, metrics in sorted(current.items()):
+        for name, value in sorted(metrics.items()):
+            old = previous["results"].get(bench, {}).get(name)
+            if not old:
+                continue
+            change = (value - old) / old
+            worse = change < -threshold if name.endswith("_per_s") else change > threshold
+            better = change > threshold if name.endswith("_per_s") else change < -threshold
+            flag = "  REGRESSION" if worse else ("  improved" if better else "")
+            lines.append(f"{bench:<10} {name:<40} {old:>12.4g} -> {value:>12.4g}  {change:+7.1%}{flag}")
+    return lines
@@ -0,0 +1,86 @@
+"""
+Benchmark cache bookkeeping: the time Executor.exists() takes per chunk as
+the number of cached ChunkAnalysis entries grows (with and without
+index.sqlite), and the cost of computing artifact identities.
+
+    python benchmarks/bench_cache.py [--chunks 100 1000 10000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from _common import best_of
+
+from coffea_workflow.artifacts import Analysis, Chunking, ChunkAnalysis, Fileset
+from coffea_workflow.config import RunConfig
+from coffea_workflow.executor import Executor
+
+
+def _chunk_arts(n: int) -> list[ChunkAnalysis]:
+    chunking = Chunking(fileset=Fileset(name="fs", builder="bench:fileset"),
+                        split_strategy="by_dataset", percentage=None)
+    return [
+        ChunkAnalysis(chunk_file=f"fileset_chunk_{i}.json", chunk_hash=f"{i:064x}", chunking=chunking,
+                      analysis_builder="bench:analysis", builder_params={"cut": 25.0})
+        for i in range(n)
+    ]
+
+
+def bench_lookups(n_chunks: int, cache_index: bool, repeat: int = 3) -> float:
+    """Seconds per Executor.exists() call over n_chunks cached chunks."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = RunConfig(cache_dir=Path(tmp), cache_index=cache_index)
+        ex = Executor(Path(tmp), cfg)
+        arts = _chunk_arts(n_chunks)
+        for art in arts:
+            out = ex.path_for(art)
+            out.mkdir(parents=True)
+            (out / "payload.pkl").write_bytes(b"x")
+            (out / ".success").touch()
+            ex.mark_materialized(art, out)
+        ex.close()
+
+        def lookups():
+            fresh = Executor(Path(tmp), cfg)  # a new run: nothing in the session cache
+            assert all(fresh.exists(a) for a in arts)
+            fresh.close()
+
+        return best_of(lookups, repeat) / n_chunks
+
+
+def bench_identity(n_chunks: int, repeat: int = 3) -> dict[str, float]:
+    """Seconds per identity() of a fresh ChunkAnalysis, and of an Analysis on a large fileset."""
+    chunk_s = best_of(lambda: [a.identity() for a in _chunk_arts(n_chunks)], repeat) / n_chunks
+    params = {f"param_{i}": list(range(50)) for i in range(200)}
+
+    def analysis():
+        Analysis(name="an", fileset=Fileset(name="fs", builder="bench:fileset", builder_params=params),
+                 builder="bench:analysis").identity()
+
+    return {"identity_chunk_s": chunk_s, "identity_analysis_large_params_s": best_of(analysis, repeat)}
+
+
+def run(quick: bool = False, chunks: tuple[int, ...] | None = None, repeat: int = 3) -> dict[str, float]:
+    chunks = chunks or ((100, 1000) if quick else (100, 1000, 10000))
+    results = {}
+    for n in chunks:
+        for index in (True, False):
+            label = "index" if index else "scan"
+            results[f"exists_per_chunk_{label}_{n}_s"] = bench_lookups(n, index, repeat)
+    results.update(bench_identity(max(chunks), repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name, value in run(chunks=tuple(args.chunks), repeat=args.repeat).items():
+        print(f"{name:<40} {value * 1e6:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
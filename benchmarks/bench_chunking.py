@@ -0,0 +1,81 @@
+"""
+Benchmark chunking of large filesets: the Chunking producer (split, write
+chunk JSONs, hash them) for the file-count strategies, and LPT balancing
+with known entry counts.
+
+    python benchmarks/bench_chunking.py [--files 100000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import best_of, synthetic_fileset
+
+from coffea_workflow.artifacts import Chunking, Fileset
+from coffea_workflow.balancing import balance_fileset
+from coffea_workflow.config import RunConfig
+from coffea_workflow.deps import Deps
+from coffea_workflow.executor import Executor
+from coffea_workflow.producers import get_producer
+
+STRATEGIES = {
+    "by_dataset_10pct": ("by_dataset", 10),
+    "mixed_1pct": (None, 1),
+}
+
+
+def bench_split(n_files: int, strategy: str | None, percentage: int, repeat: int = 3) -> float:
+    """Seconds the Chunking producer takes, with the Fileset already materialized."""
+    fileset = synthetic_fileset(n_files)
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        cfg = RunConfig(cache_dir=Path(tmp), strategy=strategy, percentage=percentage)
+        ex = Executor(Path(tmp), cfg)
+        fs = Fileset(name="fs", builder=lambda: fileset)
+        ex.materialize(fs)
+        art = Chunking(fileset=fs, split_strategy=strategy, percentage=percentage)
+        producer = get_producer(Chunking)
+        out = Path(tmp) / "chunking"
+
+        def split():
+            shutil.rmtree(out, ignore_errors=True)
+            producer(art=art, deps=Deps(ex, config=cfg), out=out, config=cfg)
+
+        seconds = best_of(split, repeat)
+        ex.close()
+        return seconds
+
+
+def bench_balance(n_files: int, repeat: int = 3) -> float:
+    fileset = synthetic_fileset(n_files)
+    rng = random.Random(0)
+    entries = {(ds, url): rng.randint(1_000, 1_000_000) for ds, data in fileset.items() for url in data["files"]}
+    return best_of(lambda: balance_fileset(fileset, entries, target_events_per_chunk=50_000_000), repeat)
+
+
+def run(quick: bool = False, files: int | None = None, repeat: int = 3) -> dict[str, float]:
+    n = files or (10_000 if quick else 100_000)
+    results = {
+        f"split_{name}_{n}_files_s": bench_split(n, strategy, pct, repeat)
+        for name, (strategy, pct) in STRATEGIES.items()
+    }
+    results[f"balance_{n}_files_s"] = bench_balance(n, repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name, value in run(files=args.files, repeat=args.repeat).items():
+        print(f"{name:<40} {value:>10.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark merging chunk accumulators on the driver: coffea's accumulate()
+over chunk results holding large weighted histograms (process x variation
+categories), as execute_analysis does for every chunk.
+
+    python benchmarks/bench_merge.py [--chunks 20] [--variations 200] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+
+import cloudpickle
+from coffea.processor import accumulate
+
+from _common import best_of
+from bench_payload import make_accumulator
+
+
+def bench_merge(n_chunks: int, n_variations: int, repeat: int = 3) -> dict[str, float]:
+    acc = make_accumulator(n_variations)
+    mb = len(cloudpickle.dumps(acc)) / 1e6
+    # independent copies, as every chunk payload is unpickled separately
+    chunks = [cloudpickle.loads(cloudpickle.dumps(acc)) for _ in range(n_chunks)]
+
+    def merge():
+        merged = None
+        for c in chunks:
+            merged = accumulate([c], accum=merged)
+
+    seconds = best_of(merge, repeat)
+    return {f"merge_{n_chunks}_chunks_{n_variations}_variations_s": seconds,
+            "merge_MB_per_s": n_chunks * mb / seconds}
+
+
+def run(quick: bool = False, chunks: int | None = None, variations: int | None = None,
+        repeat: int = 3) -> dict[str, float]:
+    return bench_merge(chunks or (5 if quick else 20), variations or (50 if quick else 200), repeat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--variations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name, value in run(chunks=args.chunks, variations=args.variations, repeat=args.repeat).items():
+        print(f"{name:<40} {value:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark chunk dispatch: sequential chunks vs parallel_chunks on a local
+Dask cluster (LocalCluster) vs the local process-pool backend, running a
+fake analysis with a fixed CPU cost per file (see _common.fake_builder).
+
+    python benchmarks/bench_parallel.py [--workers 4] [--datasets 8] [--files-per-dataset 4]
+                                        [--cost 0.05] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from _common import fake_builder, synthetic_fileset
+
+from coffea_workflow import Analysis, ExecutorConfig, Fileset, RunConfig, Step, Workflow, run as run_workflow
+
+
+def _time_run(fileset: dict, builder, ec: ExecutorConfig, repeat: int) -> float:
+    """Best wall time of repeat cold runs (fresh cache each time)."""
+    return min(_cold_run(fileset, builder, ec) for _ in range(repeat))
+
+
+def _cold_run(fileset: dict, builder, ec: ExecutorConfig) -> float:
+    wf = Workflow()
+    fs = wf.add(Step(name="fs", step_type=Fileset, builder=lambda: fileset))
+    wf.add(Step(name="an", step_type=Analysis, builder=builder), depends_on=[fs])
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        run_workflow(wf, RunConfig(cache_dir=Path(tmp), strategy="by_dataset", executor_config=ec))
+        return time.perf_counter() - t0
+
+
+def bench_dispatch(workers: int, n_datasets: int, files_per_dataset: int, cost: float,
+                   repeat: int = 3) -> dict[str, float]:
+    from coffea.processor import DaskExecutor
+    from dask.distributed import Client, LocalCluster
+
+    fileset = synthetic_fileset(n_datasets * files_per_dataset, n_datasets)
+    builder = fake_builder(cost)
+    results = {}
+    with LocalCluster(n_workers=workers, threads_per_worker=1, processes=True) as cluster, \
+            Client(cluster) as client:
+        dask_exec = DaskExecutor(client=client)
+        results["sequential_dask_s"] = _time_run(fileset, builder, ExecutorConfig(executor=dask_exec), repeat)
+        results["parallel_chunks_dask_s"] = _time_run(
+            fileset, builder, ExecutorConfig(executor=dask_exec, parallel_chunks=True), repeat)
+        results["parallel_chunks_dask_tree_reduce_s"] = _time_run(
+            fileset, builder, ExecutorConfig(executor=dask_exec, parallel_chunks=True, tree_reduce=True), repeat)
+    results["parallel_chunks_processes_s"] = _time_run(
+        fileset, builder,
+        ExecutorConfig(executor_type="FuturesExecutor", workers=workers, parallel_chunks=True), repeat)
+    results["ideal_s"] = cost * n_datasets * files_per_dataset / workers
+    return results
+
+
+def run(quick: bool = False, workers: int = 4, datasets: int | None = None,
+        files_per_dataset: int = 4, cost: float | None = None, repeat: int | None = None) -> dict[str, float]:
+    return bench_dispatch(workers, datasets or (4 if quick else 8), files_per_dataset,
+                          cost if cost is not None else (0.02 if quick else 0.05),
+                          repeat or (2 if quick else 3))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--datasets", type=int, default=8)
+    parser.add_argument("--files-per-dataset", type=int, default=4)
+    parser.add_argument("--cost", type=float, default=0.05, help="CPU seconds per file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name, value in run(workers=args.workers, datasets=args.datasets, files_per_dataset=args.files_per_dataset,
+                           cost=args.cost, repeat=args.repeat).items():
+        print(f"{name:<40} {value:>10.3f} s")
+
+
+if __name__ == "__main__":
+    main()
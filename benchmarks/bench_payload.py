@@ -0,0 +1,114 @@
+"""
+Benchmark payload.pkl serialization: legacy raw cloudpickle vs the framed
+pickle-5 format with each available codec (see coffea_workflow/payload.py).
+
+The synthetic accumulator mimics the AGC TtbarAnalysis output: a few
+histograms with a process x variation category grid and weighted storage.
+
+    python benchmarks/bench_payload.py [--variations 200] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import cloudpickle
+import hist
+import numpy as np
+
+from coffea_workflow import payload
+
+
+def make_accumulator(n_variations: int = 200, n_bins: int = 100, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    processes = ["ttbar", "single_top_s_chan", "single_top_t_chan", "single_top_tW", "wjets"]
+    variations = ["nominal"] + [f"var_{i}" for i in range(n_variations - 1)]
+    acc = {}
+    for region in ("4j1b", "4j2b"):
+        h = (
+            hist.Hist.new.Reg(n_bins, 50, 550, name="observable")
+            .StrCat(processes, name="process")
+            .StrCat(variations, name="variation")
+            .Weight()
+        )
+        n = 2_000_000
+        h.fill(
+            observable=rng.uniform(50, 550, n),
+            process=np.asarray(processes)[rng.integers(0, len(processes), n)],
+            variation=np.asarray(variations)[rng.integers(0, len(variations), n)],
+            weight=rng.normal(1.0, 0.1, n),
+        )
+        acc[f"hist_{region}"] = h
+    acc["cutflow"] = {p: int(rng.integers(1e5, 1e6)) for p in processes}
+    return acc
+
+
+def _legacy_write(path, obj):
+    path.write_bytes(cloudpickle.dumps(obj))
+
+
+def _legacy_read(path):
+    return cloudpickle.loads(path.read_bytes())
+
+
+def bench(acc: dict, repeat: int = 3) -> list[dict]:
+    """Best-of-repeat write/read time and file size for every format."""
+    formats = [("cloudpickle (legacy)", _legacy_write, _legacy_read)]
+    for codec in payload.available_codecs():
+        try:
+            payload.get_codec(codec)
+        except RuntimeError:
+            continue  # optional package not installed
+        formats.append((
+            f"pickle5 + {codec}",
+            lambda p, o, c=codec: payload.write_payload(p, o, None if c == "none" else c),
+            payload.read_payload,
+        ))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "payload.pkl"
+        for name, write, read in formats:
+            write_s = read_s = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                write(path, acc)
+                write_s = min(write_s, time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                read(path)
+                read_s = min(read_s, time.perf_counter() - t0)
+            rows.append({"format": name, "bytes": path.stat().st_size,
+                         "write_s": write_s, "read_s": read_s})
+    return rows
+
+
+def run(quick: bool = False, variations: int | None = None, repeat: int = 3) -> dict[str, float]:
+    """Flat metrics for run_all.py: write/read seconds and size per format."""
+    results = {}
+    for row in bench(make_accumulator(variations or (50 if quick else 200)), repeat):
+        key = row["format"].replace(" + ", "_").replace(" (legacy)", "").replace(" ", "_")
+        results[f"{key}_write_s"] = row["write_s"]
+        results[f"{key}_read_s"] = row["read_s"]
+        results[f"{key}_bytes"] = row["bytes"]
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--variations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    acc = make_accumulator(args.variations)
+    raw_mb = len(cloudpickle.dumps(acc)) / 1e6
+    print(f"Synthetic accumulator: {raw_mb:.1f} MB pickled, {args.variations} variations\n")
+    print(f"{'format':<24} {'size MB':>9} {'write MB/s':>11} {'read MB/s':>10}")
+    for row in bench(acc, args.repeat):
+        print(f"{row['format']:<24} {row['bytes'] / 1e6:>9.2f} "
+              f"{raw_mb / row['write_s']:>11.0f} {raw_mb / row['read_s']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Run the benchmark suite, store the results and compare them with the
+previous stored run.
+
+    python benchmarks/run_all.py [--quick] [--only cache chunking ...]
+                                 [--results-dir benchmarks/results] [--threshold 0.1]
+
+Each run is written to <results-dir>/<UTC time>-<commit>.json (the commit
+gets a "-dirty" suffix with uncommitted changes), so results of different
+commits can be diffed; only compare runs made on the same machine. Metrics
+that got worse by more than --threshold are flagged as REGRESSION and make
+the exit status 1.
+
+Benchmarks (each also runs standalone, see its docstring):
+
+    cache      Executor.exists() per chunk vs number of cached chunks; identity hashing
+    chunking   Chunking producer and LPT balancing on a 100k-file fileset
+    merge      accumulate() throughput for large weighted histograms
+    payload    payload.pkl write/read per codec
+    parallel   sequential vs parallel_chunks on a LocalCluster vs the process pool
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from _common import RESULTS_DIR, compare, load_previous, save_results  # noqa: E402
+
+BENCHMARKS = ("cache", "chunking", "merge", "payload", "parallel")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--results-dir", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only:
+        module = importlib.import_module(f"bench_{name}")
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = module.run(quick=args.quick)
+        print(f"{name:<10} done in {time.perf_counter() - t0:.1f} s")
+        for metric, value in results[name].items():
+            print(f"    {metric:<44} {value:.6g}")
+
+    path = save_results(results, args.results_dir)
+    print(f"\nResults written to {path}")
+    previous = load_previous(args.results_dir, exclude=path)
+    if previous is None:
+        return 0
+    print(f"\nCompared with {previous['commit']} ({previous['timestamp']}):")
+    lines = compare(results, previous, args.threshold)
+    for line in lines:
+        print(line)
+    return 1 if any(line.endswith("REGRESSION") for line in lines) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
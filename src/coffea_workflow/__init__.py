@@ -1,21 +1,25 @@
 from .workflow import Step, Workflow
-from .artifacts import Fileset, Analysis, Plotting, CustomArtifact
-from .config import RunConfig, ExecutorConfig, FacilityBase
+from .artifacts import Fileset, Preprocessed, Analysis, Plotting, CustomArtifact
+from .config import RunConfig, ExecutorConfig, FacilityBase, RetryPolicy
 from .render import run
 from .histserv_utils import detect_histserv_address
+from .cache_manager import gc
 from . import default_producers
 
 __all__ = [
     "Step",
     "Workflow",
     "Fileset",
+    "Preprocessed",
     "Analysis",
     "Plotting",
     "CustomArtifact",
     "RunConfig",
     "ExecutorConfig",
     "FacilityBase",
+    "RetryPolicy",
     "run",
     "detect_histserv_address",
+    "gc",
     "default_producers",
 ]
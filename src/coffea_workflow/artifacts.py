@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Callable, Mapping, Protocol, runtime_checkable
-from .identity import hash_identity
+from .identity import artifact_identity, legacy_artifact_identity
 
 
 def _builder_key(builder: str | Callable) -> str:
@@ -51,6 +51,10 @@ def _identity_safe_params(params_tuple: tuple) -> dict:
     """Normalize a (k, v) params tuple into a dict safe for cache-identity hashing."""
     return {k: _normalize_for_identity(v) for k, v in params_tuple}
 
+def _code_version_key(code_version: str | None) -> dict:
+    """Identity entry for an opt-in code fingerprint; absent when unset so existing identities don't change."""
+    return {} if code_version is None else {"code_version": code_version}
+
 ARTIFACT_REGISTRY = {}
 
 def register_artifact(cls):
@@ -70,6 +74,8 @@ class ArtifactBase:
     always_rerun = False
     input_type  = "any"
     output_type = "any"
+    # keys that only name the artifact: artifacts equal apart from them produce the same output
+    label_keys = ()
 
     def keys(self):
         raise NotImplementedError
@@ -79,7 +85,33 @@ class ArtifactBase:
         return type(self).__name__
 
     def identity(self) -> str:
-        return hash_identity(self.to_dict())
+        """
+        Content hash of to_dict(). Computed once per instance: artifacts are frozen, and
+        path_for/exists/materialize ask for it repeatedly for every chunk.
+        """
+        cached = self.__dict__.get("_identity")
+        if cached is None:
+            cached = artifact_identity(self.to_dict())
+            object.__setattr__(self, "_identity", cached)
+        return cached
+
+    def work_identity(self) -> str:
+        """
+        identity() without label_keys. Artifacts that share it (e.g. two Analysis steps that
+        differ only in name) do the same work, which Executor.materialize does once per run.
+        """
+        if not self.label_keys:
+            return self.identity()
+        cached = self.__dict__.get("_work_identity")
+        if cached is None:
+            keys = {k: v for k, v in self.keys().items() if k not in self.label_keys}
+            cached = artifact_identity({"type": self.__class__.__name__, "keys": keys})
+            object.__setattr__(self, "_work_identity", cached)
+        return cached
+
+    def legacy_identity(self) -> str:
+        """Identity under the pre-versioning scheme, used to migrate old cache entries."""
+        return legacy_artifact_identity(self.to_dict())
 
     def to_dict(self) -> dict:
         return {"type": self.__class__.__name__, "keys": self.keys()}
@@ -108,6 +140,46 @@ class Fileset(ArtifactBase):
             "builder_params": dict(self.builder_params),
         }
 
+@register_artifact
+@dataclass(frozen=True)
+class Preprocessed(ArtifactBase):
+    """
+    Optional artifact between a Fileset and an Analysis for event-level splitting.
+    Opens every file of the upstream fileset once, records its entry count and UUID
+    (plus custom_builder(tree) metadata, if set) and cuts it into step_size-event
+    coffea WorkItems (see preprocessing.py). Chunking then splits WorkItems instead
+    of files, so a chunk can be part of a large file.
+    Its producer writes:
+        .cache/Preprocessed/<identity>/workitems.json
+    aggregate_builder, if set, receives the full WorkItem list and may return a
+    modified one (e.g. to drop or merge ranges).
+
+    Declared as Step(step_type=Preprocessed, artifact_params={"step_size": 50_000, ...}).
+    """
+    input_type  = "fileset_dict"
+    output_type = "fileset_dict"  # stands in for the Fileset of the Analysis that depends on it
+
+    name: str
+    fileset: ArtifactBase
+    step_size: int = 100_000
+    treename: str = "Events"
+    custom_builder: str | Callable | None = None
+    aggregate_builder: str | Callable | None = None
+
+    def __post_init__(self):
+        if not isinstance(self.step_size, int) or self.step_size < 1:
+            raise ValueError(f"Preprocessed step '{self.name}': step_size must be a positive int")
+
+    def keys(self):
+        return {
+            "name": self.name,
+            "fileset": self.fileset,
+            "step_size": self.step_size,
+            "treename": self.treename,
+            "custom_builder": _builder_key(self.custom_builder) if self.custom_builder is not None else None,
+            "aggregate_builder": _builder_key(self.aggregate_builder) if self.aggregate_builder is not None else None,
+        }
+
 @register_artifact
 @dataclass(frozen=True)
 class Chunking(ArtifactBase):
@@ -117,7 +189,7 @@ class Chunking(ArtifactBase):
     Returns fileset chunks based on splitting strategy.
     Its producer writes:
         .cache/Chunking/<identity>/
-            manifest.json
+            manifest.json          # chunk files + hashes; "balance" stats when event counts are known
             fileset_chunk_0.json
             fileset_chunk_1.json
             ...
@@ -126,6 +198,11 @@ class Chunking(ArtifactBase):
     split_strategy: str | None
     percentage: int | None
     datasets: tuple[str, ...] | None = None
+    target_events_per_chunk: int | None = None
+    target_seconds_per_chunk: float | None = None
+    target_files_per_chunk: int | None = None
+    # ((dataset, events/s), ...) from the throughput history, quantized; see throughput.py
+    cost_model: tuple[tuple[str, float], ...] | None = None
 
     def keys(self):
         return {
@@ -133,6 +210,14 @@ class Chunking(ArtifactBase):
             "split_strategy": self.split_strategy,
             "percentage": self.percentage,
             "datasets": self.datasets,
+            # only when set, so identities of existing Chunking entries don't change
+            **({} if self.target_events_per_chunk is None
+               else {"target_events_per_chunk": self.target_events_per_chunk}),
+            **({} if self.target_seconds_per_chunk is None
+               else {"target_seconds_per_chunk": self.target_seconds_per_chunk}),
+            **({} if self.target_files_per_chunk is None
+               else {"target_files_per_chunk": self.target_files_per_chunk}),
+            **({} if self.cost_model is None else {"cost_model": self.cost_model}),
         }
 
 @register_artifact
@@ -150,6 +235,9 @@ class ChunkAnalysis(ArtifactBase):
 
     Mirrors Analysis's two modes: either analysis_builder (function, escape hatch) or
     processor (declarative — framework builds the coffea Runner) is set, never both.
+
+    part=(start, stop) makes it a sub-chunk: only units[start:stop] of the chunk file's
+    files/WorkItems are processed (RunConfig.bisect_failures, see bisection.py).
     """
     chunk_file: str
     chunk_hash: str
@@ -159,8 +247,12 @@ class ChunkAnalysis(ArtifactBase):
     processor: str | Callable | None = None
     processor_params: tuple = ()
     runner_params: tuple = ()
+    code_version: str | None = None
+    part: tuple[int, int] | None = None
 
     def __post_init__(self):
+        if self.part is not None:
+            object.__setattr__(self, 'part', tuple(self.part))
         object.__setattr__(self, 'builder_params', _to_params_tuple(self.builder_params))
         object.__setattr__(self, 'processor_params', _to_params_tuple(self.processor_params))
         object.__setattr__(self, 'runner_params', _to_params_tuple(self.runner_params))
@@ -177,6 +269,9 @@ class ChunkAnalysis(ArtifactBase):
             "processor": _builder_key(self.processor) if self.processor is not None else None,
             "processor_params": _identity_safe_params(self.processor_params),
             "runner_params": _identity_safe_params(self.runner_params),
+            **_code_version_key(self.code_version),
+            # only sub-chunks have it, so whole chunks keep their identity
+            **({"part": list(self.part)} if self.part is not None else {}),
         }
 
 @register_artifact
@@ -199,9 +294,13 @@ class Analysis(ArtifactBase):
         Processor (Processor(**processor_params)), runner_params are passed through
         to processor.Runner(**runner_params). The framework always injects the
         executor and forces use_result_type=True.
+
+    code_version is filled in by run() with RunConfig(code_fingerprint=True): a hash of
+    the builder/processor source (see code_version.py), passed on to every ChunkAnalysis.
     """
     input_type  = "fileset_dict"
     output_type = "analysis_payload"
+    label_keys  = ("name",)
 
     name: str
     fileset: ArtifactBase
@@ -210,6 +309,7 @@ class Analysis(ArtifactBase):
     processor: str | Callable | None = None
     processor_params: tuple = ()
     runner_params: tuple = ()
+    code_version: str | None = None
 
 
     def __post_init__(self):
@@ -233,6 +333,7 @@ class Analysis(ArtifactBase):
             "processor": _builder_key(self.processor) if self.processor is not None else None,
             "processor_params": _identity_safe_params(self.processor_params),
             "runner_params": _identity_safe_params(self.runner_params),
+            **_code_version_key(self.code_version),
         }
 
 @register_artifact
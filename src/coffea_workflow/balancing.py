@@ -0,0 +1,175 @@
+"""
+strategy="balanced": chunks of near-equal event count.
+
+"by_dataset"/percentage split by file count, so with uneven file sizes one
+chunk can hold many times the events of another, and with parallel_chunks
+the largest chunk sets the wall time. The balanced strategy packs units
+into N chunks with the LPT rule (largest unit first, always into the
+currently lightest chunk), which keeps the heaviest chunk within 4/3 of
+the optimum.
+
+Units are whole files for a Fileset upstream (entry counts come from the
+file metadata cache in preprocessing.py, opening each file at most once)
+and WorkItems for a Preprocessed upstream. A single file larger than the
+target stays one chunk; use a Preprocessed step to balance below file
+granularity.
+
+N is ceil(total events / RunConfig.target_events_per_chunk), or
+100 / RunConfig.percentage when no target is given, capped by the number
+of units. Chunking writes the per-chunk event counts and their
+min/max/mean/stddev to manifest.json under "balance".
+
+With RunConfig.target_seconds_per_chunk the units are weighted by their
+expected runtime instead — events / the dataset's rate from the throughput
+history (throughput.py); datasets without history get the mean rate of the
+others. N is then ceil(total expected seconds / target), and the expected
+seconds per chunk are recorded too. Before there is any history for the
+processor, the event target (or percentage) is used; without either, every
+unit becomes its own chunk, which also gathers history fastest.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Callable, Sequence
+
+
+def lpt_partition(weights: Sequence[int], n_bins: int) -> list[list[int]]:
+    """
+    Indices of weights packed into at most n_bins bins by longest-processing-time
+    first. Ties are broken by index, so the result is deterministic; bins come back
+    ordered by their first index, with indices ascending inside each bin.
+    """
+    n_bins = max(1, min(n_bins, len(weights)))
+    heap = [(0, b) for b in range(n_bins)]
+    bins: list[list[int]] = [[] for _ in range(n_bins)]
+    for idx in sorted(range(len(weights)), key=lambda i: (-weights[i], i)):
+        load, b = heapq.heappop(heap)
+        bins[b].append(idx)
+        heapq.heappush(heap, (load + weights[idx], b))
+    return sorted((sorted(b) for b in bins if b), key=lambda b: b[0])
+
+
+def n_balanced_chunks(weights: Sequence[float], target_events_per_chunk: int | None = None,
+                      percentage: int | None = None) -> int:
+    """weights are event counts; with a seconds target, pass expected seconds and the target in seconds."""
+    if target_events_per_chunk is not None:
+        n = math.ceil(sum(weights) / target_events_per_chunk)
+    elif percentage is not None:
+        n = 100 // percentage
+    else:
+        raise ValueError("strategy='balanced' needs target_events_per_chunk or percentage")
+    return max(1, min(n, len(weights)))
+
+
+def expected_seconds(datasets: Sequence[str], events: Sequence[int],
+                     rates: dict[str, float]) -> list[float]:
+    """events / rate per unit; datasets without a rate use the mean of the known rates."""
+    fallback = sum(rates.values()) / len(rates)
+    return [n / rates.get(ds, fallback) for ds, n in zip(datasets, events)]
+
+
+def _pack(datasets: Sequence[str], events: Sequence[int], target_events_per_chunk: int | None,
+          percentage: int | None, target_seconds_per_chunk: float | None,
+          rates: dict[str, float] | None) -> tuple[list[list[int]], list[float] | None]:
+    """LPT bins of unit indices, plus the unit runtimes they were packed by (None when packed by events)."""
+    if target_seconds_per_chunk is not None and rates:
+        seconds = expected_seconds(datasets, events, rates)
+        n = n_balanced_chunks(seconds, target_seconds_per_chunk)
+        return lpt_partition(seconds, n), seconds
+    if target_events_per_chunk is None and percentage is None and target_seconds_per_chunk is not None:
+        return [[i] for i in range(len(events))], None  # no history yet
+    n = n_balanced_chunks(events, target_events_per_chunk, percentage)
+    return lpt_partition(events, n), None
+
+
+def balance_stats(per_chunk: Sequence[float], key: str = "events_per_chunk") -> dict:
+    """min/max/mean/stddev of per-chunk event counts (or expected seconds), as recorded in manifest.json."""
+    n = len(per_chunk)
+    if n == 0:
+        return {key: [], "min": 0, "max": 0, "mean": 0.0, "stddev": 0.0}
+    mean = sum(per_chunk) / n
+    return {
+        key: list(per_chunk),
+        "min": min(per_chunk),
+        "max": max(per_chunk),
+        "mean": mean,
+        "stddev": math.sqrt(sum((e - mean) ** 2 for e in per_chunk) / n),
+    }
+
+
+def _select(names, datasets: list | tuple | Callable | None) -> set:
+    if datasets is None:
+        return set(names)
+    if callable(datasets):
+        return {n for n in names if datasets(n)}
+    return set(datasets) & set(names)
+
+
+def balance_workitems(records: list[dict], target_events_per_chunk: int | None = None,
+                      percentage: int | None = None,
+                      datasets: list | tuple | Callable | None = None,
+                      target_seconds_per_chunk: float | None = None,
+                      rates: dict[str, float] | None = None) -> tuple[list[list[dict]], list[float] | None]:
+    """
+    Pack WorkItem records into chunks of near-equal entrystop - entrystart (or expected
+    runtime, given rates and target_seconds_per_chunk). Returns the chunks and their
+    expected seconds, which is None when they were packed by event count.
+    """
+    keep = _select({r["dataset"] for r in records}, datasets)
+    records = [r for r in records if r["dataset"] in keep]
+    if not records:
+        return [], None
+    events = [r["entrystop"] - r["entrystart"] for r in records]
+    bins, seconds = _pack([r["dataset"] for r in records], events, target_events_per_chunk,
+                          percentage, target_seconds_per_chunk, rates)
+    chunk_seconds = [sum(seconds[i] for i in b) for b in bins] if seconds is not None else None
+    return [[records[i] for i in b] for b in bins], chunk_seconds
+
+
+def balance_fileset(fileset: dict, entries: dict[tuple[str, str], int],
+                    target_events_per_chunk: int | None = None, percentage: int | None = None,
+                    datasets: list | tuple | Callable | None = None,
+                    treename: str = "Events", target_seconds_per_chunk: float | None = None,
+                    rates: dict[str, float] | None = None) -> tuple[list[dict], list[float] | None]:
+    """
+    Pack the files of a fileset into partial filesets of near-equal event count (or
+    expected runtime, as balance_workitems). entries maps (dataset, url) to the file's
+    entry count. Chunks keep each dataset's other fields (metadata, treename, ...) and
+    its files container type, like coffea's split_fileset.
+    """
+    units = []  # (dataset, url, treename or None)
+    normalized = {}
+    for dataset in sorted(_select(fileset, datasets)):
+        data = fileset[dataset]
+        if isinstance(data, (list, tuple)):
+            data = {"files": list(data)}
+        files = data.get("files", {})
+        if isinstance(files, (list, tuple)) and "treename" not in data:
+            data = {**data, "treename": treename}  # self-contained chunks, as split_fileset(treename=...)
+        normalized[dataset] = data
+        if isinstance(files, dict):
+            units.extend((dataset, url, tree) for url, tree in sorted(files.items()))
+        else:
+            units.extend((dataset, url, None) for url in sorted(files))
+    if not units:
+        return [], None
+
+    events = [entries[(dataset, url)] for dataset, url, _ in units]
+    bins, seconds = _pack([dataset for dataset, _, _ in units], events, target_events_per_chunk,
+                          percentage, target_seconds_per_chunk, rates)
+    chunks = []
+    for b in bins:
+        chunk: dict = {}
+        for dataset, url, tree in (units[i] for i in b):
+            data = normalized[dataset]
+            entry = chunk.setdefault(dataset, {
+                **data, "files": {} if isinstance(data.get("files"), dict) else [],
+            })
+            if tree is None:
+                entry["files"].append(url)
+            else:
+                entry["files"][url] = tree
+        chunks.append(chunk)
+    chunk_seconds = [sum(seconds[i] for i in b) for b in bins] if seconds is not None else None
+    return chunks, chunk_seconds
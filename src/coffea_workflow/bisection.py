@@ -0,0 +1,59 @@
+"""
+RunConfig(bisect_failures=True): narrow a failed chunk down to its bad files.
+
+One unreadable file fails its whole chunk, and every good file in it is
+processed again on each rerun. With bisection, execute_analysis splits a
+failed chunk's units — files of a fileset chunk, WorkItems of a
+Preprocessed chunk — into two halves and runs each half as a sub-chunk: a
+ChunkAnalysis with part=(start, stop), a slice of the chunk file's units.
+Halves that succeed are merged and cached like any chunk; halves that fail
+are split again, down to single units, which are reported one failure
+entry per file:
+
+    {"chunk_file": "fileset_chunk_3.json", "file": "ZJets: root://.../f7.root", "error": ...}
+
+A sub-chunk's identity is its chunk's hash plus the slice, so a rerun with
+the same chunking finds the good halves in the cache and only runs the
+failing units again. On a rerun a chunk that failed before is bisected
+straight away instead of running it whole first.
+
+Units are ordered as in the chunk file (datasets and files sorted by name,
+as Chunking writes them).
+"""
+from __future__ import annotations
+
+from typing import Any
+
+
+def chunk_units(chunk: dict | list) -> list[Any]:
+    """(dataset, file) pairs of a fileset chunk, or the WorkItem records of a WorkItem chunk."""
+    if isinstance(chunk, list):
+        return list(chunk)
+    return [(dataset, path) for dataset, spec in chunk.items() for path in spec["files"]]
+
+
+def chunk_part(chunk: dict | list, start: int, stop: int) -> dict | list:
+    """The chunk restricted to units[start:stop]; datasets left without files are dropped."""
+    if isinstance(chunk, list):
+        return chunk[start:stop]
+    keep: dict[str, list[str]] = {}
+    for dataset, path in chunk_units(chunk)[start:stop]:
+        keep.setdefault(dataset, []).append(path)
+    return {
+        dataset: {**chunk[dataset], "files": {path: chunk[dataset]["files"][path] for path in paths}}
+        for dataset, paths in keep.items()
+    }
+
+
+def unit_label(chunk: dict | list, index: int) -> str:
+    """Human-readable name of one unit, for failure reports."""
+    unit = chunk_units(chunk)[index]
+    if isinstance(chunk, list):
+        return f"{unit['dataset']}: {unit['filename']} [{unit['entrystart']}:{unit['entrystop']}]"
+    dataset, path = unit
+    return f"{dataset}: {path}"
+
+
+def halves(start: int, stop: int) -> list[tuple[int, int]]:
+    mid = (start + stop) // 2
+    return [(start, mid), (mid, stop)]
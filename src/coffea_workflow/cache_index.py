@@ -0,0 +1,317 @@
+"""
+Persistent index of the artifact cache.
+
+Executor.exists() used to answer every lookup from the filesystem: is_dir() on
+the artifact directory, the expected sentinel file, and for Analysis the
+.has_failures/.chunk_fraction stamps. On AFS/EOS-backed cache dirs with
+thousands of ChunkAnalysis entries that adds up to minutes before anything is
+submitted. CacheIndex keeps one SQLite file under cache_dir:
+
+    .cache/index.sqlite
+        artifacts(type, identity, status, size, chunk_fraction,
+                  created_at, updated_at, accessed_at)
+
+so each lookup is a single query plus an is_dir() on the entry. The
+directory tree stays the source of truth: a missing or corrupt index is
+rebuilt from a directory scan, a row whose directory was deleted by hand is
+dropped on lookup, and any SQLite error while running (e.g. a filesystem
+without working file locks) disables the index for the rest of the run, so
+Executor falls back to the filesystem checks.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .producers_utils import _safe_print
+
+INDEX_FILE = "index.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    type           TEXT NOT NULL,
+    identity       TEXT NOT NULL,
+    status         TEXT NOT NULL,
+    size           INTEGER NOT NULL DEFAULT 0,
+    chunk_fraction TEXT,
+    created_at     REAL NOT NULL,
+    updated_at     REAL NOT NULL,
+    accessed_at    REAL NOT NULL,
+    PRIMARY KEY (type, identity)
+)
+"""
+
+# status values stored in the index
+COMPLETE = "complete"
+INCOMPLETE = "incomplete"
+
+
+def _dir_size(path: Path) -> int:
+    """Total size in bytes of the regular files below path."""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+class CacheIndex:
+    """
+    SQLite-backed index of <cache_dir>/<type>/<identity>/ entries.
+
+    The connection is opened lazily on first use, so constructing an Executor
+    never touches the cache directory. One connection is shared by all
+    threads of a run (render.run may materialize steps concurrently) and
+    guarded by a lock; every write is its own transaction.
+    """
+
+    def __init__(self, cache_dir: Path, scan: Callable[[str, Path], dict | None]):
+        self.cache_dir = Path(cache_dir)
+        self.path = self.cache_dir / INDEX_FILE
+        self._scan = scan  # (type_name, dir) -> entry dict or None, see Executor._scan
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+        self._lock = threading.Lock()
+        self._pending_touches: set[tuple[str, str]] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return not self._disabled
+
+    def _open(self) -> sqlite3.Connection | None:
+        if self._disabled:
+            return None
+        if self._conn is not None:
+            return self._conn
+        fresh = not self.path.exists()
+        try:
+            conn = self._connect()
+        except sqlite3.DatabaseError as exc:
+            _safe_print(f"Cache index {self.path} is unreadable ({exc}); rebuilding it from a directory scan.")
+            self.path.unlink(missing_ok=True)
+            fresh = True
+            try:
+                conn = self._connect()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return None
+        self._conn = conn
+        if fresh:
+            try:
+                self._rebuild_locked()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                conn.execute("DROP TABLE IF EXISTS artifacts")
+            conn.execute(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+            # a corrupt file often opens fine and only fails on the first real read
+            conn.execute("SELECT count(*) FROM artifacts").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _disable(self, exc: Exception) -> None:
+        _safe_print(f"Cache index disabled for this run ({exc}); falling back to filesystem checks.")
+        self._disabled = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+        self._conn = None
+
+    def _iter_cache_dirs(self) -> Iterable[tuple[str, Path]]:
+        if not self.cache_dir.is_dir():
+            return
+        for type_dir in self.cache_dir.iterdir():
+            if not type_dir.is_dir():
+                continue
+            for art_dir in type_dir.iterdir():
+                if art_dir.is_dir():
+                    yield type_dir.name, art_dir
+
+    def _rebuild_locked(self) -> None:
+        rows = []
+        for type_name, art_dir in self._iter_cache_dirs():
+            entry = self._scan(type_name, art_dir)
+            if entry is None:
+                continue
+            # the directory mtime is the best guess for when an entry was last used
+            mtime = art_dir.stat().st_mtime
+            rows.append((
+                type_name, art_dir.name, entry["status"], entry["size"],
+                entry["chunk_fraction"], mtime, mtime, mtime,
+            ))
+        with self._conn:
+            self._conn.execute("DELETE FROM artifacts")
+            self._conn.executemany(
+                "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def rebuild(self) -> None:
+        """Drop every row and re-index the cache directory from a scan."""
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return
+            try:
+                self._rebuild_locked()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def lookup(self, type_name: str, identity: str) -> dict | None:
+        """Return the indexed entry for an artifact, or None if it is not indexed."""
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT status, size, chunk_fraction FROM artifacts WHERE type = ? AND identity = ?",
+                    (type_name, identity),
+                ).fetchone()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return None
+        if row is None:
+            return None
+        return {"status": row[0], "size": row[1], "chunk_fraction": row[2]}
+
+    def record(self, type_name: str, identity: str, entry: dict) -> None:
+        """Insert or update an artifact's entry in one transaction."""
+        now = time.time()
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        """
+                        INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (type, identity) DO UPDATE SET
+                            status = excluded.status,
+                            size = excluded.size,
+                            chunk_fraction = excluded.chunk_fraction,
+                            updated_at = excluded.updated_at,
+                            accessed_at = excluded.accessed_at
+                        """,
+                        (type_name, identity, entry["status"], entry["size"],
+                         entry["chunk_fraction"], now, now, now),
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def touch(self, type_name: str, identity: str) -> None:
+        """
+        Mark an artifact as used now. Touches are queued and written by flush() in one
+        transaction, so a run with thousands of cache hits does not commit thousands of times.
+        """
+        with self._lock:
+            self._pending_touches.add((type_name, identity))
+
+    def flush(self) -> None:
+        """Write queued access timestamps."""
+        with self._lock:
+            if not self._pending_touches:
+                return
+            conn = self._open()
+            if conn is None:
+                return
+            now = time.time()
+            try:
+                with conn:
+                    conn.executemany(
+                        "UPDATE artifacts SET accessed_at = ? WHERE type = ? AND identity = ?",
+                        [(now, t, i) for t, i in self._pending_touches],
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+            self._pending_touches.clear()
+
+    def entries(self) -> list[dict] | None:
+        """All indexed entries, or None when the index is unavailable."""
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return None
+            try:
+                rows = conn.execute(
+                    "SELECT type, identity, status, size, accessed_at FROM artifacts"
+                ).fetchall()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return None
+        return [
+            {"type": t, "identity": i, "status": st, "size": sz, "accessed_at": at}
+            for t, i, st, sz, at in rows
+        ]
+
+    def remove(self, type_name: str, identity: str) -> None:
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return
+            self._pending_touches.discard((type_name, identity))
+            try:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM artifacts WHERE type = ? AND identity = ?", (type_name, identity)
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def sync(self) -> None:
+        """
+        Reconcile the index with the directory tree without losing access times: index
+        directories that are missing from it (access time = directory mtime) and drop rows
+        whose directory is gone.
+        """
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return
+            try:
+                known = set(conn.execute("SELECT type, identity FROM artifacts").fetchall())
+                on_disk = {}
+                for type_name, art_dir in self._iter_cache_dirs():
+                    on_disk[(type_name, art_dir.name)] = art_dir
+                rows = []
+                for (type_name, identity), art_dir in on_disk.items():
+                    if (type_name, identity) in known:
+                        continue
+                    entry = self._scan(type_name, art_dir)
+                    if entry is None:
+                        continue
+                    mtime = art_dir.stat().st_mtime
+                    rows.append((
+                        type_name, identity, entry["status"], entry["size"],
+                        entry["chunk_fraction"], mtime, mtime, mtime,
+                    ))
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+                    conn.executemany(
+                        "DELETE FROM artifacts WHERE type = ? AND identity = ?",
+                        [key for key in known if key not in on_disk],
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,217 @@
+"""
+Size quota, LRU eviction and garbage collection for the artifact cache.
+
+The .cache/<Type>/<identity>/ tree only grows: every parameter tweak creates
+new Analysis and ChunkAnalysis directories. CacheManager removes entries in
+least-recently-used order (access times are bumped by Executor.materialize on
+every cache hit, see cache_index.py) until the cache fits max_cache_bytes.
+Artifacts used by the current run — everything in the Executor's session
+cache — are pinned and never evicted.
+
+gc() additionally removes orphaned ChunkAnalysis directories: chunk results
+whose .chunk_hash is not listed by any Chunking manifest left in the cache,
+so no Analysis can ever merge them again. Eviction therefore keeps a Chunking
+entry as long as any chunk result it lists is still cached; otherwise
+evicting the small manifest would turn all of its chunks into orphans.
+
+    from coffea_workflow import gc
+    gc(".cache", max_cache_bytes=50 * 1024**3)
+
+RunConfig(max_cache_bytes=...) applies the quota automatically at the end of
+every run().
+"""
+from __future__ import annotations
+
+import json
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+from .cache_index import _dir_size
+from .producers_utils import _safe_print
+
+
+class CacheManager:
+    """
+    Evicts entries from an Executor's cache directory. Works from the cache index
+    when it is enabled and falls back to a directory scan (directory mtime as the
+    access time) when RunConfig(cache_index=False).
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self.cache_dir = Path(executor.cache_dir)
+
+    def entries(self) -> list[dict]:
+        """Every cache entry as {type, identity, path, size, accessed_at}."""
+        index = self._executor._index
+        rows = None
+        if index is not None:
+            index.flush()
+            index.sync()
+            rows = index.entries()
+        if rows is None:
+            rows = []
+            if self.cache_dir.is_dir():
+                for type_dir in self.cache_dir.iterdir():
+                    if not type_dir.is_dir():
+                        continue
+                    for art_dir in type_dir.iterdir():
+                        if art_dir.is_dir():
+                            rows.append({
+                                "type": type_dir.name,
+                                "identity": art_dir.name,
+                                "size": _dir_size(art_dir),
+                                "accessed_at": art_dir.stat().st_mtime,
+                            })
+        for row in rows:
+            row["path"] = self.cache_dir / row["type"] / row["identity"]
+        return rows
+
+    def total_bytes(self) -> int:
+        return sum(e["size"] for e in self.entries())
+
+    def pinned(self) -> set[Path]:
+        """Paths used by the current run; never evicted."""
+        return set(self._executor._session_cache)
+
+    @staticmethod
+    def _manifest_hashes(chunking_dir: Path) -> set[str]:
+        """Chunk hashes listed by a Chunking entry's manifest (empty if it is unreadable)."""
+        try:
+            output_files = json.loads((chunking_dir / "manifest.json").read_text())["output_files"]
+        except (OSError, ValueError, KeyError):
+            return set()
+        return {entry["hash"] for entry in output_files.values()}
+
+    @staticmethod
+    def _chunk_hash(chunk_dir: Path) -> str | None:
+        """A ChunkAnalysis entry's .chunk_hash stamp, or None for results written before it existed."""
+        try:
+            return (chunk_dir / ".chunk_hash").read_text().strip()
+        except OSError:
+            return None
+
+    def orphaned_chunks(self) -> list[Path]:
+        """ChunkAnalysis dirs whose chunk hash no Chunking manifest in the cache lists anymore."""
+        chunk_dir = self.cache_dir / "ChunkAnalysis"
+        if not chunk_dir.is_dir():
+            return []
+        live_hashes = set()
+        for manifest in (self.cache_dir / "Chunking").glob("*/manifest.json"):
+            live_hashes |= self._manifest_hashes(manifest.parent)
+        orphans = []
+        for art_dir in chunk_dir.iterdir():
+            chunk_hash = self._chunk_hash(art_dir)
+            # results written before the stamp existed can't be attributed; keep them
+            if chunk_hash is not None and chunk_hash not in live_hashes:
+                orphans.append(art_dir)
+        return orphans
+
+    def _remove(self, path: Path, dry_run: bool) -> None:
+        if dry_run:
+            return
+        shutil.rmtree(path, ignore_errors=True)
+        self._executor._session_cache.discard(path)
+        if self._executor._index is not None:
+            self._executor._index.remove(path.parent.name, path.name)
+
+    def evict(self, max_cache_bytes: int, pinned: Iterable[Path] | None = None,
+              dry_run: bool = False) -> list[Path]:
+        """
+        Remove least-recently-used, unpinned entries until the cache is at most
+        max_cache_bytes. A Chunking entry is only removed once none of the chunk
+        results it lists is left, so gc() never orphans results that are still valid.
+        Returns the removed paths.
+        """
+        pinned = self.pinned() if pinned is None else set(pinned)
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        # chunk hash -> number of ChunkAnalysis entries with that hash still cached
+        stamps = {e["path"]: self._chunk_hash(e["path"]) for e in entries if e["type"] == "ChunkAnalysis"}
+        live = Counter(h for h in stamps.values() if h is not None)
+        removed = []
+        deferred = []  # Chunking entries that still had cached chunks when their turn came
+
+        def remove(entry):
+            nonlocal total
+            self._remove(entry["path"], dry_run)
+            total -= entry["size"]
+            removed.append(entry["path"])
+            chunk_hash = stamps.get(entry["path"])
+            if chunk_hash is not None:
+                live[chunk_hash] -= 1
+
+        def has_live_chunks(entry):
+            return any(live[h] > 0 for h in self._manifest_hashes(entry["path"]))
+
+        for entry in sorted(entries, key=lambda e: e["accessed_at"]):
+            if total <= max_cache_bytes:
+                break
+            if entry["path"] in pinned:
+                continue
+            if entry["type"] == "Chunking" and has_live_chunks(entry):
+                deferred.append(entry)
+                continue
+            remove(entry)
+        for entry in deferred:
+            if total <= max_cache_bytes:
+                break
+            if not has_live_chunks(entry):
+                remove(entry)
+        if total > max_cache_bytes:
+            _safe_print(
+                f"Cache is still {total} bytes after eviction (quota {max_cache_bytes}): "
+                "the remaining entries are pinned by the current run (or are the Chunking "
+                "manifests of pinned chunk results)."
+            )
+        return removed
+
+    def gc(self, max_cache_bytes: int | None = None, pinned: Iterable[Path] | None = None,
+           dry_run: bool = False) -> dict:
+        """
+        Remove orphaned ChunkAnalysis dirs, then evict down to max_cache_bytes (if given).
+        Returns {"removed": [paths], "freed_bytes": int, "total_bytes": int}.
+        """
+        pinned = self.pinned() if pinned is None else set(pinned)
+        sizes = {e["path"]: e["size"] for e in self.entries()}
+        removed = []
+        for path in self.orphaned_chunks():
+            if path in pinned:
+                continue
+            sizes.setdefault(path, _dir_size(path))
+            self._remove(path, dry_run)
+            removed.append(path)
+        if max_cache_bytes is not None:
+            if dry_run:
+                # nothing was deleted above, so leave the orphans out of the eviction pass
+                pinned = pinned | set(removed)
+            removed += self.evict(max_cache_bytes, pinned=pinned, dry_run=dry_run)
+        freed = sum(sizes.get(p, 0) for p in removed)
+        verb = "Would remove" if dry_run else "Removed"
+        _safe_print(f"{verb} {len(removed)} cache entries ({freed} bytes) from {self.cache_dir}")
+        return {
+            "removed": removed,
+            "freed_bytes": freed,
+            "total_bytes": sum(sizes.values()) - freed,
+        }
+
+
+def gc(cache_dir: str | Path = ".cache", max_cache_bytes: int | None = None,
+       dry_run: bool = False) -> dict:
+    """
+    Garbage-collect a cache directory outside of a run: remove orphaned ChunkAnalysis
+    results and, if max_cache_bytes is given, evict least-recently-used entries until
+    the cache fits. Nothing is pinned, so don't run this while a workflow is using the
+    same cache_dir.
+    """
+    from .config import RunConfig
+    from .executor import Executor
+
+    cache_dir = Path(cache_dir)
+    executor = Executor(cache_dir=cache_dir, config=RunConfig(cache_dir=cache_dir))
+    try:
+        return CacheManager(executor).gc(max_cache_bytes=max_cache_bytes, dry_run=dry_run)
+    finally:
+        executor.close()
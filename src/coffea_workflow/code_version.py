@@ -0,0 +1,209 @@
+"""
+Opt-in code-version fingerprints for Analysis and ChunkAnalysis identities.
+
+By default a builder or processor enters the cache identity only as
+'module:qualname', so editing its body does not invalidate cached results.
+With RunConfig(code_fingerprint=True) run() hashes
+
+  - the source of the step's builder/processor (inspect.getsource), and
+  - every module listed in RunConfig(code_fingerprint_modules=...) — e.g. the
+    corrections or selection helpers the processor imports; a package name
+    covers all .py files below it,
+
+into Analysis.code_version, which ChunkAnalysis inherits. Editing one
+processor therefore only recomputes the steps that use it.
+
+Fingerprints are cached per file by (mtime, size), in memory and in one
+SQLite file under cache_dir that run() passes in:
+
+    .cache/fingerprints.sqlite
+        fingerprints(path, qualname, mtime_ns, size, digest)
+
+so unchanged files are not read again, not even by the first run of a new
+process. Like the other SQLite files under cache_dir, it is only an
+accelerator: an unreadable file is recreated and any other SQLite error
+disables it.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import inspect
+import linecache
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .artifacts import _builder_key
+from .identity import hash_identity
+from .producers_utils import _safe_print
+
+FINGERPRINT_FILE = "fingerprints.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path     TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    digest   TEXT NOT NULL,
+    PRIMARY KEY (path, qualname)
+)
+"""
+
+# (file, mtime_ns, size, qualname or "") -> sha256 hex digest
+_FINGERPRINTS: dict[tuple, str] = {}
+_lock = threading.Lock()
+
+
+class FingerprintStore:
+    """
+    SQLite store of file fingerprints under cache_dir, one row per (file, qualname)
+    holding the digest of its latest (mtime, size). The connection is opened on first
+    use; new digests are written in one transaction by close().
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / FINGERPRINT_FILE
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+        self._pending: dict[tuple, str] = {}
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = self._connect()
+            except sqlite3.DatabaseError:
+                self.path.unlink(missing_ok=True)
+                try:
+                    self._conn = self._connect()
+                except sqlite3.Error as exc:
+                    self._disable(exc)
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute(_SCHEMA)
+            conn.commit()
+            conn.execute("SELECT count(*) FROM fingerprints").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _disable(self, exc: Exception) -> None:
+        _safe_print(f"Fingerprint cache disabled ({exc}).")
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._disabled = True
+
+    def get(self, key: tuple) -> str | None:
+        """Digest stored for (file, mtime_ns, size, qualname), or None."""
+        if not self.path.exists() or self._connection() is None:
+            return None
+        path, mtime_ns, size, qualname = key
+        try:
+            row = self._conn.execute(
+                "SELECT digest FROM fingerprints WHERE path = ? AND qualname = ? AND mtime_ns = ? AND size = ?",
+                (path, qualname, mtime_ns, size),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            self._disable(exc)
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key: tuple, digest: str) -> None:
+        self._pending[key] = digest
+
+    def close(self) -> None:
+        if self._pending and self._connection() is not None:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                        [(path, qualname, mtime_ns, size, digest)
+                         for (path, mtime_ns, size, qualname), digest in self._pending.items()],
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+        self._pending.clear()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _stat_key(path: str | Path) -> tuple:
+    st = os.stat(path)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _cached(key: tuple, compute: Callable[[], str], store: FingerprintStore | None = None) -> str:
+    with _lock:
+        digest = _FINGERPRINTS.get(key)
+    stored = None
+    if digest is None and store is not None:
+        digest = stored = store.get(key)
+    if digest is None:
+        digest = compute()
+    if store is not None and stored is None:
+        store.put(key, digest)  # also digests this process already knew, so the next one finds them
+    with _lock:
+        _FINGERPRINTS[key] = digest
+    return digest
+
+
+def _file_fingerprint(path: str | Path, store: FingerprintStore | None = None) -> str:
+    return _cached((*_stat_key(path), ""), lambda: hashlib.sha256(Path(path).read_bytes()).hexdigest(), store)
+
+
+def source_fingerprint(obj: str | Callable, store: FingerprintStore | None = None) -> str:
+    """
+    Hash of the source of a builder/processor ('module:qualname' string, function or class).
+    Objects without retrievable source (builtins, C extensions) fall back to their name.
+    """
+    from .producers_utils import _load_object
+
+    target = inspect.unwrap(_load_object(obj))
+    try:
+        source_file = inspect.getsourcefile(target)
+    except TypeError:
+        source_file = None
+    if source_file is None or not os.path.exists(source_file):
+        return hash_identity(_builder_key(target))
+
+    def compute() -> str:
+        linecache.checkcache(source_file)  # the file may have changed since it was first read
+        return hashlib.sha256(inspect.getsource(target).encode("utf-8")).hexdigest()
+
+    return _cached((*_stat_key(source_file), getattr(target, "__qualname__", "")), compute, store)
+
+
+def module_fingerprint(name: str, store: FingerprintStore | None = None) -> str:
+    """Hash of a module's source file, or of every .py file of a package."""
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.origin is None:
+        raise ValueError(f"code_fingerprint_modules: cannot find module {name!r}")
+    if spec.submodule_search_locations:
+        # keyed by path relative to the package, so the fingerprint doesn't depend on where it is installed
+        files = {
+            p.relative_to(location).as_posix(): p
+            for location in spec.submodule_search_locations
+            for p in Path(location).rglob("*.py")
+        }
+    else:
+        files = {Path(spec.origin).name: Path(spec.origin)}
+    return hash_identity({rel: _file_fingerprint(p, store) for rel, p in files.items()})
+
+
+def code_fingerprint(objects: Iterable[str | Callable | None], modules: Iterable[str] = (),
+                     store: FingerprintStore | None = None) -> str:
+    """Combined fingerprint of the given builders/processors and modules."""
+    return hash_identity(
+        [source_fingerprint(o, store) for o in objects if o is not None],
+        {m: module_fingerprint(m, store) for m in modules},
+    )
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Literal, Optional
 from abc import ABC, abstractmethod
 
-SplitStrategy = Optional[Literal["by_dataset"]]
+SplitStrategy = Optional[Literal["by_dataset", "balanced", "incremental"]]
 
 
 class FacilityBase(ABC):
@@ -36,6 +37,58 @@ class FacilityBase(ABC):
         """Release resources created by build() (e.g. shut down a Dask cluster)."""
 
 
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retries of failed chunks within the same run, in execute_analysis.
+
+    A chunk that failed with an exception that is an instance of one of retry_on, or
+    whose error message matches one of the retry_patterns (re.search), is run again,
+    up to max_attempts runs in total. Attempt n + 1 starts backoff * backoff_factor**(n - 1)
+    seconds (at most max_backoff) after attempt n failed:
+        ExecutorConfig(retry=RetryPolicy(max_attempts=4, retry_patterns=(r"XRootD", r"[Tt]imed? ?out")))
+    """
+    max_attempts: int = 3
+    backoff: float = 1.0
+    backoff_factor: float = 2.0
+    max_backoff: float = 60.0
+    retry_on: tuple[type[BaseException], ...] = (OSError,)
+    retry_patterns: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        if isinstance(self.retry_on, type):
+            object.__setattr__(self, "retry_on", (self.retry_on,))
+        if isinstance(self.retry_on, list):
+            object.__setattr__(self, "retry_on", tuple(self.retry_on))
+        if isinstance(self.retry_patterns, str):
+            object.__setattr__(self, "retry_patterns", (self.retry_patterns,))
+        if isinstance(self.retry_patterns, list):
+            object.__setattr__(self, "retry_patterns", tuple(self.retry_patterns))
+        if not isinstance(self.max_attempts, int) or self.max_attempts < 1:
+            raise ValueError("max_attempts must be an int >= 1")
+        if self.backoff < 0 or self.max_backoff < 0:
+            raise ValueError("backoff and max_backoff must be >= 0")
+        if self.backoff_factor < 1:
+            raise ValueError("backoff_factor must be >= 1")
+        if not all(isinstance(cls, type) and issubclass(cls, BaseException) for cls in self.retry_on):
+            raise TypeError("retry_on must be a tuple of exception classes")
+        for pattern in self.retry_patterns:
+            re.compile(pattern)
+
+    def should_retry(self, error: BaseException | str, attempt: int) -> bool:
+        """Whether a chunk whose attempt number `attempt` failed with error is run again."""
+        if attempt >= self.max_attempts:
+            return False
+        if isinstance(error, self.retry_on):
+            return True
+        message = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        return any(re.search(pattern, message) for pattern in self.retry_patterns)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt` before the next one."""
+        return min(self.backoff * self.backoff_factor ** (attempt - 1), self.max_backoff)
+
+
 @dataclass(frozen=True)
 class ExecutorConfig:
     """
@@ -55,6 +108,34 @@ class ExecutorConfig:
     worker_files: tuple[str, ...] = ()
     worker_packages: tuple[str, ...] = ()
     parallel_chunks: bool = False
+    # parallel_chunks: release each chunk's Dask future as soon as its payload is written and
+    # merged, so neither the cluster nor the driver keeps already-merged chunk results around
+    release_chunk_results: bool = True
+    # parallel_chunks: merge chunk accumulators on the workers in a reduction tree with
+    # tree_reduce_fanin inputs per node; only the final accumulator is sent to the driver, so
+    # the workers write the chunk payloads themselves, as with worker_writes_payload
+    tree_reduce: bool = False
+    tree_reduce_fanin: int = 2
+    # parallel_chunks backend: "dask" submits chunks to the DaskExecutor's client, "processes"
+    # to a local process pool with `workers` processes (one chunk each); "auto" picks dask
+    # when the executor has a client
+    parallel_chunks_backend: Literal["auto", "dask", "processes"] = "auto"
+    # parallel_chunks_backend="processes": address-space limit in bytes per worker process
+    chunk_memory_limit: int | None = None
+    # parallel_chunks: workers write each chunk's payload.pkl and .success straight into the
+    # cache, which must be on a filesystem shared with the driver, and return only a small
+    # status record; the driver reads the payloads from disk when it merges them.
+    # worker_cache_dir is cache_dir as mounted on the workers, if that path differs (also
+    # used by tree_reduce)
+    worker_writes_payload: bool = False
+    worker_cache_dir: str | None = None
+    # failed chunks are run again within the same run, see RetryPolicy
+    retry: RetryPolicy | None = None
+    # parallel_chunks: once speculate_after of the submitted chunks have finished, a chunk
+    # running longer than speculate_stragglers x the median chunk time gets a duplicate on
+    # another worker; the first copy to finish wins and the other is cancelled
+    speculate_stragglers: float | None = None
+    speculate_after: float = 0.75
 
     def __post_init__(self):
         # workers files - are files that the user would need to install to dask client
@@ -62,6 +143,46 @@ class ExecutorConfig:
             object.__setattr__(self, "worker_files", tuple(self.worker_files))
         if isinstance(self.worker_packages, (list, tuple)):
             object.__setattr__(self, "worker_packages", tuple(self.worker_packages))
+        if self.tree_reduce and not self.parallel_chunks:
+            raise ValueError("tree_reduce=True requires parallel_chunks=True")
+        if self.tree_reduce_fanin < 2:
+            raise ValueError("tree_reduce_fanin must be >= 2")
+        if self.parallel_chunks_backend not in ("auto", "dask", "processes"):
+            raise ValueError(
+                f"Invalid parallel_chunks_backend={self.parallel_chunks_backend!r}. "
+                "Use 'auto', 'dask' or 'processes'."
+            )
+        if self.tree_reduce and self.parallel_chunks_backend == "processes":
+            raise ValueError("tree_reduce=True needs the Dask backend (parallel_chunks_backend='dask' or 'auto')")
+        if self.chunk_memory_limit is not None and (
+            not isinstance(self.chunk_memory_limit, int) or self.chunk_memory_limit <= 0
+        ):
+            raise ValueError("chunk_memory_limit must be a positive int (bytes) or None")
+        if self.worker_writes_payload and not self.parallel_chunks:
+            raise ValueError("worker_writes_payload=True requires parallel_chunks=True")
+        if self.worker_cache_dir is not None and not (self.worker_writes_payload or self.tree_reduce):
+            raise ValueError("worker_cache_dir requires worker_writes_payload=True or tree_reduce=True")
+        if self.retry is not None and not isinstance(self.retry, RetryPolicy):
+            raise TypeError("retry must be a RetryPolicy or None")
+        if self.speculate_stragglers is not None:
+            if not self.parallel_chunks:
+                raise ValueError("speculate_stragglers requires parallel_chunks=True")
+            if self.tree_reduce:
+                raise ValueError(
+                    "speculate_stragglers is not supported with tree_reduce=True: the reduction "
+                    "tree is built from the first copy of every chunk"
+                )
+            if self.parallel_chunks_backend == "processes":
+                raise ValueError("speculate_stragglers needs the Dask backend (parallel_chunks_backend='dask' or 'auto')")
+            if self.speculate_stragglers <= 1:
+                raise ValueError("speculate_stragglers must be > 1 (a multiple of the median chunk time)")
+        if not 0 < self.speculate_after <= 1:
+            raise ValueError("speculate_after must be in (0, 1]")
+        if self.retry is not None and self.tree_reduce:
+            raise ValueError(
+                "retry is not supported with tree_reduce=True: chunk results feed the reduction "
+                "tree as they finish, so a failed chunk cannot be resubmitted into it"
+            )
         if self.executor is not None:
             return
         if self.executor_type not in ("IterativeExecutor", "FuturesExecutor", "DaskExecutor"):
@@ -78,8 +199,20 @@ class ExecutorConfig:
 class RunConfig:
     """
     Defines how to run the analysis:
-        - strategy: "by_dataset" splits into one chunk per dataset; None keeps all datasets together
-        - percentage: what percent of each dataset's files per chunk (e.g. 20 → 5 chunks); None = no file split
+        - strategy: "by_dataset" splits into one chunk per dataset; None keeps all datasets together;
+          "balanced" packs files (or Preprocessed WorkItems) into chunks of near-equal event
+          count, across datasets (see balancing.py); "incremental" cuts each dataset's files (or
+          WorkItems) at content-defined boundaries, so growing the fileset leaves the existing
+          chunks, and their cached results, as they were (see incremental.py)
+        - percentage: what percent of each dataset's files per chunk (e.g. 20 → 5 chunks); None = no file split.
+          With strategy="balanced" and no target_events_per_chunk: 100/percentage balanced chunks
+        - target_events_per_chunk: with strategy="balanced", aim for this many events per chunk
+        - target_seconds_per_chunk: with strategy="balanced", aim for chunks that take about this
+          many seconds on one worker, using event rates learned from earlier runs (throughput.py;
+          needs coffea metrics, i.e. savemetrics=True). Until there is history, the event target
+          or percentage is used, or one chunk per file/WorkItem without either
+        - target_files_per_chunk: with strategy="incremental", the average number of files (or
+          WorkItems) per chunk
         - datasets: restrict to specific dataset names; accepts list (auto-converted to tuple) or None for all
         - cache_dir: where to put cached outputs
         - hist_client: a histserv.Client to stream histograms to instead of merging locally
@@ -91,9 +224,41 @@ class RunConfig:
         - histserv_connection_info: manual override pointing at an existing server-side
           histogram. Normally left None — the framework tracks and reconnects to the right
           histogram automatically per Analysis artifact identity (see histserv_utils.py).
+        - payload_compression: codec for payload.pkl files — None (default), "zlib", "lz4",
+          "zstd" or a name added with payload.register_codec(). Payloads are always written
+          as pickle protocol 5 with out-of-band buffers; see payload.py.
+        - cache_index: keep <cache_dir>/index.sqlite so cache lookups are one query instead of
+          several stat calls per artifact (see cache_index.py). Set False on filesystems where
+          SQLite file locking does not work.
+        - max_cache_bytes: size quota for cache_dir. At the end of run(), least-recently-used
+          entries not used by this run are evicted until the cache fits (see cache_manager.py).
+          None (default) never evicts.
+        - max_concurrent_steps: how many workflow steps may be materialized at the same time.
+          Steps whose parents are all done are started as soon as a slot is free, so e.g. a
+          nominal and a systematic-variation Analysis on the same Fileset run side by side.
+          1 (default) runs the steps one after another in topological order.
+        - hist_storage: how merged Analysis histograms are stored. "pickle" (default) keeps
+          everything in payload.pkl; "mmap" writes each histogram's bins to a .npy file that
+          is memory-mapped and rebuilt only when a consumer accesses it (see histstore.py).
+        - code_fingerprint: hash the source of each Analysis step's builder/processor into the
+          Analysis and ChunkAnalysis identity, so editing it recomputes only that step
+          (see code_version.py). Off by default: only 'module:qualname' is hashed.
+        - code_fingerprint_modules: extra modules (or packages) whose source files are hashed
+          into the fingerprint, e.g. the helpers the processor imports.
+        - hooks: objects notified when producers, the user's code on a chunk, and merges start
+          and end, e.g. hooks.CProfileHook() for one cProfile dump per step (see hooks.py).
+          Not part of any artifact identity.
+        - bisect_failures: split a failed chunk into halves, recursively, until the failing
+          files (or WorkItems) are isolated; good halves are merged and cached, and failures
+          are reported per file (see bisection.py).
+        - merge_cache: start an Analysis merge from the largest earlier merge of a subset of its
+          chunks, and only merge the chunks not in it (see mergecache.py). On by default.
     """
     strategy: SplitStrategy = None
     percentage: int | None = None
+    target_events_per_chunk: int | None = None
+    target_seconds_per_chunk: float | None = None
+    target_files_per_chunk: int | None = None
     datasets: tuple[str, ...] | None = None
     chunk_fraction: float | None = None
     cache_dir: Path = Path(".cache")
@@ -103,11 +268,21 @@ class RunConfig:
     histserv_connection_info: dict | None = None
     executor_config: ExecutorConfig | None = None
     facility: FacilityBase | None = None
+    payload_compression: str | None = None
+    cache_index: bool = True
+    max_cache_bytes: int | None = None
+    max_concurrent_steps: int = 1
+    hist_storage: Literal["pickle", "mmap"] = "pickle"
+    code_fingerprint: bool = False
+    code_fingerprint_modules: tuple[str, ...] = ()
+    hooks: tuple = ()
+    bisect_failures: bool = False
+    merge_cache: bool = True
 
     def __post_init__(self):
-        if self.strategy not in (None, "by_dataset"):
+        if self.strategy not in (None, "by_dataset", "balanced", "incremental"):
             raise ValueError(
-                f"Invalid strategy={self.strategy!r}. Use 'by_dataset' or None."
+                f"Invalid strategy={self.strategy!r}. Use 'by_dataset', 'balanced', 'incremental' or None."
             )
 
         if self.percentage is not None:
@@ -120,13 +295,80 @@ class RunConfig:
                     "percentage must divide 100 evenly (e.g. 10, 20, 25, 50)."
                 )
 
+        if self.target_events_per_chunk is not None:
+            if not isinstance(self.target_events_per_chunk, int) or self.target_events_per_chunk < 1:
+                raise ValueError("target_events_per_chunk must be a positive int")
+            if self.strategy != "balanced":
+                raise ValueError("target_events_per_chunk requires strategy='balanced'")
+        if self.target_seconds_per_chunk is not None:
+            if isinstance(self.target_seconds_per_chunk, bool) or \
+                    not isinstance(self.target_seconds_per_chunk, (int, float)) or self.target_seconds_per_chunk <= 0:
+                raise ValueError("target_seconds_per_chunk must be a positive number")
+            if self.strategy != "balanced":
+                raise ValueError("target_seconds_per_chunk requires strategy='balanced'")
+        if self.strategy == "balanced" and self.target_events_per_chunk is None \
+                and self.target_seconds_per_chunk is None and self.percentage is None:
+            raise ValueError(
+                "strategy='balanced' needs target_events_per_chunk, target_seconds_per_chunk "
+                "or percentage to decide the number of chunks"
+            )
+        if self.target_files_per_chunk is not None:
+            if isinstance(self.target_files_per_chunk, bool) or \
+                    not isinstance(self.target_files_per_chunk, int) or self.target_files_per_chunk < 1:
+                raise ValueError("target_files_per_chunk must be a positive int")
+            if self.strategy != "incremental":
+                raise ValueError("target_files_per_chunk requires strategy='incremental'")
+        if self.strategy == "incremental":
+            if self.target_files_per_chunk is None:
+                raise ValueError("strategy='incremental' needs target_files_per_chunk")
+            if self.percentage is not None:
+                raise ValueError(
+                    "percentage is not used with strategy='incremental': chunk boundaries "
+                    "come from the files themselves, see target_files_per_chunk"
+                )
+
         if isinstance(self.datasets, list):
             object.__setattr__(self, "datasets", tuple(self.datasets))
 
+        if isinstance(self.code_fingerprint_modules, (list, str)):
+            modules = self.code_fingerprint_modules
+            object.__setattr__(self, "code_fingerprint_modules",
+                               (modules,) if isinstance(modules, str) else tuple(modules))
+        if self.code_fingerprint_modules and not self.code_fingerprint:
+            raise ValueError("code_fingerprint_modules requires code_fingerprint=True")
+
+        if isinstance(self.hooks, list):
+            object.__setattr__(self, "hooks", tuple(self.hooks))
+        from .hooks import HOOK_METHODS
+        for hook in self.hooks:
+            if not any(callable(getattr(hook, m, None)) for m in HOOK_METHODS):
+                raise TypeError(
+                    f"hooks entry {hook!r} has none of the hook methods {', '.join(HOOK_METHODS)}"
+                )
+
         if self.chunk_fraction is not None:
             if not isinstance(self.chunk_fraction, float) or not (0.0 < self.chunk_fraction <= 1.0):
                 raise ValueError("chunk_fraction must be a float in (0.0, 1.0]")
 
+        if self.payload_compression is not None:
+            from .payload import available_codecs
+            if self.payload_compression not in available_codecs():
+                raise ValueError(
+                    f"Unknown payload_compression={self.payload_compression!r}. "
+                    f"Available: {available_codecs()}"
+                )
+
+        if self.max_cache_bytes is not None and (not isinstance(self.max_cache_bytes, int) or self.max_cache_bytes < 0):
+            raise ValueError("max_cache_bytes must be a non-negative int (bytes) or None")
+
+        if not isinstance(self.max_concurrent_steps, int) or self.max_concurrent_steps < 1:
+            raise ValueError("max_concurrent_steps must be an int >= 1")
+
+        if self.hist_storage not in ("pickle", "mmap"):
+            raise ValueError(
+                f"Invalid hist_storage={self.hist_storage!r}. Use 'pickle' or 'mmap'."
+            )
+
         if self.hist_client is not None and self.hist_template is None:
             raise ValueError(
                 "hist_client is set but hist_template is None. hist_template must be a "
@@ -134,3 +376,9 @@ class RunConfig:
                 "to register — the framework needs it to (re)create the server-side "
                 "histogram, on first use and if a later run finds the connection expired."
             )
+
+        if self.bisect_failures and self.hist_client is not None:
+            raise ValueError(
+                "bisect_failures is not supported with hist_client: a failed chunk may already "
+                "have streamed part of its histograms to the server."
+            )
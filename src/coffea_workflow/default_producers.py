@@ -1,5 +1,9 @@
 from __future__ import annotations
+import dataclasses
 import json
+import shutil
+import statistics
+import time
 from pathlib import Path
 from typing import Any
 import cloudpickle
@@ -11,12 +15,21 @@ from coffea.processor import accumulate
 from coffea.dataset_tools.splitting import hash_fileset
 from .producers_utils import (
     _call_builder, _extract_acc, _load_object, _split_fileset, _load_artifact_output,
-    _safe_print, _run_declarative, _validate_runner_params,
+    _safe_print, _run_declarative, _validate_runner_params, LocalChunkClient,
 )
+from .payload import read_payload, write_payload
+from .histstore import HIST_DIR, resolve_mapped_hists, write_mapped_payload
 from .preprocessing import (
-    build_workitems, workitems_to_json, workitems_from_json,
+    build_workitems, read_file_metadata, workitems_to_json, workitems_from_json,
     split_workitems, hash_workitems,
 )
+from .balancing import balance_fileset, balance_stats, balance_workitems
+from .throughput import chunk_samples, chunk_throughput, quantize_rate
+from .report import file_size
+from .hooks import HookContext, fire, hooked, merged
+from .bisection import chunk_part, chunk_units, halves, unit_label
+from .incremental import incremental_fileset, incremental_workitems
+from .mergecache import MERGE_RECORD, find_merge_base, write_merge_record
 
 @producer(Fileset)
 def make_fileset(*, art: Fileset, deps: Deps, out: Path, config: RunConfig) -> None:
@@ -57,6 +70,7 @@ def make_preprocessed(*, art: Preprocessed, deps: Deps, out: Path, config: RunCo
         treename=art.treename,
         custom_func=custom_func,
         client=client,
+        cache_dir=config.cache_dir,
     )
 
     if art.aggregate_builder is not None:
@@ -77,6 +91,7 @@ def split_fileset(*, art: Chunking, deps: Deps, out: Path, config: RunConfig) ->
     out.mkdir(parents=True, exist_ok=True)
     upstream = _load_artifact_output(art.fileset, deps.need(art.fileset))
 
+    seconds = None  # expected seconds per chunk, when packed by the throughput cost model
     if art.fileset.type_name == "Preprocessed":
         # event-level units: split the WorkItem records, one chunk = one JSON list
         if not isinstance(upstream, list):
@@ -84,26 +99,71 @@ def split_fileset(*, art: Chunking, deps: Deps, out: Path, config: RunConfig) ->
                 f"Preprocessed artifact must produce a list of WorkItem records, "
                 f"got {type(upstream).__name__}"
             )
-        chunks = split_workitems(
-            upstream,
-            strategy=config.strategy,
-            datasets=list(config.datasets) if config.datasets else None,
-            percentage=config.percentage,
-        )
+        if art.split_strategy == "balanced":
+            chunks, seconds = balance_workitems(
+                upstream,
+                target_events_per_chunk=art.target_events_per_chunk,
+                percentage=art.percentage,
+                datasets=list(art.datasets) if art.datasets else None,
+                target_seconds_per_chunk=art.target_seconds_per_chunk,
+                rates=dict(art.cost_model) if art.cost_model else None,
+            )
+        elif art.split_strategy == "incremental":
+            chunks = incremental_workitems(
+                upstream,
+                art.target_files_per_chunk,
+                datasets=list(art.datasets) if art.datasets else None,
+            )
+        else:
+            chunks = split_workitems(
+                upstream,
+                strategy=art.split_strategy,
+                datasets=list(art.datasets) if art.datasets else None,
+                percentage=art.percentage,
+            )
         chunk_name = "workitems_chunk_{}.json"
         hash_chunk = hash_workitems
+        events = [sum(r["entrystop"] - r["entrystart"] for r in chunk) for chunk in chunks]
     else:
         if not isinstance(upstream, dict):
             raise TypeError(
                 f"Upstream artifact '{art.fileset.type_name}' must produce a fileset dict, "
                 f"got {type(upstream).__name__}"
             )
-        chunks = _split_fileset(
-            upstream,
-            strategy=config.strategy,
-            datasets=list(config.datasets) if config.datasets else None,
-            percentage=config.percentage,
-        )
+        events = None
+        if art.split_strategy == "balanced":
+            # entry counts via the file metadata cache: each file is opened at most once
+            file_meta = read_file_metadata(
+                upstream,
+                client=getattr(deps.coffea_executor(), "client", None),
+                cache_dir=config.cache_dir,
+            )
+            entries = {(dataset, url): meta["numentries"] for dataset, url, _, _, meta in file_meta}
+            chunks, seconds = balance_fileset(
+                upstream, entries,
+                target_events_per_chunk=art.target_events_per_chunk,
+                percentage=art.percentage,
+                datasets=list(art.datasets) if art.datasets else None,
+                target_seconds_per_chunk=art.target_seconds_per_chunk,
+                rates=dict(art.cost_model) if art.cost_model else None,
+            )
+            events = [
+                sum(entries[(dataset, url)] for dataset, data in chunk.items() for url in data["files"])
+                for chunk in chunks
+            ]
+        elif art.split_strategy == "incremental":
+            chunks = incremental_fileset(
+                upstream,
+                art.target_files_per_chunk,
+                datasets=list(art.datasets) if art.datasets else None,
+            )
+        else:
+            chunks = _split_fileset(
+                upstream,
+                strategy=art.split_strategy,
+                datasets=list(art.datasets) if art.datasets else None,
+                percentage=art.percentage,
+            )
         chunk_name = "fileset_chunk_{}.json"
         hash_chunk = hash_fileset
 
@@ -116,10 +176,23 @@ def split_fileset(*, art: Chunking, deps: Deps, out: Path, config: RunConfig) ->
             "hash": hash_chunk(chunk),
         }
 
-    (out / "manifest.json").write_text(json.dumps({
+    manifest = {
         "output_files": manifest_files,
         "n_chunks": len(chunks),
-    }, indent=2, sort_keys=True))
+    }
+    if events is not None:
+        manifest["balance"] = balance_stats(events)
+        _safe_print(
+            f"Chunk sizes: {manifest['balance']['min']}-{manifest['balance']['max']} events "
+            f"(stddev {manifest['balance']['stddev']:.0f}) over {len(chunks)} chunks"
+        )
+        if seconds is not None:
+            manifest["balance"]["expected_seconds"] = balance_stats(seconds, key="seconds_per_chunk")
+            _safe_print(
+                f"Expected chunk runtimes: {min(seconds):.1f}-{max(seconds):.1f} s "
+                f"(target {art.target_seconds_per_chunk} s)"
+            )
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
 
     
 @producer(ChunkAnalysis)
@@ -133,26 +206,86 @@ def run_analysis(*, art: ChunkAnalysis, deps: Deps, out: Path, config: RunConfig
     # TODO: do I need chunking initialisation again? is it enough to just have it in execute_analysis()?
     chunking_dir = deps.need(art.chunking)  # directory with chunk jsons
     chunk_path = chunking_dir / art.chunk_file
-    chunk_fileset = json.loads(chunk_path.read_text())
+    chunk = chunk_fileset = json.loads(chunk_path.read_text())
+    if art.part is not None:
+        chunk = chunk_fileset = chunk_part(chunk, *art.part)
     if isinstance(chunk_fileset, list):
         # WorkItem chunk (event-level splitting): Runner accepts the premade
         # list directly and dispatches one executor task per WorkItem
         chunk_fileset = workitems_from_json(chunk_fileset)
 
     executor = deps.coffea_executor()
-    if art.processor is not None:
-        result = _run_declarative(
-            art.processor, dict(art.processor_params), dict(art.runner_params),
-            chunk_fileset, executor,
-        )
-    else:
-        fn = _load_object(art.analysis_builder)  # user's function
-        result = _call_builder(fn, chunk_fileset, config=config, executor=executor,
-                               builder_params=dict(art.builder_params))
+    with hooked(config.hooks, "chunk", art, art.chunk_file):
+        if art.processor is not None:
+            result = _run_declarative(
+                art.processor, dict(art.processor_params), dict(art.runner_params),
+                chunk_fileset, executor,
+            )
+        else:
+            fn = _load_object(art.analysis_builder)  # user's function
+            result = _call_builder(fn, chunk_fileset, config=config, executor=executor,
+                                   builder_params=dict(art.builder_params))
 
-    (out / "payload.pkl").write_bytes(cloudpickle.dumps(result))
+    # lets cache_manager.gc tell whether any Chunking manifest still lists this chunk
+    (out / ".chunk_hash").write_text(art.chunk_hash)
+    write_payload(out / "payload.pkl", result, config.payload_compression)
     if result.is_ok():
         (out / ".success").touch()
+        sample = chunk_throughput(_extract_acc(result)[1])
+        if sample is not None:
+            deps._executor.throughput_history().record(
+                _builder_key(art.processor or art.analysis_builder), chunk_samples(chunk, *sample),
+            )
+
+
+# speculate_stragglers: how often the parallel_chunks loop looks for stragglers while waiting
+_SPECULATION_POLL_SECONDS = 0.5
+
+
+def _worker_slots(client, default: int) -> int:
+    """Chunks a Dask client runs at once (its worker threads); default if it can't tell."""
+    nthreads = getattr(client, "nthreads", None)
+    return max(1, sum(nthreads().values())) if callable(nthreads) else default
+
+
+def _placement_elsewhere(client, future) -> dict:
+    """Dask submit() kwargs preferring any worker but the one running future; {} if unknown."""
+    processing = getattr(client, "processing", None)
+    if processing is None:
+        return {}
+    busy = [w for w, keys in processing().items() if future.key in keys]
+    others = [w for w in client.nthreads() if w not in busy]
+    return {"workers": others, "allow_other_workers": True} if busy and others else {}
+
+
+class _FailedChunk:
+    """A failed chunk known only from its status record; merges like a failed coffea Result."""
+
+    def __init__(self, error: str):
+        self.error = error
+
+    def is_ok(self) -> bool:
+        return False
+
+    def __str__(self) -> str:
+        return self.error
+
+
+def _failure_cause(result) -> BaseException | str:
+    """The exception of a failed coffea Result (Err) if it carries one, else its message; for RetryPolicy."""
+    exception = getattr(result, "exception", None)
+    return exception if isinstance(exception, BaseException) else str(result)
+
+
+def _check_shared_payload(out_dir: Path) -> None:
+    """worker_writes_payload/tree_reduce: the chunk payload a worker reported must be visible to the driver."""
+    if not (out_dir / "payload.pkl").exists():
+        raise RuntimeError(
+            f"worker_writes_payload/tree_reduce: {out_dir / 'payload.pkl'} was written by a worker but is "
+            "not visible on the driver. cache_dir must be on a filesystem shared with the workers; "
+            "set ExecutorConfig.worker_cache_dir if they mount it under a different path."
+        )
+
 
 @producer(Analysis)
 def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig) -> None:
@@ -164,11 +297,27 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
     # art.fileset may be a plain Fileset (file-level splitting) or a
     # Preprocessed artifact (event-level WorkItem splitting) — Chunking's
     # producer branches on the upstream type
+    processor_key = _builder_key(art.processor if art.processor is not None else art.builder)
+    cost_model = None
+    if config.target_seconds_per_chunk is not None:
+        # quantized rates of the upstream's datasets: the chunking only changes
+        # (and cached chunks are only recomputed) when a rate moves noticeably
+        upstream = _load_artifact_output(art.fileset, deps.need(art.fileset))
+        names = {r["dataset"] for r in upstream} if isinstance(upstream, list) else set(upstream)
+        rates = deps._executor.throughput_history().rates(processor_key, names)
+        if rates:
+            cost_model = tuple(sorted((ds, quantize_rate(rate)) for ds, rate in rates.items()))
+        else:
+            _safe_print("No throughput history yet for this processor; sizing chunks without it.")
     chunking = Chunking(
         fileset=art.fileset,
         split_strategy=config.strategy,
         percentage=config.percentage,
         datasets=config.datasets,
+        target_events_per_chunk=config.target_events_per_chunk,
+        target_seconds_per_chunk=config.target_seconds_per_chunk,
+        target_files_per_chunk=config.target_files_per_chunk,
+        cost_model=cost_model,
     )
     chunk_dir = deps.need(chunking) # self._executor.materialize(Chunking); returns path to .cache_dir / Chunking / hash where all .json chunks are
     manifest_path = chunk_dir / "manifest.json" # manifest contains info about our fileset.json or its chunks .json
@@ -190,6 +339,44 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
     merged_acc = None
     metrics_merged = None
     failures = []
+    chunk_records: list[dict | None] = [None] * len(chunks_entries)  # run report, see report.py
+    merge_seconds = 0.0
+    remote_chunk_hooks: dict[int, HookContext] = {}  # parallel_chunks: submitted, not yet recorded
+    retry = config.executor_config.retry if config.executor_config is not None else None
+    attempts: dict[int, int] = {}  # chunk index -> attempt number, when retried
+    speculated: set[int] = set()  # chunks that got a duplicate as stragglers
+    merged_parts = False  # bisected sub-chunks were merged: the result can't be a merge base
+
+    def _record_chunk(i, ca, cache, ok, seconds, metrics, queue_wait=None, merge=0.0):
+        ctx = remote_chunk_hooks.pop(i, None)
+        if ctx is not None:
+            ctx.seconds = seconds
+            ctx.attrs["ok"] = ok
+            fire(reversed(config.hooks), "on_chunk_end", ctx)
+        chunk_records[i] = {
+            "file": chunks_entries[i]["file"],
+            "identity": ca.identity(),
+            "status": "ok" if ok else "failed",
+            "cache": cache,
+            "seconds": seconds,
+            "queue_wait_seconds": queue_wait,
+            "merge_seconds": merge,
+            "payload_bytes": file_size(deps._executor.path_for(ca) / "payload.pkl"),
+            "bytes_read": metrics.get("bytesread") if isinstance(metrics, dict) else None,
+            "attempts": attempts.get(i, 1),
+            "speculated": i in speculated,
+        }
+
+    def _retry_later(i, cause) -> float | None:
+        """Seconds to wait before chunk i runs again after failing with cause, or None to give up."""
+        attempt = attempts.get(i, 1)
+        if retry is None or not retry.should_retry(cause, attempt):
+            return None
+        delay = retry.delay(attempt)
+        attempts[i] = attempt + 1
+        _safe_print(f"Attempt {attempt} of {chunks_entries[i]['file']} failed ({cause}); "
+                    f"retrying in {delay:.1f}s")
+        return delay
 
     is_declarative = art.processor is not None
     if is_declarative:
@@ -204,6 +391,7 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
                 processor=art.processor,
                 processor_params=art.processor_params,
                 runner_params=art.runner_params,
+                code_version=art.code_version,
             )
         return ChunkAnalysis(
             chunk_file=entry["file"],
@@ -211,15 +399,114 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
             chunking=chunking,
             analysis_builder=art.builder,
             builder_params=art.builder_params,
+            code_version=art.code_version,
         )
 
+    def _merge_part(result, name):
+        nonlocal merged_acc, metrics_merged, merge_seconds, merged_parts
+        merged_parts = True
+        acc, metrics = _extract_acc(result)
+        start = time.perf_counter()
+        merged_acc = accumulate([acc], accum=merged_acc)
+        metrics_merged = accumulate([metrics], accum=metrics_merged)
+        elapsed = time.perf_counter() - start
+        merge_seconds += elapsed
+        merged(config.hooks, art, name, elapsed)
+
+    def _failed_before(ca):
+        """A chunk (or sub-chunk) whose cache entry holds a failed payload from an earlier run."""
+        ca_dir = deps._executor.path_for(ca)
+        return (ca_dir / "payload.pkl").exists() and not (ca_dir / ".success").exists()
+
+    def _bisect(i, failure):
+        """
+        bisect_failures: run chunk i in halves (sub-chunks, see bisection.py), merging
+        every half that succeeds and splitting the failing ones again. Returns a failure
+        entry per failing unit; a single-unit chunk keeps its failure, now with its file.
+        """
+        ca = _make_chunk_artifact(chunks_entries[i])
+        chunk = json.loads((chunk_dir / ca.chunk_file).read_text())
+        n_units = len(chunk_units(chunk))
+        if n_units == 1:
+            return [{**failure, "file": unit_label(chunk, 0)}]
+        _safe_print("------------------------------------")
+        _safe_print(f"Bisecting {ca.chunk_file} ({n_units} units)...")
+        start_t = time.perf_counter()
+        found = []
+        stack = halves(0, n_units)[::-1]
+        while stack:
+            start, stop = stack.pop()
+            sub = dataclasses.replace(ca, part=(start, stop))
+            if stop - start > 1 and _failed_before(sub):
+                stack.extend(halves(start, stop)[::-1])  # split straight away, as on the first run
+                continue
+            try:
+                result = read_payload(deps.need(sub) / "payload.pkl")
+            except Exception as exc:
+                result = _FailedChunk(f"{type(exc).__name__}: {exc}")
+            if result.is_ok():
+                _merge_part(result, f"{ca.chunk_file}[{start}:{stop}]")
+            elif stop - start > 1:
+                stack.extend(halves(start, stop)[::-1])
+            else:
+                label = unit_label(chunk, start)
+                _safe_print(f"  failing: {label}")
+                found.append({"chunk_file": ca.chunk_file, "file": label, "error": str(result),
+                              "attempts": attempts.get(i, 1)})
+        if chunk_records[i] is None:  # failed on an earlier run, bisected without running whole
+            _record_chunk(i, ca, "miss", not found, time.perf_counter() - start_t, None)
+        elif not found:  # the whole chunk failed, but every part of it succeeded
+            chunk_records[i]["status"] = "ok"
+        return found
+
+    # bisect_failures: a chunk that failed on an earlier run goes straight to bisection,
+    # so the halves cached back then are reused instead of running the whole chunk again
+    bisect_first: set[int] = set()
+    if config.bisect_failures:
+        for i, entry in enumerate(chunks_entries):
+            if _failed_before(_make_chunk_artifact(entry)):
+                if len(chunk_units(json.loads((chunk_dir / entry["file"]).read_text()))) > 1:
+                    bisect_first.add(i)
+
+    # merge_cache: chunks already in an earlier merged accumulator are neither loaded nor merged
+    chunk_ids = [_make_chunk_artifact(entry).identity() for entry in chunks_entries]
+    in_base: set[int] = set()
+    use_merge_cache = config.merge_cache and config.hist_client is None
+    base = find_merge_base(config.cache_dir, chunk_ids) if use_merge_cache else None
+    if base is not None:
+        base_dir, base_ids = base
+        start = time.perf_counter()
+        base_payload = read_payload(base_dir / "payload.pkl")
+        if set(base_payload.get("merged_chunks") or ()) == base_ids:  # not rewritten meanwhile
+            merged_acc, metrics_merged = resolve_mapped_hists(base_payload["processor_result"])
+            in_base = {i for i, cid in enumerate(chunk_ids) if cid in base_ids}
+            merge_seconds += time.perf_counter() - start
+            _safe_print(f"Starting from an earlier merge of {len(in_base)} of {len(chunk_ids)} chunks")
+        del base_payload
+
     coffea_exec = deps.coffea_executor()
     wants_parallel = config.executor_config is not None and config.executor_config.parallel_chunks
-    if wants_parallel and not hasattr(coffea_exec, "client"):
-        raise ValueError(
-            "parallel_chunks=True requires a DaskExecutor. "
-            "Set executor_type='DaskExecutor' in ExecutorConfig."
-        )
+    backend = None
+    if wants_parallel:
+        backend = config.executor_config.parallel_chunks_backend
+        if backend == "auto":
+            backend = "dask" if hasattr(coffea_exec, "client") else "processes"
+        if backend == "dask" and not hasattr(coffea_exec, "client"):
+            raise ValueError(
+                "parallel_chunks_backend='dask' requires a DaskExecutor. "
+                "Set executor_type='DaskExecutor' in ExecutorConfig, or use "
+                "parallel_chunks_backend='processes' to run chunks in local processes."
+            )
+        if backend == "processes" and config.executor_config.tree_reduce:
+            raise ValueError(
+                "tree_reduce=True needs a DaskExecutor; the local process backend "
+                "merges every chunk on the driver."
+            )
+        if backend == "processes" and config.executor_config.speculate_stragglers is not None:
+            raise ValueError(
+                "speculate_stragglers needs a DaskExecutor; a running chunk in the local "
+                "process backend cannot be cancelled."
+            )
     if wants_parallel and config.hist_client is not None:
         raise ValueError(
             "parallel_chunks=True is not compatible with hist_client: "
@@ -231,7 +518,32 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
     if use_parallel:
         # Defined as nested functions so cloudpickle serializes them as bytecode,
         # not as a module reference — the scheduler/workers don't have coffea_workflow installed.
-        def _run_chunk_remote(chunk_fileset, builder_bytes, builder_params):
+        # The local process backend (LocalChunkClient) runs exactly the same functions.
+        def _load_code(code_key, code, max_entries=8):
+            """
+            Unpickle a builder/processor at most once per worker process. These nested
+            functions are shipped by value and keep no state between tasks, so the LRU
+            (keyed by the code's content hash) lives in a stub module in sys.modules.
+            """
+            import collections, sys, threading, types
+            import cloudpickle
+            mod = sys.modules.get("_coffea_workflow_worker")
+            if mod is None:
+                stub = types.ModuleType("_coffea_workflow_worker")
+                stub.code_cache, stub.lock = collections.OrderedDict(), threading.Lock()
+                mod = sys.modules.setdefault("_coffea_workflow_worker", stub)
+            with mod.lock:
+                if code_key in mod.code_cache:
+                    mod.code_cache.move_to_end(code_key)
+                    return mod.code_cache[code_key]
+            obj = cloudpickle.loads(code)
+            with mod.lock:
+                mod.code_cache[code_key] = obj
+                while len(mod.code_cache) > max_entries:
+                    mod.code_cache.popitem(last=False)
+            return obj
+
+        def _run_chunk_remote(chunk_fileset, code_key, builder_bytes, builder_params):
             """
             Runs on a Dask worker. No coffea_workflow imports — only coffea is required.
             It's a serializable wrapper that replicates what run_analysis + _call_builder do locally,
@@ -268,7 +580,7 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
                     )
                     for r in chunk_fileset
                 ]
-            fn = cloudpickle.loads(builder_bytes)
+            fn = _load_code(code_key, builder_bytes)
             sig = inspect.signature(fn).parameters
             kwargs = {}
             if "executor" in sig:
@@ -279,7 +591,7 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
                         kwargs[k] = v
             return cloudpickle.dumps(fn(chunk_fileset, **kwargs))
 
-        def _run_chunk_remote_declarative(chunk_fileset, processor_bytes, processor_params, runner_params):
+        def _run_chunk_remote_declarative(chunk_fileset, code_key, processor_bytes, processor_params, runner_params):
             """
             Declarative-mode counterpart to _run_chunk_remote: builds coffea's own Runner
             directly from the (already-resolved-locally) Processor class bytes, so the
@@ -313,100 +625,485 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
                     )
                     for r in chunk_fileset
                 ]
-            proc_cls = cloudpickle.loads(processor_bytes)
+            proc_cls = _load_code(code_key, processor_bytes)
             proc = proc_cls(**(processor_params or {}))
             runner = Runner(executor=IterativeExecutor(), use_result_type=True, **(runner_params or {}))
             return cloudpickle.dumps(runner(chunk_fileset, proc))
 
-        client = coffea_exec.client
-        if is_declarative:
-            proc_cls = _load_object(art.processor)
-            processor_bytes = cloudpickle.dumps(proc_cls)
-            processor_params = dict(art.processor_params)
-            runner_params = dict(art.runner_params)
-        else:
-            fn = _load_object(art.builder)
-            builder_bytes = cloudpickle.dumps(fn)
-            builder_params = dict(art.builder_params)
-
-        # Build chunk artifacts, separate cached from uncached
-        chunk_arts = [_make_chunk_artifact(entry) for entry in chunks_entries]
-
-        uncached_indices = [
-            i for i, ca in enumerate(chunk_arts)
-            if not deps._executor.exists(ca, config=config)
-        ]
-
-        if uncached_indices:
-            _safe_print(f"Submitting {len(uncached_indices)} chunks in parallel...")
-            futures = {}
-            for i in uncached_indices:
-                ca = chunk_arts[i]
-                chunk_fileset = json.loads((chunk_dir / ca.chunk_file).read_text())
-                if is_declarative:
-                    futures[i] = client.submit(
-                        _run_chunk_remote_declarative, chunk_fileset,
-                        processor_bytes, processor_params, runner_params,
-                    )
-                else:
-                    futures[i] = client.submit(_run_chunk_remote, chunk_fileset, builder_bytes, builder_params)
+        def _run_chunk_timed(trace_context, delay, run_fn, *args):
+            """
+            (started, finished, payload, spans): worker-side wall clock for the run report's
+            compute and queue wait, and, when traced, the worker's span parented to the
+            driver's task span (see tracing.py). A retried chunk first sleeps its backoff delay.
+            """
+            import time
+            if delay:
+                time.sleep(delay)
+            started, started_ns = time.time(), time.time_ns()
+            payload = run_fn(*args)
+            spans = []
+            if trace_context is not None:
+                import os
+                import socket
+                import threading
+                spans.append({
+                    "trace_id": trace_context["trace_id"],
+                    "span_id": os.urandom(8).hex(),
+                    "parent_span_id": trace_context["span_id"],
+                    "name": f"worker {trace_context['name']}",
+                    "start_ns": started_ns,
+                    "end_ns": time.time_ns(),
+                    "attributes": {"host.name": socket.gethostname(), "process.pid": os.getpid(),
+                                   "chunk_file": trace_context["name"]},
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                })
+            return started, time.time(), payload, spans
+
+        def _run_chunk_guarded(run_fn, *args):
+            """
+            Worker-write wrapper around _run_chunk_remote(_declarative). A raising chunk task
+            would fail every reduce task above it (and write nothing to the cache), so
+            exceptions are turned into a payload whose is_ok() is False — the same shape as
+            the driver-side _ExcResult.
+            """
+            import cloudpickle
+            try:
+                return run_fn(*args)
+            except Exception as exc:
+                message = f"Worker exception: {exc}"
+                class _ExcResult:
+                    exception = exc
+                    def is_ok(self): return False
+                    def __str__(self): return message
+                return cloudpickle.dumps(_ExcResult())
+
+        def _chunk_status_remote(payload):
+            """
+            Small (is_ok, error, metrics) record of a payload, so the driver learns a chunk's
+            outcome — and its entries/processtime for the throughput history — without
+            receiving the payload.
+            """
+            import cloudpickle
+            result = cloudpickle.loads(payload)
+            if not result.is_ok():
+                return (False, str(result), None)
+            value = result.unwrap()
+            metrics = value[1] if isinstance(value, tuple) else None
+            if not isinstance(metrics, dict):
+                return (True, None, None)
+            return (True, None, {k: metrics.get(k) for k in ("entries", "processtime", "bytesread")})
+
+        def _persist_remote(out_dir, chunk_hash, run_fn, *args):
+            """
+            worker_writes_payload and tree_reduce: runs the chunk and writes payload.pkl (plain cloudpickle,
+            which read_payload understands), .chunk_hash and, if it succeeded, .success into
+            its cache directory on the shared filesystem. Returns (is_ok, error, metrics,
+            payload path) instead of the payload.
 
-            # Client.gather has no asyncio-style return_exceptions; collect
-            # per-future so a failed chunk yields its exception in place and
-            # results stay aligned with chunk indices.
-            gathered = []
-            for f in futures.values():
+            A speculative duplicate of the chunk may still be running (cancelling a Dask
+            future does not stop a running task), so a successful payload replaces whatever
+            is there, but a failed one is only written where no payload exists yet: it never
+            clobbers the other copy's good result. The driver clears a previous attempt's
+            failed payload before it submits the chunk again.
+            """
+            import os
+            from pathlib import Path
+            payload = run_fn(*args)
+            out = Path(out_dir)
+            out.mkdir(parents=True, exist_ok=True)
+            ok, error, metrics = _chunk_status_remote(payload)
+            if ok:
+                tmp = out / f"payload.pkl.{os.urandom(8).hex()}.tmp"
+                tmp.write_bytes(payload)
+                tmp.replace(out / "payload.pkl")
+            elif not (out / ".success").exists():
                 try:
-                    gathered.append(f.result())
-                except Exception as exc:
-                    gathered.append(exc)
-                    
-            for idx, result_or_exc in zip(futures.keys(), gathered):
-                ca = chunk_arts[idx]
-                out_dir = deps._executor.path_for(ca)
-                out_dir.mkdir(parents=True, exist_ok=True)
-                if isinstance(result_or_exc, BaseException):
-                    _exc = result_or_exc
-                    class _ExcResult:
-                        def is_ok(self): return False
-                        def __str__(self): return f"Worker exception: {_exc}"
-                    payload = cloudpickle.dumps(_ExcResult())
+                    fd = os.open(out / "payload.pkl", os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                except FileExistsError:
+                    pass  # the other copy got there first
                 else:
-                    payload = result_or_exc
-                (out_dir / "payload.pkl").write_bytes(payload)
-                _r = cloudpickle.loads(payload)
-                if _r.is_ok():
-                    (out_dir / ".success").touch()
-                deps._executor._session_cache.add(out_dir)
-
-        for i, (entry, ca) in enumerate(zip(chunks_entries, chunk_arts)):
-            chunk_file = entry["file"]
-            chunk_out_dir = deps._executor.path_for(ca)
-            _safe_print("------------------------------------")
-            _safe_print(f"Processing {chunk_file}")
-            result = cloudpickle.loads((chunk_out_dir / "payload.pkl").read_bytes())
-            if result.is_ok():
-                _safe_print("Successfully processed!")
-                acc, metrics = _extract_acc(result)
-                merged_acc = accumulate([acc], accum=merged_acc)
-                metrics_merged = accumulate([metrics], accum=metrics_merged)
+                    with os.fdopen(fd, "wb") as fh:
+                        fh.write(payload)
+            (out / ".chunk_hash").write_text(chunk_hash)
+            if ok:
+                (out / ".success").touch()
+            return (ok, error, metrics, str(out / "payload.pkl"))
+
+        def _reduce_remote(from_chunks, *parts):
+            """
+            Merges up to tree_reduce_fanin parts on a worker. On the first level the parts
+            are _persist_remote status records whose payload (a coffea Result) is read from
+            the shared cache, failed ones are skipped; above it they are (acc, metrics)
+            pairs returned by this same function.
+            """
+            import cloudpickle
+            from coffea.processor import accumulate
+
+            acc, metrics = None, None
+            for part in parts:
+                if from_chunks:
+                    if not part[0]:
+                        continue
+                    with open(part[3], "rb") as fh:
+                        value = cloudpickle.loads(fh.read()).unwrap()
+                    part_acc, part_metrics = value if isinstance(value, tuple) else (value, {})
+                else:
+                    part_acc, part_metrics = cloudpickle.loads(part)
+                    if part_acc is None:
+                        continue
+                acc = accumulate([part_acc], accum=acc)
+                metrics = accumulate([part_metrics], accum=metrics)
+            return cloudpickle.dumps((acc, metrics))
+
+        local_client = None
+        if backend == "dask":
+            client = coffea_exec.client
+        else:
+            local_client = client = LocalChunkClient(
+                workers=config.executor_config.workers,
+                memory_limit=config.executor_config.chunk_memory_limit,
+            )
+        history = deps._executor.throughput_history()
+        try:
+            if is_declarative:
+                proc_cls = _load_object(art.processor)
+                code_bytes = cloudpickle.dumps(proc_cls)
+                processor_params = dict(art.processor_params)
+                runner_params = dict(art.runner_params)
             else:
+                fn = _load_object(art.builder)
+                code_bytes = cloudpickle.dumps(fn)
+                builder_params = dict(art.builder_params)
+
+            def _record_throughput(i, metrics):
+                sample = chunk_throughput(metrics)
+                if sample is not None:
+                    chunk = json.loads((chunk_dir / chunks_entries[i]["file"]).read_text())
+                    history.record(processor_key, chunk_samples(chunk, *sample))
+
+            # Build chunk artifacts, separate cached from uncached
+            chunk_arts = [_make_chunk_artifact(entry) for entry in chunks_entries]
+
+            uncached_indices = [
+                i for i, ca in enumerate(chunk_arts)
+                if i not in bisect_first and i not in in_base and not deps._executor.exists(ca, config=config)
+            ]
+
+            def _merge_chunk(i, result):
+                """Merge one chunk's result; returns its (metrics, merge seconds) for the run report."""
+                nonlocal merged_acc, metrics_merged, merge_seconds
+                chunk_file = chunks_entries[i]["file"]
+                _safe_print("------------------------------------")
+                _safe_print(f"Processing {chunk_file}")
+                if result.is_ok():
+                    _safe_print("Successfully processed!")
+                    acc, metrics = _extract_acc(result)
+                    start = time.perf_counter()
+                    merged_acc = accumulate([acc], accum=merged_acc)
+                    metrics_merged = accumulate([metrics], accum=metrics_merged)
+                    elapsed = time.perf_counter() - start
+                    merge_seconds += elapsed
+                    merged(config.hooks, art, chunk_file, elapsed)
+                    return metrics, elapsed
                 _safe_print("Failure caught!")
-                failures.append({"chunk_file": chunk_file, "error": str(result)})
+                failures.append({"chunk_file": chunk_file, "error": str(result), "attempts": attempts.get(i, 1)})
+                return None, 0.0
+
+            tree_reduce = config.executor_config.tree_reduce
+            if uncached_indices:
+                if backend == "dask":
+                    from dask.distributed import as_completed
+                else:
+                    from concurrent.futures import as_completed
+
+                # tree_reduce: only the final accumulator may reach the driver, so the workers
+                # write the chunk payloads into the (shared) cache themselves
+                worker_writes = config.executor_config.worker_writes_payload or tree_reduce
+                worker_cache_dir = config.executor_config.worker_cache_dir
+                _safe_print(f"Submitting {len(uncached_indices)} chunks in parallel...")
+                # scattered once per run and shared by every chunk (and Analysis) with the same code
+                code_key, code_ref = deps._executor.shared_code(client, code_bytes)
+                futures = {}
+                submitted_at = {}
+
+                def _submit(i, delay=0.0, speculative=False, **placement):
+                    ca = chunk_arts[i]
+                    trace_context = remote_chunk_hooks[i].attrs.get("trace_context") if i in remote_chunk_hooks else None
+                    if trace_context is not None:
+                        trace_context = {**trace_context, "name": chunks_entries[i]["file"]}
+                    chunk_fileset = json.loads((chunk_dir / ca.chunk_file).read_text())
+                    if is_declarative:
+                        run_args = (_run_chunk_remote_declarative, chunk_fileset,
+                                    code_key, code_ref, processor_params, runner_params)
+                    else:
+                        run_args = (_run_chunk_remote, chunk_fileset, code_key, code_ref, builder_params)
+                    if worker_writes:
+                        worker_dir = deps._executor.path_for(ca).absolute()
+                        if worker_cache_dir is not None:
+                            worker_dir = Path(worker_cache_dir) / worker_dir.relative_to(deps._executor.cache_dir.absolute())
+                        # exceptions become a failed payload on disk, like any other chunk result
+                        run_args = (_persist_remote, str(worker_dir), ca.chunk_hash, _run_chunk_guarded, *run_args)
+                        if not speculative:
+                            # no copy of the chunk is running: a failed payload left by an earlier
+                            # attempt (or run) must not keep this attempt's failure from being written
+                            deps._executor.path_for(ca).joinpath("payload.pkl").unlink(missing_ok=True)
+                    if not speculative:
+                        submitted_at[i] = time.time() + delay
+                    if tree_reduce:
+                        return client.submit(*run_args)
+                    # a retry or duplicate must not be deduplicated against the chunk's earlier task
+                    return client.submit(_run_chunk_timed, trace_context, delay, *run_args,
+                                         pure=not speculative and i not in attempts, **placement)
+
+                for i in uncached_indices:
+                    if config.hooks:
+                        remote_chunk_hooks[i] = HookContext(
+                            kind="chunk", art=chunk_arts[i], name=chunks_entries[i]["file"], attrs={"remote": True},
+                        )
+                        fire(config.hooks, "on_chunk_start", remote_chunk_hooks[i])
+                    futures[_submit(i)] = i
+
+                if tree_reduce:
+                    # Merge pairs (or fan-in sized groups) of chunk results on the workers; only
+                    # the root of the tree — the final accumulator — is gathered by the driver.
+                    fanin = config.executor_config.tree_reduce_fanin
+                    level, from_chunks = list(futures), True
+                    while True:
+                        level = [
+                            client.submit(_reduce_remote, from_chunks, *level[j:j + fanin])
+                            for j in range(0, len(level), fanin)
+                        ]
+                        from_chunks = False
+                        if len(level) == 1:
+                            break
+                    tree_root = level[0]
+
+            # Cached chunks are merged straight from disk while the submitted ones run
+            uncached = set(uncached_indices)
+            for i, ca in enumerate(chunk_arts):
+                if i not in uncached and i not in bisect_first and i not in in_base:
+                    chunk_out_dir = deps._executor.path_for(ca)
+                    deps._executor.note_cache_hit(ca, chunk_out_dir)
+                    start = time.perf_counter()
+                    result = read_payload(chunk_out_dir / "payload.pkl")
+                    load_seconds = time.perf_counter() - start
+                    metrics, merge = _merge_chunk(i, result)
+                    _record_chunk(i, ca, "hit", result.is_ok(), load_seconds, metrics, merge=merge)
+
+            if uncached_indices and tree_reduce:
+                # Per-chunk cache entries are still written (by the workers) so failed chunks can
+                # be retried; the driver only receives each chunk's status record.
+                release = config.executor_config.release_chunk_results
+                for f in as_completed(list(futures)):
+                    i = futures.pop(f) if release else futures[f]
+                    ok, error, metrics = f.result()[:3]
+                    ca = chunk_arts[i]
+                    out_dir = deps._executor.path_for(ca)
+                    _check_shared_payload(out_dir)
+                    deps._executor.mark_materialized(ca, out_dir)
+                    if release:
+                        f.release()
+                    chunk_file = chunks_entries[i]["file"]
+                    _safe_print("------------------------------------")
+                    _safe_print(f"Processing {chunk_file}")
+                    if ok:
+                        _safe_print("Successfully processed!")
+                        _record_throughput(i, metrics)
+                    else:
+                        _safe_print("Failure caught!")
+                        failures.append({"chunk_file": chunk_file, "error": error, "attempts": attempts.get(i, 1)})
+                    # merged on the workers; observed runtime includes the queue wait
+                    _record_chunk(i, ca, "miss", ok, time.time() - submitted_at[i], metrics)
+
+                _safe_print("Gathering tree-reduced accumulator...")
+                tree_acc, tree_metrics = cloudpickle.loads(tree_root.result())
+                if tree_acc is not None:
+                    start = time.perf_counter()
+                    merged_acc = accumulate([tree_acc], accum=merged_acc)
+                    metrics_merged = accumulate([tree_metrics], accum=metrics_merged)
+                    elapsed = time.perf_counter() - start
+                    merge_seconds += elapsed
+                    merged(config.hooks, art, "tree_reduce", elapsed)
+            elif uncached_indices:
+                # Write and merge every chunk the moment it finishes, so a slow chunk never
+                # blocks the merge of the others and the driver only ever holds the merged
+                # accumulator plus one in-flight payload.
+                # A failed chunk that the retry policy accepts is resubmitted right away (it sleeps
+                # its backoff on the worker) and collected when it finishes. With
+                # speculate_stragglers, the loop polls instead so it can duplicate stragglers.
+                release = config.executor_config.release_chunk_results
+                speculate = config.executor_config.speculate_stragglers
+                pending = dict(futures)
+                finish_times: list[float] = []  # driver time of every finished chunk task
+                chunk_seconds: list[float] = []  # worker-side runtimes of successful chunks
+                copies = {i: [f] for f, i in futures.items()}  # speculate_stragglers: running copies
+                order = {i: n for n, i in enumerate(uncached_indices)}
+                slots = _worker_slots(client, len(uncached_indices))
+
+                def _estimated_start(i):
+                    """
+                    Driver time chunk i started running, assuming chunks start in submission order
+                    as slots free up; None while it is presumably still queued.
+                    """
+                    n = order[i] - slots
+                    if i in attempts or n < 0:
+                        return submitted_at[i]
+                    return finish_times[n] if n < len(finish_times) else None
+
+                def _speculate():
+                    if not chunk_seconds or len(chunk_seconds) < config.executor_config.speculate_after * len(order):
+                        return
+                    median = statistics.median(chunk_seconds)
+                    now = time.time()
+                    for i, running in copies.items():
+                        start = _estimated_start(i)
+                        if i in speculated or len(running) != 1 or start is None or now - start <= speculate * median:
+                            continue
+                        speculated.add(i)
+                        _safe_print(f"{chunks_entries[i]['file']} has run {now - start:.1f}s "
+                                    f"(median {median:.1f}s); submitting a duplicate")
+                        g = _submit(i, speculative=True, **_placement_elsewhere(client, running[0]))
+                        running.append(g)
+                        pending[g] = futures[g] = i
+
+                def _finished():
+                    """
+                    Futures of pending as they finish, including the ones added meanwhile
+                    (retries, duplicates of stragglers, which need polling to be submitted).
+                    """
+                    if speculate is None:
+                        while pending:
+                            yield from as_completed(list(pending))
+                        return
+                    while pending:
+                        done = [f for f in pending if f.done()]
+                        for f in done:
+                            if f in pending:  # not cancelled as the loser of a duplicate
+                                yield f
+                        if not done:
+                            _speculate()
+                            time.sleep(_SPECULATION_POLL_SECONDS)
+
+                for f in _finished():
+                    i = pending.pop(f)
+                    if release:
+                        del futures[f]
+                    started = finished = cause = None
+                    try:
+                        started, finished, payload, worker_spans = f.result()
+                        if i in remote_chunk_hooks:
+                            remote_chunk_hooks[i].attrs.setdefault("worker_spans", []).extend(worker_spans)
+                    except Exception as exc:
+                        cause = _exc = exc
+                        class _ExcResult:
+                            def is_ok(self): return False
+                            def __str__(self): return f"Worker exception: {_exc}"
+                        payload = cloudpickle.dumps(_ExcResult())
+                    if release and hasattr(f, "release"):  # concurrent.futures futures hold nothing remote
+                        f.release()
+                    ca = chunk_arts[i]
+                    out_dir = deps._executor.path_for(ca)
+                    if worker_writes and started is not None:
+                        _check_shared_payload(out_dir)
+                        ok, error, metrics = payload[:3]
+                        if not ok and retry is not None:
+                            # failed payloads are small; the exception inside decides on a retry
+                            cause = _failure_cause(read_payload(out_dir / "payload.pkl"))
+                    else:
+                        _r = cloudpickle.loads(payload)
+                        ok = _r.is_ok()
+                        if not ok and cause is None:
+                            cause = _failure_cause(_r)
+                    finish_times.append(time.time())
+                    if ok and started is not None:
+                        chunk_seconds.append(finished - started)
+                    if speculate is not None:
+                        copies[i].remove(f)
+                        if not ok and copies[i]:
+                            continue  # a duplicate of this chunk is still running and may succeed
+                        for g in copies.pop(i):  # the first successful copy wins
+                            g.cancel()
+                            pending.pop(g, None)
+                            futures.pop(g, None)
+                    delay = None if ok else _retry_later(i, cause)
+                    if delay is not None:
+                        g = _submit(i, delay)
+                        pending[g] = futures[g] = i
+                        if speculate is not None:
+                            copies[i] = [g]
+                        continue
+                    if worker_writes and started is not None:
+                        # the worker wrote the chunk's cache entry; only a successful payload is
+                        # read back, right before its merge
+                        deps._executor.mark_materialized(ca, out_dir)
+                        if ok:
+                            _record_throughput(i, metrics)
+                            metrics, merge = _merge_chunk(i, read_payload(out_dir / "payload.pkl"))
+                        else:
+                            metrics, merge = _merge_chunk(i, _FailedChunk(error))
+                        _record_chunk(i, ca, "miss", ok, finished - started, metrics,
+                                      max(0.0, started - submitted_at[i]), merge)
+                        continue
+                    out_dir.mkdir(parents=True, exist_ok=True)
+                    (out_dir / ".chunk_hash").write_text(ca.chunk_hash)
+                    if config.payload_compression is None:
+                        # workers return plain cloudpickle bytes, which read_payload understands
+                        (out_dir / "payload.pkl").write_bytes(payload)
+                    else:
+                        write_payload(out_dir / "payload.pkl", _r, config.payload_compression)
+                    del payload
+                    if ok:
+                        (out_dir / ".success").touch()
+                        _record_throughput(i, _extract_acc(_r)[1])
+                    deps._executor.mark_materialized(ca, out_dir)
+                    metrics, merge = _merge_chunk(i, _r)
+                    if started is not None:
+                        seconds, queue_wait = finished - started, max(0.0, started - submitted_at[i])
+                    else:
+                        seconds, queue_wait = time.time() - submitted_at[i], None
+                    _record_chunk(i, ca, "miss", ok, seconds, metrics, queue_wait, merge)
+                    del _r
+        finally:
+            if local_client is not None:
+                local_client.shutdown()
     else:
-        for entry in chunks_entries:
+        for i, entry in enumerate(chunks_entries):
+            if i in bisect_first or i in in_base:
+                continue
             chunk_file = entry["file"]
             _safe_print("------------------------------------")
             _safe_print(f"Processing {chunk_file}")
             chunk_art = _make_chunk_artifact(entry)
-            # process chunk
-            chunk_out_dir = deps.need(chunk_art)
-            result = cloudpickle.loads((chunk_out_dir / "payload.pkl").read_bytes())
+            # process chunk, again after a backoff while the retry policy accepts its failure
+            while True:
+                try:
+                    chunk_out_dir = deps.need(chunk_art)
+                except Exception as exc:
+                    delay = _retry_later(i, exc)
+                    if delay is None:
+                        if not config.bisect_failures:
+                            raise
+                        # bisected below like a failed payload; its parts may well succeed
+                        result, load_seconds = _FailedChunk(f"{type(exc).__name__}: {exc}"), 0.0
+                        break
+                else:
+                    start = time.perf_counter()
+                    result = read_payload(chunk_out_dir / "payload.pkl")
+                    load_seconds = time.perf_counter() - start
+                    delay = None if result.is_ok() else _retry_later(i, _failure_cause(result))
+                    if delay is None:
+                        break
+                deps._executor.forget(chunk_art)
+                time.sleep(delay)
+            produced = deps.report().artifact(chunk_art) or {"cache": "hit", "seconds": 0.0}
+            chunk_seconds = produced["seconds"] + (load_seconds if produced["cache"] == "hit" else 0.0)
     
             #TODO: if config contains histserv_connection_info, then use the connection and add to the hist server, otherwise 
             if result.is_ok():
                 _safe_print("Successfully processed!")
                 acc, metrics = _extract_acc(result)
+                start = time.perf_counter()
                 if config.hist_client is not None:
                     # acc is already connection_info (returned directly from run_analysis)
                     # passing remote_hist directly is not possible because it holds a live gRPC connection, which is not picklable
@@ -414,22 +1111,52 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
                 else:
                     merged_acc = accumulate([acc], accum=merged_acc) # accumulatable
                 metrics_merged = accumulate([metrics], accum=metrics_merged)
+                merge = time.perf_counter() - start
+                merge_seconds += merge
+                merged(config.hooks, art, chunk_file, merge)
+                _record_chunk(i, chunk_art, produced["cache"], True, chunk_seconds, metrics, merge=merge)
             else:
                 _safe_print("Failure caught!")
-                failures.append({"chunk_file": chunk_file, "error": str(result)})
+                failures.append({"chunk_file": chunk_file, "error": str(result), "attempts": attempts.get(i, 1)})
+                _record_chunk(i, chunk_art, produced["cache"], False, chunk_seconds, None)
                 continue
 
+    for i in in_base:
+        _record_chunk(i, _make_chunk_artifact(chunks_entries[i]), "merged", True, 0.0, None)
+    chunk_index = {entry["file"]: i for i, entry in enumerate(chunks_entries)}
+    if config.bisect_failures:
+        failed = {chunk_index[f["chunk_file"]]: f for f in failures}
+        failures = []
+        for i in sorted(bisect_first | set(failed)):
+            failures.extend(_bisect(i, failed.get(i)))
+    # report failures in chunk order regardless of completion order
+    failures.sort(key=lambda f: chunk_index[f["chunk_file"]])
+
+    deps.report().record_analysis(art, [r for r in chunk_records if r is not None], merge_seconds)
+
     payload = {
         "builder": _builder_key(art.builder) if art.builder is not None else None,
         "processor": _builder_key(art.processor) if art.processor is not None else None,
         "n_chunks_total": len(chunks_entries),
-        "n_chunks_ok": 0 if merged_acc is None else (len(chunks_entries) - len(failures)),
+        "n_chunks_ok": 0 if merged_acc is None else (len(chunks_entries) - len({f["chunk_file"] for f in failures})),
         "failures": failures,
         "processor_result": (merged_acc, metrics_merged),
     }
+    reusable = use_merge_cache and merged_acc is not None and not merged_parts
+    if reusable:
+        payload["merged_chunks"] = sorted(
+            chunk_ids[i] for i, r in enumerate(chunk_records) if r is not None and r["status"] == "ok"
+        )
     out.mkdir(parents=True, exist_ok=True)
-    (out / "payload.pkl").write_bytes(cloudpickle.dumps(payload))
+    (out / MERGE_RECORD).unlink(missing_ok=True)  # the payload below no longer matches it
+    if config.hist_storage == "mmap":
+        write_mapped_payload(out / "payload.pkl", payload, config.payload_compression)
+    else:
+        shutil.rmtree(out / HIST_DIR, ignore_errors=True)
+        write_payload(out / "payload.pkl", payload, config.payload_compression)
     (out / ".chunk_fraction").write_text(str(config.chunk_fraction))
+    if reusable:
+        write_merge_record(out, payload["merged_chunks"])
     if failures:
         (out / ".has_failures").touch()
     else:
@@ -440,7 +1167,7 @@ def execute_analysis(*, art: Analysis, deps: Deps, out: Path, config: RunConfig)
 def make_plot(*, art: Plotting, deps: Deps, out: Path, config: RunConfig) -> None:
     out.mkdir(parents=True, exist_ok=True)
     analysis_dir = deps.need(art.analysis)
-    payload = cloudpickle.loads((analysis_dir / "payload.pkl").read_bytes())
+    payload = read_payload(analysis_dir / "payload.pkl")
     fn = _load_object(art.builder)
     if config.histserv_connection_info is not None:
         plot_result = _call_builder(fn, config=config, builder_params=dict(art.builder_params))
@@ -458,7 +1185,7 @@ def make_plot(*, art: Plotting, deps: Deps, out: Path, config: RunConfig) -> Non
         }
     else:
         plot_result = _call_builder(fn, payload, builder_params=dict(art.builder_params))
-    (out / "payload.pkl").write_bytes(cloudpickle.dumps(plot_result))
+    write_payload(out / "payload.pkl", plot_result, config.payload_compression)
 
 
 @producer(CustomArtifact)
@@ -473,4 +1200,4 @@ def run_custom(*, art: CustomArtifact, deps: Deps, out: Path, config: RunConfig)
     fn = _load_object(art.builder)
     result = _call_builder(fn, upstream_results, out=out, config=config,
                            builder_params=dict(art.builder_params))
-    (out / "payload.pkl").write_bytes(cloudpickle.dumps(result))
+    write_payload(out / "payload.pkl", result, config.payload_compression)
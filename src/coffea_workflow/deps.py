@@ -22,3 +22,7 @@ class Deps:
         """
         return self._executor.get_coffea_executor(self._config)
 
+    def report(self):
+        """The run report producers add their own records to (see report.py)."""
+        return self._executor.report
+
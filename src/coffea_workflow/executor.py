@@ -1,4 +1,8 @@
 from __future__ import annotations
+import hashlib
+import shutil
+import threading
+import time
 from pathlib import Path
 from typing import Any, Type
 
@@ -7,6 +11,10 @@ from .producers import get_producer
 from .deps import Deps
 from .config import RunConfig
 from .producers_utils import _safe_print
+from .cache_index import CacheIndex, COMPLETE, INCOMPLETE, _dir_size
+from .report import RunReport
+from .throughput import ThroughputHistory
+from .hooks import config_attrs, hooked
 
 class Executor:
     """
@@ -18,6 +26,16 @@ class Executor:
         self.config = config
         self._session_cache: set[Path] = set()  # paths materialized this run
         self._coffea_executor: Any = None  # pass same coffea executor to different chunks if split strategy is applied instead of creating multiple
+        self._lock = threading.Lock()  # render.run may materialize independent steps from several threads
+        self._index = CacheIndex(cache_dir, self._scan) if config.cache_index else None
+        self.report = RunReport()  # per-artifact timings for run()'s run report, see report.py
+        self._scattered: dict[tuple[int, str], Any] = {}  # (id(client), code hash) -> Dask future
+        self._scatter_lock = threading.Lock()
+        # single flight: work identity -> event set once the thread producing it is done, and
+        # -> output of work done this run, which twins differing only in label_keys copy
+        self._inflight: dict[str, threading.Event] = {}
+        self._done: dict[str, Path] = {}
+        self._throughput: ThroughputHistory | None = None
     
 
     def path_for(self, art: Artifact) -> Path:
@@ -51,13 +69,42 @@ class Executor:
         """
         Build the coffea executor on first call and reuse it for all chunks.
         """
-        if self._coffea_executor is None:
-            from .producers_utils import build_executor
-            self._coffea_executor = build_executor(config.executor_config, config.facility)
-        return self._coffea_executor
+        with self._lock:
+            if self._coffea_executor is None:
+                from .producers_utils import build_executor
+                self._coffea_executor = build_executor(config.executor_config, config.facility)
+            return self._coffea_executor
+
+    def shared_code(self, client: Any, code: bytes) -> tuple[str, Any]:
+        """
+        (content hash, handle) of a pickled builder/processor that parallel_chunks sends
+        with every chunk. A Dask client gets the bytes scattered to all workers once per
+        run, and every chunk and Analysis step with the same code reuses that future;
+        other clients (the local process pool) get the bytes themselves.
+        """
+        key = hashlib.sha256(code).hexdigest()
+        if not hasattr(client, "scatter"):
+            return key, code
+        with self._scatter_lock:
+            handle = self._scattered.get((id(client), key))
+            if handle is None:
+                handle = client.scatter(code, broadcast=True, hash=False)
+                self._scattered[(id(client), key)] = handle
+        return key, handle
+
+    def throughput_history(self) -> ThroughputHistory:
+        """
+        The run's ThroughputHistory under cache_dir, shared by every chunk and Analysis
+        step so samples go through one SQLite connection; close() closes it.
+        """
+        with self._lock:
+            if self._throughput is None:
+                self._throughput = ThroughputHistory(self.cache_dir)
+            return self._throughput
 
     _EXPECTED = {
         "Fileset": "fileset.json",
+        "Preprocessed": "workitems.json",
         "Chunking": "manifest.json",
         "ChunkAnalysis": ".success",
         "Analysis": "payload.pkl",
@@ -65,43 +112,182 @@ class Executor:
         "CustomArtifact": "payload.pkl", 
     }
 
-    def exists(self, art: Artifact, config: RunConfig | None = None) -> bool:
-        effective_config = config if config is not None else self.config
-        out = self.path_for(art)
+    def _scan(self, type_name: str, out: Path) -> dict | None:
+        """
+        Read an artifact's cache state from its directory — the filesystem checks the
+        cache index saves on every lookup. Returns None when there is no directory.
+        """
         if not out.is_dir():
+            return None
+        expected = self._EXPECTED.get(type_name)
+        complete = not expected or (out / expected).exists()
+        chunk_fraction = None
+        if type_name == "Analysis":
+            # Analysis with recorded failures is not considered complete
+            if (out / ".has_failures").exists():
+                complete = False
+            stamp = out / ".chunk_fraction"
+            chunk_fraction = stamp.read_text() if stamp.exists() else "None"
+        return {
+            "status": COMPLETE if complete else INCOMPLETE,
+            "size": _dir_size(out),
+            "chunk_fraction": chunk_fraction,
+        }
+
+    def migrate_legacy(self, art: Artifact) -> bool:
+        """
+        Move a cache entry written under the old identity scheme (see identity.py) to
+        path_for(art). Only looked for when the current path does not exist; returns
+        True if an entry was moved.
+        """
+        out = self.path_for(art)
+        legacy_identity = getattr(art, "legacy_identity", None)
+        if legacy_identity is None or out.exists():
             return False
-        expected = self._EXPECTED.get(art.type_name)
-        if expected and not (out / expected).exists():
+        legacy = self.cache_dir / art.type_name / legacy_identity()
+        if legacy == out or not legacy.is_dir():
             return False
+        try:
+            legacy.rename(out)
+        except OSError:
+            return False  # another process migrated (or recreated) it first
+        if self._index is not None:
+            self._index.remove(art.type_name, legacy.name)
+        _safe_print(f"Migrated cache entry {legacy} -> {out}")
+        return True
 
-        if art.type_name == "Analysis":
-            # Analysis with recorded failures is not considered complete
-            if (out / ".has_failures").exists():
+    def exists(self, art: Artifact, config: RunConfig | None = None) -> bool:
+        start = time.perf_counter()
+        try:
+            return self._exists(art, config)
+        finally:
+            self.report.record_lookup(time.perf_counter() - start)
+
+    def _exists(self, art: Artifact, config: RunConfig | None) -> bool:
+        effective_config = config if config is not None else self.config
+        entry = self._index.lookup(art.type_name, art.identity()) if self._index is not None else None
+        if entry is not None and not self.path_for(art).is_dir():
+            # the directory was deleted by hand (e.g. to force a rerun): the row is stale
+            self._index.remove(art.type_name, art.identity())
+            entry = None
+        if entry is None:
+            # not indexed (or no index): fall back to the directory, and remember complete
+            # entries so the next lookup is a single query
+            self.migrate_legacy(art)
+            entry = self._scan(art.type_name, self.path_for(art))
+            if entry is None or entry["status"] != COMPLETE:
                 return False
+            if self._index is not None:
+                self._index.record(art.type_name, art.identity(), entry)
+        if entry["status"] != COMPLETE:
+            return False
+
+        if art.type_name == "Analysis":
             # if chunk_fraction has changed since this result was cached
-            stamp = out / ".chunk_fraction"
-            stored = stamp.read_text() if stamp.exists() else "None"
-            if stored != str(effective_config.chunk_fraction):
+            if entry["chunk_fraction"] != str(effective_config.chunk_fraction):
                 return False
         return True
 
+    def mark_materialized(self, art: Artifact, out: Path | None = None) -> None:
+        """
+        Register an artifact whose output was written to out = path_for(art): add it to
+        the session cache and record its state in the cache index. Producers that write
+        cache entries themselves (e.g. parallel_chunks writing ChunkAnalysis payloads)
+        call this instead of going through materialize().
+        """
+        out = out if out is not None else self.path_for(art)
+        self._session_cache.add(out)
+        if self._index is not None:
+            entry = self._scan(art.type_name, out)
+            if entry is not None:
+                self._index.record(art.type_name, art.identity(), entry)
+
+    def note_cache_hit(self, art: Artifact, out: Path | None = None) -> None:
+        """
+        Register an artifact that is used from the cache this run: it joins the session
+        cache (which also pins it against eviction, see cache_manager.py) and its access
+        time is bumped for LRU eviction.
+        """
+        out = out if out is not None else self.path_for(art)
+        self._session_cache.add(out)
+        if self._index is not None:
+            self._index.touch(art.type_name, art.identity())
+
+    def forget(self, art: Artifact) -> None:
+        """Drop art from the session cache, so the next materialize() runs its producer again (chunk retries)."""
+        self._session_cache.discard(self.path_for(art))
+
+    def close(self) -> None:
+        """Flush queued access times, release scattered code and close the cache index and throughput history."""
+        self._scattered.clear()
+        if self._index is not None:
+            self._index.close()
+        if self._throughput is not None:
+            self._throughput.close()
+
+    def rebuild_index(self) -> None:
+        """Re-index the whole cache directory, e.g. after deleting entries by hand."""
+        if self._index is not None:
+            self._index.rebuild()
+
     def materialize(self, art: Artifact, config: RunConfig | None = None) -> Path:
+        """
+        Path of art's output: from this run's session cache, the disk cache, a twin produced
+        this run (same work_identity), or its producer. Concurrent steps asking for the same
+        work are single-flighted: one thread produces it, the others wait and reuse it.
+        """
         effective_config = config if config is not None else self.config
         out = self.path_for(art)
         if out in self._session_cache:
             return out
-        if not getattr(art, "always_rerun", False) and self.exists(art, config=effective_config):
-            self._session_cache.add(out)
+        # a hist server keeps one histogram per Analysis identity, so twins are not shared there
+        key = art.identity() if effective_config.hist_client is not None else art.work_identity()
+        while True:
+            with self._lock:
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = threading.Event()
+                    break
+            flight.wait()
+            if out in self._session_cache:
+                return out
+            # a twin finished (or the producing thread failed): look again, as the producer if need be
+        try:
+            return self._materialize(art, effective_config, out, key)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.set()
+
+    def _materialize(self, art: Artifact, effective_config: RunConfig, out: Path, key: str) -> Path:
+        start = time.perf_counter()
+        always_rerun = getattr(art, "always_rerun", False)
+        if not always_rerun and self.exists(art, config=effective_config):
+            self.note_cache_hit(art, out)
+            self._done[key] = out
+            self.report.record_artifact(art, "hit", time.perf_counter() - start)
             _safe_print(f"Extracted from cache: {out}")
             return out
+        twin = self._done.get(key)
+        if twin is not None and twin != out and not always_rerun and twin.exists():
+            shutil.copytree(twin, out, dirs_exist_ok=True)
+            self.mark_materialized(art, out)
+            self.report.record_artifact(art, "hit", time.perf_counter() - start, _dir_size(out))
+            _safe_print(f"Copied from {twin} (the same {art.type_name} under another name)")
+            return out
 
         fn = get_producer(type(art))
         deps = Deps(self, config=effective_config)
-        fn(art=art, deps=deps, out=out, config=effective_config)
+        name = getattr(art, "name", None) or getattr(art, "chunk_file", None) or art.type_name
+        attrs = config_attrs(effective_config) if effective_config.hooks else {}
+        with hooked(effective_config.hooks, "step", art, name, **attrs):
+            fn(art=art, deps=deps, out=out, config=effective_config)
 
         if not out.exists():
             raise RuntimeError(
                 f"Producer for {art.type_name} finished but did not create output at {out}"
             )
-        self._session_cache.add(out)
+        self.mark_materialized(art, out)
+        self._done[key] = out
+        self.report.record_artifact(art, "miss", time.perf_counter() - start, _dir_size(out))
         return out
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Memory-mapped histogram storage for merged Analysis results.
+
+A merged Analysis payload is usually a dict (of dicts) of hist.Hist objects.
+Written as one payload.pkl, every consumer — _load_step_result, make_plot,
+CustomArtifact builders — has to read and unpickle all of it, even when a
+plotting builder only looks at one histogram. With
+RunConfig(hist_storage="mmap") execute_analysis writes
+
+    Analysis/<identity>/
+        payload.pkl      the payload with every histogram replaced by a
+                         MappedHist stub (class, axes, storage type, metadata)
+        hists/<n>.npy    the bin storage of histogram n, flow bins included
+
+read_payload() notices the hists/ directory and turns every dict that holds
+stubs into a LazyHistDict: the .npy file of a histogram is memory-mapped and
+the hist.Hist rebuilt only when that key is first accessed. Histograms nobody
+looks at are never read from disk.
+
+Only histograms reachable through plain dicts, lists and tuples are stored
+this way; anything else (custom accumulator classes, histograms inside
+objects) stays in payload.pkl unchanged.
+"""
+from __future__ import annotations
+
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .payload import write_payload
+
+HIST_DIR = "hists"
+
+
+@dataclass(frozen=True)
+class MappedHist:
+    """Stub left in payload.pkl for a histogram whose bins live in hists/<file>."""
+    file: str
+    cls: type
+    axes: tuple
+    storage_type: type
+    metadata: Any = None
+    name: str | None = None
+    label: str | None = None
+
+    @classmethod
+    def from_hist(cls, h, file: str) -> "MappedHist":
+        return cls(
+            file=file,
+            cls=type(h),
+            axes=tuple(h.axes),
+            storage_type=h.storage_type,
+            metadata=h.metadata,
+            name=getattr(h, "name", None),
+            label=getattr(h, "label", None),
+        )
+
+    def view(self, hist_dir: Path) -> np.ndarray:
+        """Read-only memory map of the bin storage, flow bins included."""
+        return np.load(Path(hist_dir) / self.file, mmap_mode="r")
+
+    def load(self, hist_dir: Path):
+        """Rebuild the histogram; only the pages of its own .npy file are read."""
+        kwargs = {"storage": self.storage_type(), "metadata": self.metadata}
+        if self.name is not None:
+            kwargs["name"] = self.name
+        if self.label is not None:
+            kwargs["label"] = self.label
+        h = self.cls(*self.axes, **kwargs)
+        h.view(flow=True)[...] = self.view(hist_dir)
+        return h
+
+
+class LazyHistDict(dict):
+    """
+    dict whose MappedHist values are rebuilt into histograms on first access.
+
+    Behaves like the plain dict it replaces: indexing, get(), items(), values(),
+    copy() and pickling all hand out real histograms. Use mapped_view(key) to read
+    the bin storage of a histogram without building it.
+    """
+
+    def __init__(self, data: dict, hist_dir: Path):
+        super().__init__(data)
+        self._hist_dir = Path(hist_dir)
+
+    def _resolve(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, MappedHist):
+            value = value.load(self._hist_dir)
+            super().__setitem__(key, value)
+        return value
+
+    def __getitem__(self, key):
+        return self._resolve(key)
+
+    def __iter__(self):
+        # overriding __iter__ makes dict(x), {**x} and update(x) go through __getitem__
+        return super().__iter__()
+
+    def get(self, key, default=None):
+        return self._resolve(key) if key in self else default
+
+    def items(self):
+        return [(k, self._resolve(k)) for k in super().keys()]
+
+    def values(self):
+        return [self._resolve(k) for k in super().keys()]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self._resolve(key)
+            super().pop(key)
+            return value
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key = next(reversed(super().keys()))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self._resolve(key)
+        return super().setdefault(key, default)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        return isinstance(other, dict) and dict(self.items()) == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # pickles (and copy.copy/deepcopy) as the plain dict it stands for
+        return dict, (dict(self.items()),)
+
+    def is_loaded(self, key) -> bool:
+        return not isinstance(super().__getitem__(key), MappedHist)
+
+    def mapped_view(self, key) -> np.ndarray:
+        """Bin storage of a histogram (flow bins included) without rebuilding it."""
+        value = super().__getitem__(key)
+        if isinstance(value, MappedHist):
+            return value.view(self._hist_dir)
+        return value.view(flow=True)
+
+
+def _strip(obj: Any, hist_dir: Path, counter: list[int]) -> Any:
+    import boost_histogram as bh
+
+    if isinstance(obj, bh.Histogram):
+        file = f"{counter[0]}.npy"
+        counter[0] += 1
+        np.save(hist_dir / file, np.asarray(obj.view(flow=True)), allow_pickle=False)
+        return MappedHist.from_hist(obj, file)
+    if type(obj) is dict:
+        return {k: _strip(v, hist_dir, counter) for k, v in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(_strip(v, hist_dir, counter) for v in obj)
+    return obj
+
+
+def _attach(obj: Any, hist_dir: Path) -> Any:
+    if isinstance(obj, MappedHist):
+        # nowhere to defer to: a histogram directly inside a list/tuple is built right away
+        return obj.load(hist_dir)
+    if type(obj) is dict:
+        data = {k: v if isinstance(v, MappedHist) else _attach(v, hist_dir) for k, v in obj.items()}
+        if any(isinstance(v, MappedHist) for v in data.values()):
+            return LazyHistDict(data, hist_dir)
+        return data
+    if type(obj) in (list, tuple):
+        return type(obj)(_attach(v, hist_dir) for v in obj)
+    return obj
+
+
+def write_mapped_payload(path: Path, obj: Any, compression: str | None = None) -> int:
+    """
+    Write obj to path like payload.write_payload, moving the bin storage of every
+    histogram into <path's directory>/hists/*.npy. Returns the bytes written.
+    """
+    path = Path(path)
+    hist_dir = path.parent / HIST_DIR
+    # a previous run into the same directory may have left differently numbered files
+    shutil.rmtree(hist_dir, ignore_errors=True)
+    hist_dir.mkdir(parents=True)
+    counter = [0]
+    stripped = _strip(obj, hist_dir, counter)
+    written = write_payload(path, stripped, compression)
+    written += sum(p.stat().st_size for p in hist_dir.iterdir())
+    if counter[0] == 0:
+        hist_dir.rmdir()
+    return written
+
+
+def attach_mapped_hists(obj: Any, hist_dir: Path) -> Any:
+    """Replace the MappedHist stubs of a loaded payload by lazily-built histograms."""
+    return _attach(obj, Path(hist_dir))
+
+
+def resolve_mapped_hists(obj: Any) -> Any:
+    """obj with every LazyHistDict built into a plain dict, e.g. before merging into it or rewriting its files."""
+    if isinstance(obj, LazyHistDict):
+        obj = dict(obj.items())
+    if type(obj) is dict:
+        return {k: resolve_mapped_hists(v) for k, v in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(resolve_mapped_hists(v) for v in obj)
+    return obj
@@ -0,0 +1,308 @@
+"""
+Profiling hooks around producers, user code and merging.
+
+RunConfig(hooks=(...)) takes objects with any of these methods; each gets a
+HookContext:
+
+    on_run_start / on_run_end       render.run, around the whole workflow
+                                    (art is None; attrs: executor, facility)
+    on_step_start / on_step_end     Executor.materialize runs an artifact's
+                                    producer (cache misses only; nested
+                                    artifacts such as Chunking/ChunkAnalysis
+                                    fire their own pair inside their parent's)
+    on_chunk_start / on_chunk_end   the user's builder/processor runs on one
+                                    chunk (run_analysis). In parallel_chunks
+                                    mode they fire on the driver at submit and
+                                    completion, with attrs["remote"] = True; a
+                                    hook may put a "trace_context" in attrs at
+                                    start, which is shipped to the worker, and
+                                    finds the worker's "worker_spans" at the end
+                                    (see tracing.py)
+    on_merge                        one chunk result (or the tree-reduced
+                                    accumulator) was merged into the Analysis
+
+Step time minus the chunk times of its chunks is framework overhead;
+chunk time is user code plus coffea. TracingHook (tracing.py) turns all of
+them into trace spans. Subclass Hook to only implement some of the methods. Exceptions raised by a hook propagate.
+
+Built-in hooks, all writing one file per profiled scope into `directory`
+(not under cache_dir, whose subdirectories are artifact types):
+
+    CProfileHook        cProfile, <name>.pstats (pstats/snakeviz)
+    SamplingHook        wall-clock stack sampler of the profiled thread, in
+                        pyinstrument's spirit but dependency-free; folded
+                        stacks in <name>.folded (speedscope, flamegraph.pl)
+    TracemallocHook     tracemalloc snapshots at start and end; the end
+                        snapshot in <name>.tracemalloc and the top growth
+                        lines in <name>.tracemalloc.txt
+
+scope="step" (default) profiles each workflow step as a whole: only the
+outermost materialize on a thread is profiled, so an Analysis includes its
+Chunking and chunks. scope="chunk" profiles only the user code of each
+chunk. Chunks on parallel_chunks workers run in other processes and are not
+profiled. cProfile and tracemalloc are process-wide on recent Pythons:
+with max_concurrent_steps > 1, a step that starts while another is being
+profiled is skipped (CProfileHook) or shares the allocation trace.
+"""
+from __future__ import annotations
+
+import collections
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Literal
+
+from .producers_utils import _safe_print
+
+HOOK_METHODS = ("on_run_start", "on_run_end", "on_step_start", "on_step_end", "on_chunk_start", "on_chunk_end", "on_merge")
+
+
+@dataclass
+class HookContext:
+    """
+    What a hook call is about. kind is "run", "step", "chunk" or "merge"; started
+    is a time.perf_counter() value; seconds and error are set for the *_end and on_merge calls.
+    """
+    kind: str
+    art: Any
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float | None = None
+    error: BaseException | None = None
+    attrs: dict = field(default_factory=dict)
+
+
+class Hook:
+    """No-op base class; override the methods you need."""
+
+    def on_run_start(self, ctx: HookContext) -> None: ...
+    def on_run_end(self, ctx: HookContext) -> None: ...
+    def on_step_start(self, ctx: HookContext) -> None: ...
+    def on_step_end(self, ctx: HookContext) -> None: ...
+    def on_chunk_start(self, ctx: HookContext) -> None: ...
+    def on_chunk_end(self, ctx: HookContext) -> None: ...
+    def on_merge(self, ctx: HookContext) -> None: ...
+
+
+def fire(hooks, method: str, ctx: HookContext) -> None:
+    for hook in hooks:
+        fn = getattr(hook, method, None)
+        if fn is not None:
+            fn(ctx)
+
+
+@contextmanager
+def hooked(hooks, kind: str, art, name: str, **attrs) -> Iterator[HookContext | None]:
+    """Fire on_<kind>_start / on_<kind>_end around the block; the end call sees the block's exception."""
+    if not hooks:
+        yield None
+        return
+    ctx = HookContext(kind=kind, art=art, name=name, attrs=attrs)
+    fire(hooks, f"on_{kind}_start", ctx)
+    try:
+        yield ctx
+    except BaseException as exc:
+        ctx.error = exc
+        raise
+    finally:
+        ctx.seconds = time.perf_counter() - ctx.started
+        fire(reversed(hooks), f"on_{kind}_end", ctx)
+
+
+def merged(hooks, art, name: str, seconds: float, **attrs) -> None:
+    """Report one finished merge to on_merge."""
+    if hooks:
+        ctx = HookContext(kind="merge", art=art, name=name, attrs=attrs)
+        ctx.started -= seconds
+        ctx.seconds = seconds
+        fire(hooks, "on_merge", ctx)
+
+
+def config_attrs(config) -> dict:
+    """executor/facility labels of a RunConfig, as passed to run and step hooks."""
+    ec = config.executor_config
+    if ec is None:
+        executor = "default"
+    elif ec.executor is not None:
+        executor = type(ec.executor).__name__
+    else:
+        executor = ec.executor_type + (" (parallel_chunks)" if ec.parallel_chunks else "")
+    facility = type(config.facility).__name__ if config.facility is not None else "local"
+    return {"executor": executor, "facility": facility}
+
+
+def _file_stem(ctx: HookContext) -> str:
+    label = re.sub(r"[^A-Za-z0-9_.-]+", "_", ctx.name)
+    return f"{ctx.art.type_name}-{label}-{ctx.art.identity()[:12]}"
+
+
+class _ScopedProfiler(Hook):
+    """Starts a profile at the outermost step (or each chunk) on a thread and writes it at the end."""
+
+    suffix = ""
+
+    def __init__(self, directory: str | Path = "profiles", scope: Literal["step", "chunk"] = "step"):
+        if scope not in ("step", "chunk"):
+            raise ValueError(f"Invalid scope={scope!r}. Use 'step' or 'chunk'.")
+        self.directory = Path(directory)
+        self.scope = scope
+        self.written: list[Path] = []
+        self._local = threading.local()
+
+    def _enter(self, ctx: HookContext) -> None:
+        if ctx.attrs.get("remote"):
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if depth == 0:
+            self._local.state = self._begin(ctx)
+
+    def _exit(self, ctx: HookContext) -> None:
+        if ctx.attrs.get("remote"):
+            return
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            state, self._local.state = self._local.state, None
+            if state is not None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{_file_stem(ctx)}{self.suffix}"
+                self._finish(state, path)
+                self.written.append(path)
+
+    def on_step_start(self, ctx):
+        if self.scope == "step":
+            self._enter(ctx)
+
+    def on_step_end(self, ctx):
+        if self.scope == "step":
+            self._exit(ctx)
+
+    def on_chunk_start(self, ctx):
+        if self.scope == "chunk":
+            self._enter(ctx)
+
+    def on_chunk_end(self, ctx):
+        if self.scope == "chunk":
+            self._exit(ctx)
+
+    def _begin(self, ctx: HookContext) -> Any:
+        """Start profiling; returns the state _finish needs, or None to skip this scope."""
+        raise NotImplementedError
+
+    def _finish(self, state: Any, path: Path) -> None:
+        raise NotImplementedError
+
+
+class CProfileHook(_ScopedProfiler):
+    """Deterministic profile of every step (or chunk), dumped as <directory>/<type>-<name>-<id>.pstats."""
+
+    suffix = ".pstats"
+
+    def _begin(self, ctx):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as exc:  # Python >= 3.12: another profiler is active in this process
+            _safe_print(f"CProfileHook: not profiling {ctx.name} ({exc}).")
+            return None
+        return profile
+
+    def _finish(self, profile, path):
+        profile.disable()
+        profile.dump_stats(path)
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="coffea-workflow-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: collections.Counter = collections.Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class SamplingHook(_ScopedProfiler):
+    """
+    Samples the profiled thread's stack every `interval` seconds and writes folded stacks
+    ("frame;frame;frame count" lines) to <directory>/<type>-<name>-<id>.folded. Low overhead,
+    and unlike cProfile it sees time spent waiting (I/O, Dask futures) as well.
+    """
+
+    suffix = ".folded"
+
+    def __init__(self, directory: str | Path = "profiles", scope: Literal["step", "chunk"] = "step",
+                 interval: float = 0.005):
+        super().__init__(directory, scope)
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+        self.interval = interval
+
+    def _begin(self, ctx):
+        sampler = _Sampler(threading.get_ident(), self.interval)
+        sampler.start()
+        return sampler
+
+    def _finish(self, sampler, path):
+        sampler.stop()
+        path.write_text("".join(f"{stack} {n}\n" for stack, n in sampler.stacks.most_common()))
+
+
+class TracemallocHook(_ScopedProfiler):
+    """
+    tracemalloc snapshot diff of every step (or chunk): the end snapshot goes to
+    <directory>/<type>-<name>-<id>.tracemalloc (tracemalloc.Snapshot.load), and the `top`
+    source lines that allocated most since the start to the same path + ".txt".
+    Tracing is started if needed and stopped again once nothing is profiled anymore.
+    """
+
+    suffix = ".tracemalloc"
+
+    def __init__(self, directory: str | Path = "profiles", scope: Literal["step", "chunk"] = "step",
+                 top: int = 25, frames: int = 1):
+        super().__init__(directory, scope)
+        self.top = top
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started_tracing = False
+
+    def _begin(self, ctx):
+        import tracemalloc
+        with self._lock:
+            if self._active == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracing = True
+            self._active += 1
+        return tracemalloc.take_snapshot()
+
+    def _finish(self, before, path):
+        import tracemalloc
+        after = tracemalloc.take_snapshot()
+        with self._lock:
+            self._active -= 1
+            if self._active == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        after.dump(str(path))
+        stats = after.compare_to(before, "lineno")[: self.top]
+        Path(f"{path}.txt").write_text("".join(f"{stat}\n" for stat in stats))
@@ -1,14 +1,38 @@
+"""
+Content hashes used as cache identities.
+
+Identity scheme versions:
+  1  sha256 over the canonical JSON of the artifact's to_dict(), with every
+     nested artifact expanded into its own full to_dict(). Cache entries
+     written before versioned identities existed use this scheme.
+  2  (current) the canonical JSON is prefixed with a version tag, and nested
+     artifacts contribute only {"type", "identity"} — their own, memoized
+     digest — instead of their expanded dict (Merkle-style). Hashing a
+     ChunkAnalysis no longer re-serializes its Chunking and Fileset.
+
+Executor.migrate_legacy() moves version-1 cache directories to their
+version-2 path on first lookup, so existing caches keep being used.
+"""
 from __future__ import annotations
 import hashlib
 import json
 from typing import Any
 
+IDENTITY_VERSION = 2
+_VERSION_TAG = f"coffea-workflow-identity-v{IDENTITY_VERSION}".encode("ascii")
 
-def canonicalize(obj: Any) -> bytes:
+
+def canonicalize(obj: Any, expand_artifacts: bool = False) -> bytes:
+    """
+    Canonical JSON bytes of obj. Nested artifacts are replaced by their identity
+    digest, or by their full to_dict() with expand_artifacts=True (scheme 1).
+    """
     def default(o):
         if hasattr(o, "to_dict"):
+            if not expand_artifacts and hasattr(o, "identity"):
+                return {"type": type(o).__name__, "identity": o.identity()}
             return o.to_dict()
-            
+
         try:
             from pathlib import Path
             if isinstance(o, Path):
@@ -25,13 +49,23 @@ def canonicalize(obj: Any) -> bytes:
         default=default,
     ).encode("utf-8")
 
-def hash_identity(*parts: Any) -> str:
-    """TODO change hashing approach"""
+def hash_identity(*parts: Any, expand_artifacts: bool = False) -> str:
+    """sha256 hex digest over the parts; bytes are hashed as-is, anything else canonicalized."""
     h = hashlib.sha256()
     for p in parts:
         if isinstance(p, (bytes, bytearray)):
             h.update(p)
         else:
-            h.update(canonicalize(p))
+            h.update(canonicalize(p, expand_artifacts=expand_artifacts))
         h.update(b"|")
     return h.hexdigest()
+
+
+def artifact_identity(artifact_dict: dict) -> str:
+    """Identity of an artifact's to_dict() under the current scheme."""
+    return hash_identity(_VERSION_TAG, artifact_dict)
+
+
+def legacy_artifact_identity(artifact_dict: dict) -> str:
+    """Identity of an artifact's to_dict() under scheme 1 (nested artifacts expanded)."""
+    return hash_identity(artifact_dict, expand_artifacts=True)
@@ -0,0 +1,84 @@
+"""
+strategy="incremental": chunking that stays put when the fileset grows.
+
+A ChunkAnalysis identity is the hash of its chunk's content (files, or
+WorkItems, plus the dataset's treename/metadata) and the processor — not
+the Chunking or the chunk's position. "by_dataset"/percentage, however,
+cut each dataset's file list at fixed fractions, so one more file moves
+every boundary after it and every chunk of the dataset gets a new hash.
+
+This strategy cuts each dataset's units (files sorted by path, WorkItems
+sorted by file and entry range) where the content says so: a chunk ends
+after every unit whose key hashes to 0 modulo target_files_per_chunk, as
+in content-defined chunking. Boundaries depend only on the units next to
+them, so adding files changes only the chunk they land in (plus new
+chunks at the end); every other chunk keeps its hash, and its cached
+result. Chunk sizes average target_files_per_chunk and are capped at
+MAX_CHUNK_FACTOR times it. Chunks never span datasets.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Sequence
+
+from .balancing import _select
+
+MAX_CHUNK_FACTOR = 4
+
+
+def _is_boundary(key: str, target: int) -> bool:
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % target == 0
+
+
+def content_defined_groups(keys: Sequence[str], target: int) -> list[list[int]]:
+    """Indices of keys, in order, cut after each boundary key or when a group reaches the cap."""
+    groups: list[list[int]] = []
+    current: list[int] = []
+    for i, key in enumerate(keys):
+        current.append(i)
+        if _is_boundary(key, target) or len(current) >= MAX_CHUNK_FACTOR * target:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def incremental_fileset(fileset: dict, target_files_per_chunk: int,
+                        datasets: list | tuple | Callable | None = None,
+                        treename: str = "Events") -> list[dict]:
+    """
+    Partial filesets of about target_files_per_chunk files, one dataset each. Chunks keep
+    the dataset's other fields and its files container type, like coffea's split_fileset.
+    """
+    chunks = []
+    for dataset in sorted(_select(fileset, datasets)):
+        data = fileset[dataset]
+        if isinstance(data, (list, tuple)):
+            data = {"files": list(data)}
+        files = data.get("files", {})
+        if isinstance(files, (list, tuple)) and "treename" not in data:
+            data = {**data, "treename": treename}  # self-contained chunks, as split_fileset(treename=...)
+        urls = sorted(files)
+        for group in content_defined_groups([f"{dataset}\0{url}" for url in urls], target_files_per_chunk):
+            picked = [urls[i] for i in group]
+            chunks.append({
+                dataset: {**data, "files": {u: files[u] for u in picked} if isinstance(files, dict) else picked},
+            })
+    return chunks
+
+
+def incremental_workitems(records: list[dict], target_files_per_chunk: int,
+                          datasets: list | tuple | Callable | None = None) -> list[list[dict]]:
+    """WorkItem records in chunks of about target_files_per_chunk WorkItems, one dataset each."""
+    keep = _select({r["dataset"] for r in records}, datasets)
+    by_dataset: dict[str, list[dict]] = {}
+    for r in sorted(records, key=lambda r: (r["dataset"], r["filename"], r["entrystart"])):
+        if r["dataset"] in keep:
+            by_dataset.setdefault(r["dataset"], []).append(r)
+    chunks = []
+    for dataset, items in by_dataset.items():
+        keys = [f"{dataset}\0{r['filename']}\0{r['entrystart']}" for r in items]
+        chunks.extend([items[i] for i in group] for group in content_defined_groups(keys, target_files_per_chunk))
+    return chunks
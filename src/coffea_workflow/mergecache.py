@@ -0,0 +1,52 @@
+"""
+RunConfig(merge_cache=True): start a merge from an earlier merged accumulator.
+
+Even when every chunk is cached, an Analysis that is produced again (after a
+failed chunk is retried, or because its fileset grew) used to read every
+chunk's payload.pkl and fold them all from scratch. Accumulators only ever
+add up, so an earlier merge of any subset of this run's chunks is a valid
+starting point: execute_analysis loads it and merges only the chunks that
+are not in it yet.
+
+Every Analysis output records which chunks its accumulator contains, by
+ChunkAnalysis identity (chunk content plus processor, see artifacts.py):
+
+    Analysis/<identity>/
+        payload.pkl              payload["merged_chunks"]: sorted identities
+        merged_chunks.json       the same list, so candidates are found
+                                 without unpickling their payloads
+
+find_merge_base picks, among all Analysis entries in the cache, the one
+whose chunks are the largest subset of this run's. The list in payload.pkl
+is checked against merged_chunks.json after loading, so an entry rewritten
+in between is not used. Results that merged bisected sub-chunks
+(bisect_failures) or streamed to a hist server record no list and are
+never used as a base.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+MERGE_RECORD = "merged_chunks.json"
+
+
+def write_merge_record(out: Path, chunk_ids: Iterable[str]) -> None:
+    (Path(out) / MERGE_RECORD).write_text(json.dumps({"chunks": sorted(chunk_ids)}))
+
+
+def find_merge_base(cache_dir: Path, chunk_ids: Iterable[str]) -> tuple[Path, set[str]] | None:
+    """(Analysis output dir, its merged chunk identities) covering most of chunk_ids, or None."""
+    wanted = set(chunk_ids)
+    best = None
+    for record in sorted((Path(cache_dir) / "Analysis").glob(f"*/{MERGE_RECORD}")):
+        try:
+            ids = set(json.loads(record.read_text())["chunks"])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        if not ids or not ids <= wanted or not (record.parent / "payload.pkl").exists():
+            continue
+        if best is None or len(ids) > len(best[1]):
+            best = (record.parent, ids)
+    return best
@@ -0,0 +1,218 @@
+"""
+On-disk format of payload.pkl files.
+
+Payloads (ChunkAnalysis, Analysis, Plotting, CustomArtifact) used to be raw
+cloudpickle.dumps() bytes. Histograms with many variation categories made
+those files hundreds of MB, and reading them back dominated cached reruns.
+Payloads are now written as a small framed container:
+
+    MAGIC (b"CWPAYLD") | format version (1 byte) | codec name (length-prefixed)
+    | number of frames (4 bytes)
+    | per frame: raw length (8 bytes), stored length (8 bytes), stored bytes
+
+Frame 0 is the pickle stream (pickle protocol 5); every further frame is one
+of its out-of-band buffers, i.e. the raw bin storage of each histogram/array,
+which is written without being copied into the pickle stream. Every frame is
+compressed independently with the chosen codec:
+
+    None / "none"   no compression (default)
+    "zlib"          standard library, always available
+    "lz4"           needs the lz4 package
+    "zstd"          needs the zstandard package
+
+Other codecs can be added with register_codec(). Files that don't start with
+MAGIC are legacy raw cloudpickle payloads and are still read transparently —
+including the chunk payloads that parallel_chunks workers return, since the
+workers don't have coffea_workflow installed.
+
+Analysis payloads written with RunConfig(hist_storage="mmap") keep their
+histogram bins next to payload.pkl in hists/*.npy; read_payload() hands those
+out lazily (see histstore.py).
+"""
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import cloudpickle
+
+MAGIC = b"CWPAYLD"
+FORMAT_VERSION = 1
+PICKLE_PROTOCOL = 5
+
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes, int], bytes]  # (stored bytes, raw length) -> raw bytes
+
+
+_CODECS: dict[str, Codec] = {}
+
+
+def register_codec(name: str, compress: Callable[[bytes], bytes],
+                   decompress: Callable[[bytes, int], bytes]) -> None:
+    """
+    Register a compression codec usable as RunConfig(payload_compression=name).
+    decompress receives the stored bytes and the original (raw) length.
+    """
+    _CODECS[name] = Codec(name, compress, decompress)
+
+
+def _zstd() -> Codec:
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "payload_compression='zstd' needs the zstandard package. Install it with:\n"
+            "  pip install zstandard"
+        ) from None
+    return Codec(
+        "zstd",
+        lambda raw: zstandard.ZstdCompressor(level=3).compress(raw),
+        lambda stored, n: zstandard.ZstdDecompressor().decompress(stored, max_output_size=n),
+    )
+
+
+def _lz4() -> Codec:
+    try:
+        import lz4.frame
+    except ImportError:
+        raise RuntimeError(
+            "payload_compression='lz4' needs the lz4 package. Install it with:\n"
+            "  pip install lz4"
+        ) from None
+    return Codec("lz4", lz4.frame.compress, lambda stored, n: lz4.frame.decompress(stored))
+
+
+register_codec("none", lambda raw: raw, lambda stored, n: stored)
+register_codec("zlib", lambda raw: zlib.compress(raw, 1), lambda stored, n: zlib.decompress(stored))
+# optional-dependency codecs resolve their package on first use
+_LAZY_CODECS: dict[str, Callable[[], Codec]] = {"zstd": _zstd, "lz4": _lz4}
+
+
+def get_codec(name: str | None) -> Codec:
+    name = name or "none"
+    if name not in _CODECS and name in _LAZY_CODECS:
+        _CODECS[name] = _LAZY_CODECS[name]()
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown payload codec {name!r}. Available: {sorted({*_CODECS, *_LAZY_CODECS})}"
+        ) from None
+
+
+def available_codecs() -> list[str]:
+    return sorted({*_CODECS, *_LAZY_CODECS})
+
+
+def _encode(obj: Any, compression: str | None) -> list:
+    codec = get_codec(compression)
+    buffers = []
+    main = cloudpickle.dumps(obj, protocol=PICKLE_PROTOCOL, buffer_callback=buffers.append)
+    frames = [main, *(b.raw() for b in buffers)]
+
+    name = codec.name.encode("ascii")
+    parts = [MAGIC, _U8.pack(FORMAT_VERSION), _U8.pack(len(name)), name, _U32.pack(len(frames))]
+    for frame in frames:
+        stored = codec.compress(frame)
+        parts += [_U64.pack(len(frame)), _U64.pack(len(stored)), stored]
+    return parts
+
+
+def dumps(obj: Any, compression: str | None = None) -> bytes:
+    """Serialize obj into the framed payload format."""
+    return b"".join(_encode(obj, compression))
+
+
+def loads(data: bytes | bytearray) -> Any:
+    """
+    Deserialize a framed payload, or a legacy raw cloudpickle payload. Uncompressed
+    buffers of a bytearray (see read_payload) are used in place, without a copy.
+    """
+    if not data.startswith(MAGIC):
+        return cloudpickle.loads(data)
+
+    view = memoryview(data)
+    pos = len(MAGIC)
+    (version,) = _U8.unpack_from(view, pos)
+    pos += _U8.size
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"payload format version {version} is newer than this coffea-workflow "
+            f"understands ({FORMAT_VERSION}); upgrade coffea-workflow to read it"
+        )
+    (name_len,) = _U8.unpack_from(view, pos)
+    pos += _U8.size
+    codec = get_codec(bytes(view[pos:pos + name_len]).decode("ascii"))
+    pos += name_len
+    (n_frames,) = _U32.unpack_from(view, pos)
+    pos += _U32.size
+
+    frames = []
+    for _ in range(n_frames):
+        (raw_len,) = _U64.unpack_from(view, pos)
+        (stored_len,) = _U64.unpack_from(view, pos + _U64.size)
+        pos += 2 * _U64.size
+        stored = view[pos:pos + stored_len]
+        pos += stored_len
+        if codec.name == "none":
+            frames.append(stored)  # zero-copy view into data
+        else:
+            frames.append(codec.decompress(bytes(stored), raw_len))
+    # out-of-band buffers back numpy arrays, which must be writable so that merging
+    # (accumulate adds in place) works on the loaded histograms
+    buffers = [
+        f if isinstance(f, memoryview) and not f.readonly else bytearray(f)
+        for f in frames[1:]
+    ]
+    return cloudpickle.loads(frames[0], buffers=buffers)
+
+
+def write_payload(path: Path, obj: Any, compression: str | None = None) -> int:
+    """
+    Write obj to path in the framed format; returns the number of bytes written. The
+    frames go to a temporary file next to path that is renamed over it at the end:
+    payload.pkl marks many artifacts complete, so an interrupted write must not leave
+    a truncated one behind.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.urandom(8).hex()}.tmp")
+    written = 0
+    try:
+        # frames are written one by one, so uncompressed buffers are never copied into one blob
+        with tmp.open("wb") as fh:
+            for part in _encode(obj, compression):
+                written += fh.write(part)
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return written
+
+
+def read_payload(path: Path) -> Any:
+    """
+    Read a payload file (framed or legacy) into one writable buffer and deserialize it.
+    Histograms stored in a sibling hists/ directory are memory-mapped and built on first access.
+    """
+    path = Path(path)
+    data = bytearray(path.stat().st_size)
+    with path.open("rb") as fh:
+        fh.readinto(data)
+    obj = loads(data)
+    from .histstore import HIST_DIR, attach_mapped_hists
+    hist_dir = path.parent / HIST_DIR
+    if hist_dir.is_dir():
+        obj = attach_mapped_hists(obj, hist_dir)
+    return obj
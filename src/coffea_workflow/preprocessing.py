@@ -0,0 +1,355 @@
+"""
+Event-level preprocessing for the Preprocessed artifact.
+
+build_workitems() opens every file of a fileset once, reads its entry count
+and UUID (plus optional custom per-file metadata) and cuts it into
+step_size-event coffea WorkItems, the same way coffea's Runner preprocesses.
+Files are opened in parallel on the Dask client when there is one.
+
+Per-file metadata is kept in a persistent cache under cache_dir:
+
+    .cache/file_metadata.sqlite
+        files(url, treename, custom_key, stamp, numentries, uuid, usermeta)
+
+keyed by URL, tree name and custom metadata builder. For local files the
+stamp is size+mtime, so a rewritten file is opened again; remote files
+(root://, https://, ...) are treated as immutable, as grid datasets are.
+A fileset that grows by a few files therefore only opens the new ones.
+
+WorkItems are stored as JSON records (see workitems_to_json):
+
+    {"dataset", "filename", "treename", "entrystart", "entrystop",
+     "fileuuid": <base64>, "usermeta"}
+
+which is also what the parallel_chunks worker functions rebuild WorkItems
+from, without importing coffea_workflow.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from coffea.processor.executor import FileMeta, WorkItem
+
+from .artifacts import _builder_key
+from .producers_utils import _safe_print
+
+METADATA_CACHE_FILE = "file_metadata.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    url        TEXT NOT NULL,
+    treename   TEXT NOT NULL,
+    custom_key TEXT NOT NULL,
+    stamp      TEXT NOT NULL,
+    numentries INTEGER NOT NULL,
+    uuid       TEXT NOT NULL,
+    usermeta   TEXT,
+    PRIMARY KEY (url, treename, custom_key)
+)
+"""
+
+
+# ---------------------------------------------------------------------------
+# WorkItem <-> JSON
+# ---------------------------------------------------------------------------
+
+def workitems_to_json(workitems: Iterable[WorkItem]) -> list[dict]:
+    return [
+        {
+            "dataset": wi.dataset,
+            "filename": wi.filename,
+            "treename": wi.treename,
+            "entrystart": wi.entrystart,
+            "entrystop": wi.entrystop,
+            "fileuuid": base64.b64encode(wi.fileuuid).decode("ascii"),
+            "usermeta": wi.usermeta,
+        }
+        for wi in workitems
+    ]
+
+
+def workitems_from_json(records: Iterable[dict]) -> list[WorkItem]:
+    return [
+        WorkItem(
+            dataset=r["dataset"], filename=r["filename"],
+            treename=r["treename"], entrystart=r["entrystart"],
+            entrystop=r["entrystop"],
+            fileuuid=base64.b64decode(r["fileuuid"]),
+            usermeta=r.get("usermeta"),
+        )
+        for r in records
+    ]
+
+
+def hash_workitems(records: list[dict]) -> str:
+    """Stable SHA-256 of a chunk of WorkItem records (the WorkItem counterpart of hash_fileset)."""
+    serialized = json.dumps(records, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(serialized).hexdigest()
+
+
+def split_workitems(records: list[dict], strategy: str | None = None,
+                    datasets: list | tuple | Callable | None = None,
+                    percentage: int | None = None) -> list[list[dict]]:
+    """
+    Split WorkItem records into chunks, mirroring coffea's split_fileset for files:
+    strategy="by_dataset" gives each dataset its own chunk(s), percentage=p puts p% of
+    every dataset's WorkItems in each chunk, datasets restricts to the named datasets.
+    """
+    if strategy is not None and strategy != "by_dataset":
+        raise ValueError(f"Unknown strategy '{strategy}'. Use 'by_dataset' or None.")
+    if percentage is not None and (
+        not isinstance(percentage, int) or not (1 <= percentage <= 100) or 100 % percentage != 0
+    ):
+        raise ValueError("'percentage' must be an int that divides 100 evenly (e.g. 10, 20, 25, 50).")
+
+    by_dataset: dict[str, list[dict]] = {}
+    for r in records:
+        by_dataset.setdefault(r["dataset"], []).append(r)
+    if callable(datasets):
+        by_dataset = {k: v for k, v in by_dataset.items() if datasets(k)}
+    elif datasets is not None:
+        by_dataset = {k: by_dataset[k] for k in datasets if k in by_dataset}
+
+    if strategy == "by_dataset":
+        groups = [{name: items} for name, items in by_dataset.items()]
+    else:
+        groups = [by_dataset]
+
+    if percentage is None:
+        return [[r for items in group.values() for r in items] for group in groups if group]
+
+    n_chunks = 100 // percentage
+    result = []
+    for group in groups:
+        for bin_idx in range(n_chunks):
+            chunk = []
+            for items in group.values():
+                size = max(1, math.ceil(len(items) / n_chunks))
+                chunk.extend(items[bin_idx * size:(bin_idx + 1) * size])
+            if chunk:
+                result.append(chunk)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Persistent per-file metadata cache
+# ---------------------------------------------------------------------------
+
+def _stamp(url: str) -> str:
+    """size:mtime of a local file; empty for remote URLs, which are assumed immutable."""
+    path = url[len("file://"):] if url.startswith("file://") else url
+    if "://" in path:
+        return ""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class FileMetadataCache:
+    """
+    SQLite store of per-file preprocessing results under cache_dir. Like the cache
+    index, it is only an accelerator: an unreadable file is recreated and any other
+    SQLite error turns the cache off for the rest of the call.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / METADATA_CACHE_FILE
+        self._conn: sqlite3.Connection | None = None
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError:
+            self.path.unlink(missing_ok=True)
+            try:
+                self._conn = self._connect()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute(_SCHEMA)
+            conn.commit()
+            conn.execute("SELECT count(*) FROM files").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _disable(self, exc: Exception) -> None:
+        _safe_print(f"File metadata cache disabled ({exc}); every file will be opened.")
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+
+    def lookup(self, keys: list[tuple[str, str, str, str]]) -> dict[tuple, dict]:
+        """Cached metadata for (url, treename, custom_key, stamp) keys whose stamp still matches."""
+        if self._conn is None or not keys:
+            return {}
+        found = {}
+        try:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT stamp, numentries, uuid, usermeta FROM files "
+                    "WHERE url = ? AND treename = ? AND custom_key = ?",
+                    key[:3],
+                ).fetchone()
+                if row is not None and row[0] == key[3]:
+                    found[key] = {
+                        "numentries": row[1],
+                        "uuid": row[2],
+                        "usermeta": json.loads(row[3]) if row[3] is not None else None,
+                    }
+        except sqlite3.Error as exc:
+            self._disable(exc)
+            return {}
+        return found
+
+    def store(self, entries: dict[tuple[str, str, str, str], dict]) -> None:
+        if self._conn is None or not entries:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (*key, meta["numentries"], meta["uuid"],
+                         json.dumps(meta["usermeta"]) if meta.get("usermeta") is not None else None)
+                        for key, meta in entries.items()
+                    ],
+                )
+        except sqlite3.Error as exc:
+            self._disable(exc)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ---------------------------------------------------------------------------
+# build_workitems
+# ---------------------------------------------------------------------------
+
+def _iter_files(fileset: dict, treename: str) -> list[tuple[str, str, str, dict]]:
+    """(dataset, url, treename, dataset metadata) for every file, sorted like split_fileset."""
+    files = []
+    for dataset, data in sorted(fileset.items()):
+        if isinstance(data, (list, tuple)):
+            data = {"files": list(data)}
+        entries = data.get("files", {})
+        ds_tree = data.get("treename", treename)
+        metadata = dict(data.get("metadata") or {})
+        if isinstance(entries, dict):
+            items = sorted((url, tree or ds_tree) for url, tree in entries.items())
+        else:
+            items = [(url, ds_tree) for url in sorted(entries)]
+        files.extend((dataset, url, tree, metadata) for url, tree in items)
+    return files
+
+
+def read_file_metadata(fileset: dict, treename: str = "Events",
+                       custom_func: Callable | None = None, client: Any = None,
+                       cache_dir: Path | None = None) -> list[tuple[str, str, str, dict, dict]]:
+    """
+    (dataset, url, treename, dataset metadata, file metadata) for every file of the
+    fileset, where file metadata is {"numentries", "uuid", "usermeta"}. Files already
+    in the metadata cache under cache_dir are not opened again; the others are opened
+    on the Dask client when one is given.
+    """
+    import cloudpickle
+
+    # Nested so cloudpickle serializes it by value — Dask workers don't have
+    # coffea_workflow installed (same reason as the chunk functions in default_producers).
+    def _open_file_remote(url, tree_name, custom_bytes):
+        import base64
+        import cloudpickle
+        import uproot
+
+        with uproot.open({url: None}) as root_dir:
+            tree = root_dir[tree_name]
+            meta = {
+                "numentries": tree.num_entries,
+                "uuid": base64.b64encode(root_dir.file.fUUID).decode("ascii"),
+                "usermeta": None,
+            }
+            if custom_bytes is not None:
+                meta["usermeta"] = cloudpickle.loads(custom_bytes)(tree)
+        return meta
+
+    files = _iter_files(fileset, treename)
+    custom_key = _builder_key(custom_func) if custom_func is not None else ""
+    keys = [(url, tree, custom_key, _stamp(url)) for _, url, tree, _ in files]
+
+    cache = FileMetadataCache(cache_dir) if cache_dir is not None else None
+    try:
+        known = cache.lookup(keys) if cache is not None else {}
+        missing = sorted({k for k in keys if k not in known})
+        if known:
+            _safe_print(f"File metadata cache: {len(set(known))} files known, {len(missing)} to open.")
+
+        custom_bytes = cloudpickle.dumps(custom_func) if custom_func is not None else None
+        fetched, errors = {}, {}
+        if client is not None and missing:
+            from dask.distributed import as_completed
+            futures = {client.submit(_open_file_remote, k[0], k[1], custom_bytes, pure=False): k
+                       for k in missing}
+            for f in as_completed(list(futures)):
+                key = futures.pop(f)
+                try:
+                    fetched[key] = f.result()
+                except Exception as exc:
+                    errors[key] = exc
+                f.release()
+        else:
+            for key in missing:
+                try:
+                    fetched[key] = _open_file_remote(key[0], key[1], custom_bytes)
+                except Exception as exc:
+                    errors[key] = exc
+
+        # keep what was opened successfully, so a rerun after a failure only retries the rest
+        if cache is not None:
+            cache.store(fetched)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if errors:
+        lines = "\n".join(f"  {k[0]} [{k[1]}]: {exc}" for k, exc in list(errors.items())[:10])
+        more = f"\n  ... and {len(errors) - 10} more" if len(errors) > 10 else ""
+        raise RuntimeError(f"Preprocessing failed to open {len(errors)} file(s):\n{lines}{more}")
+
+    metadata = {**known, **fetched}
+    return [(*f, metadata[key]) for f, key in zip(files, keys)]
+
+
+def build_workitems(fileset: dict, step_size: int, treename: str = "Events",
+                    custom_func: Callable | None = None, client: Any = None,
+                    cache_dir: Path | None = None) -> list[WorkItem]:
+    """
+    Open each file once, read numentries/uuid (and custom_func(tree) metadata, if
+    given) and cut every file into step_size-event WorkItems. Files already in the
+    metadata cache under cache_dir are not opened again.
+    """
+    workitems = []
+    for dataset, url, tree, ds_meta, meta in read_file_metadata(
+        fileset, treename, custom_func=custom_func, client=client, cache_dir=cache_dir,
+    ):
+        file_meta = FileMeta(dataset, url, tree, {
+            **ds_meta,
+            **(meta["usermeta"] or {}),
+            "numentries": meta["numentries"],
+            "uuid": base64.b64decode(meta["uuid"]),
+        })
+        workitems.extend(file_meta.chunks(step_size, False))
+    return workitems
@@ -86,10 +86,13 @@ def _load_artifact_output(art, path):
     if art.type_name == "Fileset":
         import json
         return json.loads((path / "fileset.json").read_text())
+    if art.type_name == "Preprocessed":
+        import json
+        return json.loads((path / "workitems.json").read_text())
     payload_path = path / "payload.pkl"
     if payload_path.exists():
-        import cloudpickle
-        return cloudpickle.loads(payload_path.read_bytes())
+        from .payload import read_payload
+        return read_payload(payload_path)
     return None
     
 def _extract_acc(result) -> Any:
@@ -120,3 +123,60 @@ def _load_object(path: str | Any) -> Any:
     except AttributeError as e:
         raise AttributeError(f"Object '{attr}' not found in module '{mod_name}'") from e
 
+
+
+class _DeferredCall:
+    """
+    Pickles as the call fn(*args): unpickling it runs fn and yields the result. The chunk
+    functions are nested (see execute_analysis), which the standard pickle used by
+    ProcessPoolExecutor can't handle, so LocalChunkClient cloudpickles a _DeferredCall and
+    submits pickle.loads on the bytes.
+    """
+
+    def __init__(self, fn, args):
+        self.fn, self.args = fn, args
+
+    def __reduce__(self):
+        return self.fn, self.args
+
+
+class LocalChunkClient:
+    """
+    Minimal stand-in for a dask.distributed.Client used by parallel_chunks on a single
+    node: submit() runs the chunk functions in a ProcessPoolExecutor, started with the
+    platform's default method like coffea's FuturesExecutor (so on macOS/Windows the
+    driver script needs the usual `if __name__ == "__main__":` guard).
+
+    memory_limit (bytes) caps each worker process's address space (RLIMIT_AS, POSIX
+    only); a chunk exceeding it fails with MemoryError and is recorded like any other
+    failed chunk. A worker killed outright breaks the pool, and the chunks still
+    pending are then recorded as failed too, to be retried on the next run.
+    """
+
+    def __init__(self, workers: int | None = None, memory_limit: int | None = None):
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+
+        initializer, initargs = None, ()
+        if memory_limit is not None:
+            try:
+                import resource
+            except ImportError:
+                _safe_print("chunk_memory_limit is not supported on this platform; ignoring it.")
+            else:
+                initializer, initargs = resource.setrlimit, (resource.RLIMIT_AS, (memory_limit, memory_limit))
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    def submit(self, fn, *args, pure=True):
+        # pure is accepted for Dask compatibility; every call runs
+        import pickle
+        import cloudpickle
+        return self._pool.submit(pickle.loads, cloudpickle.dumps(_DeferredCall(fn, args)))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
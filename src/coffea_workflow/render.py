@@ -1,14 +1,20 @@
 import dataclasses
 import json
+import time
 import typing
-import cloudpickle
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from .config import RunConfig
 from .workflow import Workflow, Step
-from .artifacts import ArtifactBase, Fileset, Analysis, Plotting, CustomArtifact
+from .artifacts import ArtifactBase, Fileset, Preprocessed, Analysis, Plotting, CustomArtifact
 from pathlib import Path
 from .executor import Executor
+from .cache_manager import CacheManager
 from .producers_utils import _safe_print
 from .histserv_utils import resolve_histserv_connection
+from .payload import read_payload
+from .code_version import FingerprintStore, code_fingerprint
+from .report import format_chunk_totals, format_step_line
+from .hooks import HookContext, config_attrs, fire
 
 
 def _topo_order(num_steps, edges):
@@ -74,37 +80,55 @@ def _build_artifact(step_type, name, step: Step, upstream):
                     f"{field_type.__name__}, but none was found in upstream steps."
                 )
             kwargs[field_name] = match
+    for field_name, value in (step.artifact_params or {}).items():
+        if field_name not in hints or field_name in kwargs:
+            raise TypeError(
+                f"Step '{name}': artifact_params key {field_name!r} is not a settable "
+                f"{step_type.__name__} field."
+            )
+        kwargs[field_name] = value
     return step_type(**kwargs)
 
 
 def _load_step_result(step_type, path: Path):
     if step_type is Fileset:
         return json.loads((path / "fileset.json").read_text())
+    if step_type is Preprocessed:
+        return json.loads((path / "workitems.json").read_text())
     if step_type is Analysis:
-        return cloudpickle.loads((path / "payload.pkl").read_bytes())
+        return read_payload(path / "payload.pkl")
     if step_type is Plotting:
         payload_path = path / "payload.pkl"
-        return cloudpickle.loads(payload_path.read_bytes()) if payload_path.exists() else None
+        return read_payload(payload_path) if payload_path.exists() else None
     if step_type is CustomArtifact:
         payload_path = path / "payload.pkl"
-        return cloudpickle.loads(payload_path.read_bytes()) if payload_path.exists() else None
+        return read_payload(payload_path) if payload_path.exists() else None
     return None
 
 
 
-def _print_summary(step_results: dict) -> None:
+def _print_summary(step_results: dict, report_steps: dict | None = None) -> None:
+    """report_steps: step name -> its run report entry (timings, cache, sizes)."""
+    report_steps = report_steps or {}
     _safe_print("\n=== Run Summary ===")
     for name, (step_type, result) in step_results.items():
+        step = report_steps.get(name)
+        timing = f"  {format_step_line(step)}" if step is not None else ""
         if step_type is Analysis and result is not None:
             ok = result["n_chunks_ok"]
             total = result["n_chunks_total"]
             failures = result["failures"]
             marker = "✓" if not failures else "!"
-            _safe_print(f"  {marker}  {name:<30} {step_type.__name__:<20} {ok}/{total} chunks OK")
+            _safe_print(f"  {marker}  {name:<30} {step_type.__name__:<20} {ok}/{total} chunks OK{timing}")
+            if step is not None and "chunks" in step:
+                _safe_print(f"       {format_chunk_totals(step)}")
             for f in failures:
-                _safe_print(f"       FAILED {f['chunk_file']}: {f['error']}")
+                tries = f.get("attempts", 1)
+                after = f" (after {tries} attempts)" if tries > 1 else ""
+                where = f"{f['chunk_file']} ({f['file']})" if f.get("file") else f["chunk_file"]
+                _safe_print(f"       FAILED {where}{after}: {f['error']}")
         else:
-            _safe_print(f"  ✓  {name:<30} {step_type.__name__}")
+            _safe_print(f"  ✓  {name:<30} {step_type.__name__:<20}{timing}")
     _safe_print()
 
 
@@ -127,6 +151,8 @@ def _print_dag(workflow: Workflow) -> None:
 def _print_run_config(config: RunConfig) -> None:
     _safe_print("Run config:")
     _safe_print(f"  Strategy:  {config.strategy or 'none'}")
+    if config.target_events_per_chunk is not None:
+        _safe_print(f"  Target:    {config.target_events_per_chunk} events/chunk")
 
     ec = config.executor_config
     if ec is not None and ec.executor is None:
@@ -172,10 +198,44 @@ def _resolve_step_config(workflow_config: RunConfig, step: Step) -> RunConfig:
         executor_config=effective_ec,
     )
 
+def _run_step(executor: Executor, step: Step, artifact, effective_config: RunConfig):
+    """
+    Materialize one step's artifact and load its result. Runs on a scheduler thread,
+    so everything that touches shared run state (histserv resolution, the workflow-level
+    config) stays in run() itself.
+    """
+    step_name = step.name
+    if step.builder is not None:
+        _safe_print(
+            f"Executing step '{step_name}' of type '{step.step_type.__name__}' with the user code {step.builder} and user parameters {step.builder_params}"
+        )
+    else:
+        _safe_print(
+            f"Executing step '{step_name}' of type '{step.step_type.__name__}' with processor {step.processor} "
+            f"processor_params={step.processor_params} runner_params={step.runner_params}"
+        )
+    start = time.perf_counter()
+    path = executor.materialize(artifact, config=effective_config)
+    materialize_seconds = time.perf_counter() - start
+    _safe_print(f"  -> materialized at {path}")
+    _safe_print()
+    start = time.perf_counter()
+    result = _load_step_result(step.step_type, path)
+    executor.report.add_step(step_name, artifact, path, materialize_seconds, time.perf_counter() - start)
+    return path, result
+
+
 def run(workflow: Workflow, config: RunConfig):
     """
-    Executes the workflow DAG in topological order, materialising each artifact
-    and returning cached results where available.
+    Executes the workflow DAG, materialising each artifact and returning cached
+    results where available.
+
+    Steps are scheduled from a ready queue: every step whose parents are done is
+    started as soon as one of config.max_concurrent_steps slots is free. With the
+    default of 1 this is exactly the topological order of _topo_order.
+
+    The returned dict also holds "report": per-step and per-chunk timings, cache
+    hits and sizes, as written to <cache_dir>/run_report.json (see report.py).
     """
     if config.facility is not None:
         config.facility.preflight()
@@ -188,61 +248,93 @@ def run(workflow: Workflow, config: RunConfig):
     _safe_print()
     num_steps = len(workflow.steps)
     if num_steps == 0:
-        return {"paths": {}, "artifacts": {}, "order": []}
+        return {"paths": {}, "artifacts": {}, "order": [], "report": executor.report.write(cache_dir, order=[])}
 
     order = _topo_order(num_steps, workflow.edges)
+    position = {idx: pos for pos, idx in enumerate(order)}
 
     parents: dict[int, list[int]] = {i: [] for i in range(num_steps)}
+    children: dict[int, list[int]] = {i: [] for i in range(num_steps)}
     for src, dst in workflow.edges:
         parents[dst].append(src)
+        children[src].append(dst)
 
     artifact_by_idx = {}
-    paths_by_name = {}
-    step_results = {}  # name -> (step_type, loaded result)
+    path_by_idx = {}
+    result_by_idx = {}  # idx -> loaded result
 
-    try:
-        for idx in order:
-            step = workflow.steps[idx]
-            step_name = step.name
-
-            upstream = [artifact_by_idx[src] for src in parents[idx]]
-            artifact = _build_artifact(step.step_type, step_name, step, upstream)
-
-            effective_config = _resolve_step_config(config, step)
-
-            if step.step_type is Analysis and effective_config.hist_client is not None:
-                connection_info = resolve_histserv_connection(
-                    hist_client=effective_config.hist_client,
-                    hist_template=effective_config.hist_template,
-                    histserv_token=effective_config.histserv_token,
-                    provided_connection_info=effective_config.histserv_connection_info,
-                    out_dir=executor.path_for(artifact),
-                )
-                effective_config = dataclasses.replace(effective_config, histserv_connection_info=connection_info)
-                # Propagate to the workflow-level config (not just this step's effective_config)
-                # so downstream steps (e.g. Plotting) resolve against the same connection —
-                # a per-step facility/executor_config override, if any, must NOT leak forward.
-                config = dataclasses.replace(config, histserv_connection_info=connection_info)
-
-            if step.builder is not None:
-                _safe_print(
-                    f"Executing step '{step_name}' of type '{step.step_type.__name__}' with the user code {step.builder} and user parameters {step.builder_params}"
-                )
-            else:
-                _safe_print(
-                    f"Executing step '{step_name}' of type '{step.step_type.__name__}' with processor {step.processor} "
-                    f"processor_params={step.processor_params} runner_params={step.runner_params}"
-                )
-            path = executor.materialize(artifact, config=effective_config)
-            _safe_print(f"  -> materialized at {path}")
-            _safe_print()
-
-            artifact_by_idx[idx] = artifact
-            paths_by_name[step_name] = path
-            step_results[step_name] = (step.step_type, _load_step_result(step.step_type, path))
+    pending_parents = {i: len(parents[i]) for i in range(num_steps)}
+    ready = [i for i in order if pending_parents[i] == 0]
+    running: dict[Future, int] = {}
 
-        _print_summary(step_results)
+    fingerprints = FingerprintStore(cache_dir) if config.code_fingerprint else None
+    hooks = config.hooks
+    run_ctx = HookContext(kind="run", art=None, name="run", attrs={**config_attrs(config), "steps": num_steps})
+    fire(hooks, "on_run_start", run_ctx)
+    try:
+        with ThreadPoolExecutor(max_workers=config.max_concurrent_steps) as pool:
+            while ready or running:
+                while ready and len(running) < config.max_concurrent_steps:
+                    idx = ready.pop(0)
+                    step = workflow.steps[idx]
+
+                    upstream = [artifact_by_idx[src] for src in parents[idx]]
+                    artifact = _build_artifact(step.step_type, step.name, step, upstream)
+
+                    effective_config = _resolve_step_config(config, step)
+                    if step.step_type is Analysis and config.code_fingerprint:
+                        artifact = dataclasses.replace(artifact, code_version=code_fingerprint(
+                            (step.builder, step.processor), config.code_fingerprint_modules, fingerprints,
+                        ))
+
+                    if step.step_type is Analysis and effective_config.hist_client is not None:
+                        # the saved connection lives in the artifact dir, which may still be at its old path
+                        executor.migrate_legacy(artifact)
+                        connection_info = resolve_histserv_connection(
+                            hist_client=effective_config.hist_client,
+                            hist_template=effective_config.hist_template,
+                            histserv_token=effective_config.histserv_token,
+                            provided_connection_info=effective_config.histserv_connection_info,
+                            out_dir=executor.path_for(artifact),
+                        )
+                        effective_config = dataclasses.replace(effective_config, histserv_connection_info=connection_info)
+                        # Propagate to the workflow-level config (not just this step's effective_config)
+                        # so downstream steps (e.g. Plotting) resolve against the same connection —
+                        # a per-step facility/executor_config override, if any, must NOT leak forward.
+                        config = dataclasses.replace(config, histserv_connection_info=connection_info)
+
+                    artifact_by_idx[idx] = artifact
+                    running[pool.submit(_run_step, executor, step, artifact, effective_config)] = idx
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = running.pop(future)
+                    path_by_idx[idx], result_by_idx[idx] = future.result()
+                    for nxt in children[idx]:
+                        pending_parents[nxt] -= 1
+                        if pending_parents[nxt] == 0:
+                            ready.append(nxt)
+                ready.sort(key=position.__getitem__)
+
+        paths_by_name = {workflow.steps[i].name: path_by_idx[i] for i in order}
+        step_results = {  # name -> (step_type, loaded result)
+            workflow.steps[i].name: (workflow.steps[i].step_type, result_by_idx[i]) for i in order
+        }
+        report = executor.report.write(cache_dir, order=list(paths_by_name))
+        _print_summary(step_results, {s["name"]: s for s in report["steps"]})
+
+        if config.max_cache_bytes is not None:
+            # everything this run used is in the session cache and therefore pinned
+            CacheManager(executor).evict(config.max_cache_bytes)
+    except BaseException as exc:
+        run_ctx.error = exc
+        raise
     finally:
+        run_ctx.seconds = time.perf_counter() - run_ctx.started
+        fire(reversed(hooks), "on_run_end", run_ctx)
+        executor.close()
+        if fingerprints is not None:
+            fingerprints.close()
         if config.facility is not None:
             config.facility.close()
 
@@ -250,4 +342,5 @@ def run(workflow: Workflow, config: RunConfig):
         "paths": paths_by_name,
         "results": {name: result for name, (_, result) in step_results.items()},
         "order": [workflow.steps[i].name for i in order],
+        "report": report,
     }
@@ -0,0 +1,196 @@
+"""
+Structured run report.
+
+Every run() collects, per step and per Analysis chunk, where the time and
+bytes went, writes it to
+
+    <cache_dir>/run_report.json
+
+(a file, so cache scans that treat subdirectories as artifact types ignore
+it; each run overwrites the previous report) and returns it as
+run(...)["report"]. Layout:
+
+    {
+      "version": 1, "started_at", "finished_at", "wall_seconds",
+      "peak_rss_bytes",                         # driver process, whole run
+      "cache_lookups": {"count", "seconds"},    # time spent in Executor.exists
+      "steps": [{
+          "name", "type", "identity", "path",
+          "cache": "hit" | "miss",
+          "seconds",                            # materialize + load result
+          "materialize_seconds", "load_seconds",
+          "bytes_written",                      # size of the output dir on a miss
+          "payload_bytes",                      # payload.pkl, if any
+          "peak_rss_bytes",                     # driver, when the step finished
+          # Analysis steps only:
+          "merge_seconds", "bytes_read", "chunks": [{
+              "file", "identity", "status": "ok" | "failed",
+              "cache": "hit" | "miss" | "merged",  # merged: in the merge it started from (merge_cache)
+              "seconds",          # compute time (worker-side in parallel mode)
+              "queue_wait_seconds",  # parallel mode: submit -> worker start, else null
+              "merge_seconds", "payload_bytes",
+              "bytes_read",       # coffea metrics "bytesread" (savemetrics=True), else null
+              "attempts",         # runs of the chunk this run (ExecutorConfig.retry)
+              "speculated",       # a straggler duplicate was submitted (speculate_stragglers)
+          }, ...],
+      }, ...]
+    }
+
+Queue wait compares the driver's and the worker's wall clocks, so it is only
+as accurate as their synchronization; it is clamped at zero.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+REPORT_FILE = "run_report.json"
+REPORT_VERSION = 1
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process, or None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB on Linux
+
+
+def file_size(path: Path) -> int | None:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return None
+
+
+class RunReport:
+    """
+    Collects timing and size records during one run. Executor.materialize records
+    every artifact it resolves, execute_analysis records its chunks, and run()
+    assembles one entry per step. Steps may run on several threads, so every
+    update holds a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._artifacts: dict[tuple[str, str], dict] = {}
+        self._analyses: dict[str, dict] = {}
+        self._lookups = {"count": 0, "seconds": 0.0}
+        self._steps: list[dict] = []
+
+    def record_lookup(self, seconds: float) -> None:
+        with self._lock:
+            self._lookups["count"] += 1
+            self._lookups["seconds"] += seconds
+
+    def record_artifact(self, art, cache: str, seconds: float, bytes_written: int | None = None) -> None:
+        with self._lock:
+            self._artifacts[(art.type_name, art.identity())] = {
+                "cache": cache, "seconds": seconds, "bytes_written": bytes_written,
+            }
+
+    def artifact(self, art) -> dict | None:
+        with self._lock:
+            return self._artifacts.get((art.type_name, art.identity()))
+
+    def record_analysis(self, art, chunks: list[dict], merge_seconds: float) -> None:
+        """Chunk records and total merge time of one execute_analysis call."""
+        with self._lock:
+            self._analyses[art.identity()] = {"chunks": chunks, "merge_seconds": merge_seconds}
+
+    def add_step(self, name: str, art, path: Path, materialize_seconds: float, load_seconds: float) -> dict:
+        record = self.artifact(art) or {"cache": "hit", "bytes_written": None}
+        step = {
+            "name": name,
+            "type": art.type_name,
+            "identity": art.identity(),
+            "path": str(path),
+            "cache": record["cache"],
+            "seconds": materialize_seconds + load_seconds,
+            "materialize_seconds": materialize_seconds,
+            "load_seconds": load_seconds,
+            "bytes_written": record["bytes_written"],
+            "payload_bytes": file_size(path / "payload.pkl"),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        with self._lock:
+            analysis = self._analyses.get(art.identity())
+            if analysis is not None:
+                read = [c["bytes_read"] for c in analysis["chunks"] if c.get("bytes_read") is not None]
+                step["merge_seconds"] = analysis["merge_seconds"]
+                step["bytes_read"] = sum(read) if read else None
+                step["chunks"] = analysis["chunks"]
+            self._steps.append(step)
+        return step
+
+    def to_dict(self, order: list[str] | None = None) -> dict[str, Any]:
+        """The report; steps follow order (step names) when given, else completion order."""
+        finished = time.time()
+        with self._lock:
+            steps = list(self._steps)
+            lookups = dict(self._lookups)
+        if order is not None:
+            rank = {name: i for i, name in enumerate(order)}
+            steps.sort(key=lambda s: rank.get(s["name"], len(rank)))
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at,
+            "finished_at": finished,
+            "wall_seconds": finished - self.started_at,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "cache_lookups": lookups,
+            "steps": steps,
+        }
+
+    def write(self, cache_dir: Path, order: list[str] | None = None) -> dict[str, Any]:
+        """Write REPORT_FILE under cache_dir (atomically) and return the report."""
+        report = self.to_dict(order)
+        path = Path(cache_dir) / REPORT_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(report, indent=2, default=str))
+        tmp.replace(path)
+        return report
+
+
+def _fmt_bytes(n: int | None) -> str:
+    if n is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_step_line(step: dict) -> str:
+    """Timing/size columns of one step for the run summary."""
+    return (f"{step['cache']:<4} {step['seconds']:8.2f}s  "
+            f"written {_fmt_bytes(step['bytes_written']):>10}  payload {_fmt_bytes(step['payload_bytes']):>10}")
+
+
+def format_chunk_totals(step: dict) -> str:
+    """One-line aggregate of an Analysis step's chunk records."""
+    chunks = step.get("chunks", [])
+    hits = sum(c["cache"] == "hit" for c in chunks)
+    in_base = sum(c["cache"] == "merged" for c in chunks)
+    compute = sum(c["seconds"] or 0.0 for c in chunks if c["cache"] == "miss")
+    waits = [c["queue_wait_seconds"] for c in chunks if c.get("queue_wait_seconds") is not None]
+    retried = sum(c.get("attempts", 1) > 1 for c in chunks)
+    parts = [
+        f"{len(chunks)} chunks ({hits} cached" + (f", {in_base} already merged)" if in_base else ")"),
+        f"compute {compute:.2f}s",
+        f"merge {step['merge_seconds']:.2f}s",
+        f"read {_fmt_bytes(step['bytes_read'])}",
+    ]
+    if waits:
+        parts.append(f"queue wait max {max(waits):.2f}s")
+    if retried:
+        parts.append(f"{retried} retried")
+    return ", ".join(parts)
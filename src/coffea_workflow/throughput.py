@@ -0,0 +1,182 @@
+"""
+Per-chunk throughput history, used to size chunks by expected runtime.
+
+Every successfully processed chunk whose coffea metrics contain "entries"
+and "processtime" (Runner(savemetrics=True) — add it to runner_params, or
+to your own Runner in builder mode) is recorded in one SQLite file under
+cache_dir:
+
+    .cache/throughput.sqlite
+        samples(processor, dataset, events, seconds, recorded_at)
+
+keyed by the step's processor/builder ('module:qualname') and dataset.
+processtime is summed over coffea's work items, so rates are per worker:
+they match how long a chunk takes in parallel_chunks mode, where each chunk
+runs on a single worker. A chunk holding several datasets contributes its
+combined rate to each of them; WorkItem chunks are split exactly by entries.
+
+rates() averages the last MAX_SAMPLES samples (total events / total
+seconds). With RunConfig(strategy="balanced", target_seconds_per_chunk=T)
+execute_analysis turns these rates into Chunking.cost_model and the
+balanced chunker packs files/WorkItems into chunks of about T seconds (see
+balancing.py). Rates are quantized to quarter-octave steps first, so small
+run-to-run fluctuations don't change the chunking — and with it the
+identity of every cached chunk.
+
+Like the other SQLite files under cache_dir, this is only an accelerator: an
+unreadable file is recreated and any other SQLite error disables recording.
+"""
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+from .producers_utils import _safe_print
+
+THROUGHPUT_FILE = "throughput.sqlite"
+MAX_SAMPLES = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    processor   TEXT NOT NULL,
+    dataset     TEXT NOT NULL,
+    events      REAL NOT NULL,
+    seconds     REAL NOT NULL,
+    recorded_at REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS samples_key ON samples (processor, dataset, recorded_at)"
+
+
+class ThroughputHistory:
+    """
+    SQLite store of per-chunk (events, seconds) samples under cache_dir. The
+    connection is opened on first use, so a run without metrics never creates it.
+    One instance is shared by the steps of a run (Executor.throughput_history),
+    which render.run may materialize from several threads, so access is locked.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / THROUGHPUT_FILE
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = self._connect()
+            except sqlite3.DatabaseError:
+                self.path.unlink(missing_ok=True)
+                try:
+                    self._conn = self._connect()
+                except sqlite3.Error as exc:
+                    self._disable(exc)
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            conn.commit()
+            conn.execute("SELECT count(*) FROM samples").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _disable(self, exc: Exception) -> None:
+        _safe_print(f"Throughput history disabled ({exc}).")
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._disabled = True
+
+    def record(self, processor: str, samples: dict[str, tuple[float, float]]) -> None:
+        """Add one (events, seconds) sample per dataset and drop all but the newest MAX_SAMPLES."""
+        with self._lock:
+            if not samples or self._connection() is None:
+                return
+            now = time.time()
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT INTO samples VALUES (?, ?, ?, ?, ?)",
+                        [(processor, ds, events, seconds, now) for ds, (events, seconds) in samples.items()],
+                    )
+                    for ds in samples:
+                        self._conn.execute(
+                            "DELETE FROM samples WHERE processor = ? AND dataset = ? AND rowid NOT IN ("
+                            "  SELECT rowid FROM samples WHERE processor = ? AND dataset = ?"
+                            "  ORDER BY recorded_at DESC, rowid DESC LIMIT ?)",
+                            (processor, ds, processor, ds, MAX_SAMPLES),
+                        )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def rates(self, processor: str, datasets: Iterable[str] | None = None) -> dict[str, float]:
+        """Events per second for each dataset with history (restricted to datasets, if given)."""
+        with self._lock:
+            if not self.path.exists() or self._connection() is None:
+                return {}
+            try:
+                rows = self._conn.execute(
+                    "SELECT dataset, sum(events), sum(seconds) FROM samples "
+                    "WHERE processor = ? GROUP BY dataset",
+                    (processor,),
+                ).fetchall()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return {}
+            wanted = set(datasets) if datasets is not None else None
+            return {
+                ds: events / seconds
+                for ds, events, seconds in rows
+                if seconds > 0 and events > 0 and (wanted is None or ds in wanted)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def quantize_rate(rate: float) -> float:
+    """Round a rate to the nearest quarter-octave (2**(k/4)), so Chunking identities are stable."""
+    return 2.0 ** (round(math.log2(rate) * 4) / 4)
+
+
+def chunk_samples(chunk: dict | list, entries: float, seconds: float) -> dict[str, tuple[float, float]]:
+    """
+    Split one chunk's (entries, processtime) across its datasets: exactly by entries for
+    WorkItem records, evenly (same rate for each) for a fileset chunk.
+    """
+    if isinstance(chunk, list):
+        per_dataset: dict[str, float] = {}
+        for r in chunk:
+            per_dataset[r["dataset"]] = per_dataset.get(r["dataset"], 0) + r["entrystop"] - r["entrystart"]
+        total = sum(per_dataset.values())
+        if total <= 0:
+            return {}
+        return {ds: (entries * n / total, seconds * n / total) for ds, n in per_dataset.items()}
+    if not chunk:
+        return {}
+    share = 1.0 / len(chunk)
+    return {ds: (entries * share, seconds * share) for ds in chunk}
+
+
+def chunk_throughput(metrics: Any) -> tuple[float, float] | None:
+    """(entries, processtime) from a chunk's coffea metrics, or None without savemetrics."""
+    if not isinstance(metrics, dict):
+        return None
+    entries, seconds = metrics.get("entries"), metrics.get("processtime")
+    if not entries or not seconds or seconds <= 0:
+        return None
+    return float(entries), float(seconds)
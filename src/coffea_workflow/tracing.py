@@ -0,0 +1,246 @@
+"""
+Trace spans of a run, written to a file for offline viewing.
+
+TracingHook is a hook (see hooks.py) that turns the run, every produced
+artifact, the user's code on each chunk, each parallel_chunks task and each
+merge into a span, and writes them all when the run ends:
+
+    RunConfig(hooks=[TracingHook("trace.json")])                  # Chrome trace: Perfetto, chrome://tracing
+    RunConfig(hooks=[TracingHook("trace.otlp.json", format="otlp")])  # OTLP/JSON: Jaeger, otel-collector
+
+Spans nest as
+
+    run
+      step <Type> <name>                 one per produced artifact (Analysis, Chunking, ChunkAnalysis, ...)
+        chunk <chunk_file>               the user's builder/processor (sequential mode)
+        task <chunk_file>                parallel_chunks: submit -> result on the driver
+          worker <chunk_file>            the chunk's run on the worker
+        merge <chunk_file>
+
+with attributes such as artifact.type, artifact.identity, chunk_file,
+executor and facility. Worker spans are created on the worker from the
+trace id and parent span id the driver ships with the task, and come back
+with the result, so they land in the same trace. Worker spans use the
+worker's wall clock. With tree_reduce=True only the driver-side task spans
+are recorded.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Literal
+
+from .hooks import Hook, HookContext
+
+TRACE_FORMATS = ("chrome", "otlp")
+
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Tracer:
+    """Thread-safe collection of finished spans of one trace."""
+
+    def __init__(self, trace_id: str | None = None):
+        self.trace_id = trace_id or new_trace_id()
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, parent_span_id: str | None = None, **attributes) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": new_span_id(),
+            "parent_span_id": parent_span_id,
+            "name": name,
+            "start_ns": time.time_ns(),
+            "end_ns": None,
+            "attributes": {k: v for k, v in attributes.items() if v is not None},
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+
+    def end(self, span: dict, end_ns: int | None = None) -> dict:
+        span["end_ns"] = end_ns if end_ns is not None else time.time_ns()
+        self.add(span)
+        return span
+
+    def add(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome(self) -> dict:
+        """Chrome trace event format; one track per process (driver, each worker) and thread."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ns"])
+        events, processes = [], {}
+        for span in spans:
+            host = span["attributes"].get("host.name")
+            pid = span["attributes"].get("process.pid", span["pid"])
+            processes.setdefault((host, pid), len(processes) + 1)
+            events.append({
+                "name": span["name"],
+                "cat": span["attributes"].get("artifact.type", "workflow"),
+                "ph": "X",
+                "ts": span["start_ns"] / 1e3,
+                "dur": (span["end_ns"] - span["start_ns"]) / 1e3,
+                "pid": processes[(host, pid)],
+                "tid": span["tid"],
+                "args": {**span["attributes"], "trace_id": span["trace_id"], "span_id": span["span_id"],
+                         "parent_span_id": span["parent_span_id"]},
+            })
+        for (host, pid), track in processes.items():
+            label = f"{host}:{pid}" if host else f"driver:{pid}"
+            events.append({"name": "process_name", "ph": "M", "pid": track, "args": {"name": label}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp(self) -> dict:
+        """OTLP/JSON ExportTraceServiceRequest."""
+        with self._lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": "coffea-workflow"})},
+            "scopeSpans": [{
+                "scope": {"name": "coffea_workflow"},
+                "spans": [{
+                    "traceId": s["trace_id"],
+                    "spanId": s["span_id"],
+                    **({"parentSpanId": s["parent_span_id"]} if s["parent_span_id"] else {}),
+                    "name": s["name"],
+                    "kind": 1,  # SPAN_KIND_INTERNAL
+                    "startTimeUnixNano": str(s["start_ns"]),
+                    "endTimeUnixNano": str(s["end_ns"]),
+                    "attributes": _otlp_attributes(s["attributes"]),
+                } for s in spans],
+            }],
+        }]}
+
+    def write(self, path: Path, format: Literal["chrome", "otlp"] = "chrome") -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.to_chrome() if format == "chrome" else self.to_otlp()
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, default=str))
+        tmp.replace(path)
+        return path
+
+
+def _otlp_value(v: Any) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def _span_attributes(ctx: HookContext) -> dict:
+    attrs = {k: v for k, v in ctx.attrs.items() if isinstance(v, (str, int, float, bool))}
+    if ctx.art is not None:
+        attrs["artifact.type"] = ctx.art.type_name
+        attrs["artifact.identity"] = ctx.art.identity()
+        chunk_file = getattr(ctx.art, "chunk_file", None)
+        if chunk_file is not None:
+            attrs["chunk_file"] = chunk_file
+    return attrs
+
+
+class TracingHook(Hook):
+    """
+    Records the spans described in the module docstring and writes them to `path` when
+    the run ends. Each run() is one trace; `tracer` holds the spans of the last one.
+    """
+
+    def __init__(self, path: str | Path = "trace.json", format: Literal["chrome", "otlp"] = "chrome"):
+        if format not in TRACE_FORMATS:
+            raise ValueError(f"Invalid format={format!r}. Use 'chrome' or 'otlp'.")
+        self.path = Path(path)
+        self.format = format
+        self.tracer = Tracer()
+        self._root: dict | None = None
+        self._open: dict[int, dict] = {}  # id(ctx) -> span
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list[dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _parent_id(self) -> str | None:
+        stack = self._stack()
+        if stack:
+            return stack[-1]["span_id"]
+        return self._root["span_id"] if self._root is not None else None
+
+    def _start(self, ctx: HookContext, name: str, push: bool = True) -> dict:
+        span = self.tracer.start(name, self._parent_id(), **_span_attributes(ctx))
+        with self._lock:
+            self._open[id(ctx)] = span
+        if push:
+            self._stack().append(span)
+        return span
+
+    def _end(self, ctx: HookContext, pop: bool = True) -> dict | None:
+        with self._lock:
+            span = self._open.pop(id(ctx), None)
+        if span is None:
+            return None
+        if pop and self._stack() and self._stack()[-1] is span:
+            self._stack().pop()
+        span["attributes"].update(_span_attributes(ctx))
+        if ctx.error is not None:
+            span["attributes"]["error"] = repr(ctx.error)
+        return self.tracer.end(span)
+
+    def on_run_start(self, ctx):
+        self.tracer = Tracer()
+        self._open.clear()
+        self._root = self.tracer.start("run", **_span_attributes(ctx))
+
+    def on_run_end(self, ctx):
+        root, self._root = self._root, None
+        if root is None:
+            return
+        if ctx.error is not None:
+            root["attributes"]["error"] = repr(ctx.error)
+        self.tracer.end(root)
+        self.tracer.write(self.path, self.format)
+
+    def on_step_start(self, ctx):
+        self._start(ctx, f"step {ctx.art.type_name} {ctx.name}")
+
+    def on_step_end(self, ctx):
+        self._end(ctx)
+
+    def on_chunk_start(self, ctx):
+        if not ctx.attrs.get("remote"):
+            self._start(ctx, f"chunk {ctx.name}")
+            return
+        # parallel_chunks: a driver-side task span, and the context the worker parents its span to
+        span = self._start(ctx, f"task {ctx.name}", push=False)
+        ctx.attrs["trace_context"] = {"trace_id": span["trace_id"], "span_id": span["span_id"]}
+
+    def on_chunk_end(self, ctx):
+        remote = ctx.attrs.get("remote", False)
+        self._end(ctx, pop=not remote)
+        for span in ctx.attrs.get("worker_spans") or ():
+            self.tracer.add(span)
+
+    def on_merge(self, ctx):
+        end_ns = time.time_ns()
+        span = self.tracer.start(f"merge {ctx.name}", self._parent_id(), **_span_attributes(ctx))
+        span["start_ns"] = end_ns - int(ctx.seconds * 1e9)
+        self.tracer.end(span, end_ns)
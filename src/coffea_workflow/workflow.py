@@ -1,11 +1,3 @@
-# TODO: add automatic code version tracking for reproducibility.
-# from:
-# - git commit hash ?
-# - package version ?
-# - container/image tag ?
-# - hash of builder source ?
-# This should be perhaps Artifacts identity part
-    
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Callable, List, Sequence, Tuple, Type
@@ -33,6 +25,9 @@ class Step:
             Processor, runner_params pass through to Runner()). See Analysis's
             docstring in artifacts.py for details.
     Other step_types (Fileset, Plotting, CustomArtifact) only use builder/builder_params.
+
+    artifact_params are extra constructor arguments for artifacts whose settings don't
+    map onto builder/processor, e.g. Preprocessed's step_size and treename.
     """
     name: str
     step_type: Type
@@ -45,6 +40,7 @@ class Step:
     executor_config: "ExecutorConfig | None" = None
     input:  str | None = None
     output: str | None = None
+    artifact_params: dict | None = None
 
     def _resolved_input(self) -> str:
         return self.input if self.input is not None else getattr(self.step_type, "input_type", "any")
@@ -66,6 +62,7 @@ class Step:
             "executor_config": self.executor_config.executor_type if self.executor_config else None,
             "input":  self._resolved_input(),
             "output": self._resolved_output(),
+            "artifact_params": dict(self.artifact_params) if self.artifact_params else None,
         }
 
 @dataclass
@@ -6,6 +6,9 @@ Covers:
   - All five artifact types: keys(), type_name, identity(), to_dict(), always_rerun
   - Identity determinism: same inputs -> same hash; different inputs -> different hash
   - ARTIFACT_REGISTRY contains all registered types
+  - identity() is memoized and nested artifacts contribute their digest (Merkle)
+  - legacy_identity() reproduces the pre-versioning scheme
+  - work_identity() ignores label_keys (an Analysis's name)
 """
 import pytest
 from coffea_workflow.artifacts import (
@@ -185,6 +188,24 @@ class TestChunking:
         ch1 = Chunking(fileset=fs, split_strategy=None, percentage=None, datasets=None)
         ch2 = Chunking(fileset=fs, split_strategy=None, percentage=None, datasets=("A",))
         assert ch1.identity() != ch2.identity()
+
+    def test_target_events_only_in_keys_when_set(self, fs):
+        assert "target_events_per_chunk" not in Chunking(fileset=fs, split_strategy=None, percentage=None).keys()
+        ch1 = Chunking(fileset=fs, split_strategy="balanced", percentage=None, target_events_per_chunk=10)
+        ch2 = Chunking(fileset=fs, split_strategy="balanced", percentage=None, target_events_per_chunk=20)
+        assert ch1.identity() != ch2.identity()
+
+    def test_target_files_only_in_keys_when_set(self, fs):
+        assert "target_files_per_chunk" not in Chunking(fileset=fs, split_strategy=None, percentage=None).keys()
+        ch1 = Chunking(fileset=fs, split_strategy="incremental", percentage=None, target_files_per_chunk=10)
+        ch2 = Chunking(fileset=fs, split_strategy="incremental", percentage=None, target_files_per_chunk=20)
+        assert ch1.identity() != ch2.identity()
+
+    def test_cost_model_changes_identity(self, fs):
+        base = dict(fileset=fs, split_strategy="balanced", percentage=None, target_seconds_per_chunk=60.0)
+        assert Chunking(**base).identity() != Chunking(**base, cost_model=(("A", 512.0),)).identity()
+        assert Chunking(**base, cost_model=(("A", 512.0),)).identity() \
+            != Chunking(**base, cost_model=(("A", 1024.0),)).identity()
  
  
 # ---------------------------------------------------------------------------
@@ -235,6 +256,21 @@ class TestChunkAnalysis:
         ca2 = ChunkAnalysis(chunk_file="c.json", chunk_hash="abc123", chunking=chunking, analysis_builder="mod:run", builder_params={"k": 2})
         assert ca1.identity() != ca2.identity()
 
+    def test_identity_independent_of_chunking(self, chunking):
+        grown = Chunking(fileset=Fileset(name="fs", builder="mod:fn", builder_params={"n": 2}),
+                         split_strategy=None, percentage=None)
+        ca1 = ChunkAnalysis(chunk_file="c_0.json", chunk_hash="abc123", chunking=chunking, analysis_builder="mod:run")
+        ca2 = ChunkAnalysis(chunk_file="c_7.json", chunk_hash="abc123", chunking=grown, analysis_builder="mod:run")
+        assert ca1.identity() == ca2.identity()
+
+    def test_part_only_in_keys_when_set(self, chunking):
+        ca = ChunkAnalysis(chunk_file="c.json", chunk_hash="abc123", chunking=chunking, analysis_builder="mod:run")
+        sub = ChunkAnalysis(chunk_file="c.json", chunk_hash="abc123", chunking=chunking, analysis_builder="mod:run", part=[0, 2])
+        assert "part" not in ca.keys()
+        assert sub.part == (0, 2)
+        assert sub.keys()["part"] == [0, 2]
+        assert sub.identity() != ca.identity()
+
 
 # ---------------------------------------------------------------------------
 # Analysis
@@ -347,6 +383,59 @@ class TestPlotting:
         assert pl1.identity() != pl2.identity()
 
 
+# ---------------------------------------------------------------------------
+# Identity scheme
+# ---------------------------------------------------------------------------
+
+class TestIdentityScheme:
+    def test_identity_computed_once_per_instance(self):
+        from unittest.mock import patch
+        fs = Fileset(name="x", builder="mod:fn")
+        with patch.object(Fileset, "to_dict", wraps=fs.to_dict) as to_dict:
+            first = fs.identity()
+            assert fs.identity() == first
+        assert to_dict.call_count == 1
+
+    def test_memoized_identity_not_part_of_equality(self):
+        fs1 = Fileset(name="x", builder="mod:fn")
+        fs2 = Fileset(name="x", builder="mod:fn")
+        fs1.identity()
+        assert fs1 == fs2
+        assert hash(fs1) == hash(fs2)
+
+    def test_nested_artifact_contributes_its_digest(self):
+        from unittest.mock import patch
+        fs = Fileset(name="x", builder="mod:fn")
+        ch = Chunking(fileset=fs, split_strategy=None, percentage=None)
+        fs.identity()
+        # the Fileset's dict is not expanded again when hashing the Chunking
+        with patch.object(Fileset, "to_dict", side_effect=AssertionError("expanded")):
+            ch.identity()
+
+    def test_legacy_identity_matches_unversioned_scheme(self):
+        import hashlib
+        import json
+        fs = Fileset(name="x", builder="mod:fn")
+        ch = Chunking(fileset=fs, split_strategy="by_dataset", percentage=None)
+        expanded = {"type": "Chunking", "keys": {**ch.keys(), "fileset": fs.to_dict()}}
+        raw = json.dumps(expanded, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        expected = hashlib.sha256(raw.encode("utf-8") + b"|").hexdigest()
+        assert ch.legacy_identity() == expected
+        assert ch.identity() != expected
+
+    def test_work_identity_ignores_analysis_name(self):
+        fs = Fileset(name="x", builder="mod:fn")
+        a = Analysis(name="nominal", fileset=fs, builder="mod:proc")
+        b = Analysis(name="copy", fileset=fs, builder="mod:proc")
+        c = Analysis(name="nominal", fileset=fs, builder="mod:other")
+        assert a.identity() != b.identity()
+        assert a.work_identity() == b.work_identity() != c.work_identity()
+
+    def test_work_identity_is_identity_without_label_keys(self):
+        fs = Fileset(name="x", builder="mod:fn")
+        assert fs.work_identity() == fs.identity()
+
+
 # ---------------------------------------------------------------------------
 # ARTIFACT_REGISTRY
 # ---------------------------------------------------------------------------
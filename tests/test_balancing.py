@@ -0,0 +1,175 @@
+"""
+Tests for coffea_workflow/balancing.py and strategy="balanced" in the Chunking producer
+
+  - lpt_partition packs weights into near-equal, deterministic bins
+  - the number of chunks follows target_events_per_chunk or percentage
+  - balance_workitems / balance_fileset keep every unit exactly once and
+    preserve the dataset fields and files container type
+  - split_fileset writes "balance" statistics to manifest.json, reading
+    file entry counts through the metadata cache
+"""
+import json
+
+import numpy as np
+import pytest
+import uproot
+from unittest.mock import MagicMock
+
+from coffea_workflow.balancing import (
+    balance_fileset, balance_stats, balance_workitems, lpt_partition, n_balanced_chunks,
+)
+from coffea_workflow.artifacts import Chunking, Fileset, Preprocessed
+from coffea_workflow.config import RunConfig
+from coffea_workflow.default_producers import split_fileset
+from coffea_workflow.deps import Deps
+
+
+def _records(sizes, dataset="A"):
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return [
+        {"dataset": dataset, "filename": f"{dataset}.root", "treename": "Events",
+         "entrystart": int(s), "entrystop": int(s + n), "fileuuid": "AAAA", "usermeta": {}}
+        for s, n in zip(starts, sizes)
+    ]
+
+
+class TestLptPartition:
+    def test_balances_skewed_weights(self):
+        weights = [100, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
+        bins = lpt_partition(weights, 2)
+        loads = sorted(sum(weights[i] for i in b) for b in bins)
+        assert loads == [100, 100]
+
+    def test_every_index_once_and_ordered(self):
+        weights = [5, 3, 8, 1, 9, 2, 7]
+        bins = lpt_partition(weights, 3)
+        assert sorted(i for b in bins for i in b) == list(range(len(weights)))
+        assert all(b == sorted(b) for b in bins)
+        assert [b[0] for b in bins] == sorted(b[0] for b in bins)
+
+    def test_deterministic(self):
+        weights = [4, 4, 4, 4, 2, 2]
+        assert lpt_partition(weights, 3) == lpt_partition(list(weights), 3)
+
+    def test_more_bins_than_items(self):
+        assert lpt_partition([3, 1], 5) == [[0], [1]]
+
+
+class TestChunkCount:
+    def test_target(self):
+        assert n_balanced_chunks([100] * 10, target_events_per_chunk=250) == 4
+
+    def test_percentage(self):
+        assert n_balanced_chunks([1] * 10, percentage=25) == 4
+
+    def test_capped_by_units(self):
+        assert n_balanced_chunks([1000, 1000], target_events_per_chunk=10) == 2
+
+    def test_needs_target_or_percentage(self):
+        with pytest.raises(ValueError, match="balanced"):
+            n_balanced_chunks([1])
+
+
+class TestBalanceStats:
+    def test_stats(self):
+        stats = balance_stats([10, 20, 30])
+        assert (stats["min"], stats["max"], stats["mean"]) == (10, 30, 20.0)
+        assert stats["stddev"] == pytest.approx(8.165, abs=1e-3)
+
+    def test_empty(self):
+        assert balance_stats([])["max"] == 0
+
+
+class TestBalanceWorkitems:
+    def test_chunks_near_equal(self):
+        records = _records([900, 100, 100, 100, 100, 100, 100, 100, 100, 100])
+        chunks, seconds = balance_workitems(records, target_events_per_chunk=900)
+        assert seconds is None
+        events = [sum(r["entrystop"] - r["entrystart"] for r in c) for c in chunks]
+        assert events == [900, 900]
+        assert sorted(r["entrystart"] for c in chunks for r in c) == sorted(r["entrystart"] for r in records)
+
+    def test_datasets_filter(self):
+        records = _records([10, 10], "A") + _records([10], "B")
+        chunks, _ = balance_workitems(records, percentage=50, datasets=["B"])
+        assert [r["dataset"] for c in chunks for r in c] == ["B"]
+
+
+class TestBalanceFileset:
+    FILESET = {
+        "A": {"files": {"a1.root": "Events", "a2.root": "Events"}, "metadata": {"xsec": 1.0}},
+        "B": {"files": ["b1.root", "b2.root"]},
+    }
+    ENTRIES = {("A", "a1.root"): 1000, ("A", "a2.root"): 200, ("B", "b1.root"): 500, ("B", "b2.root"): 300}
+
+    def test_packs_files_across_datasets(self):
+        chunks, _ = balance_fileset(self.FILESET, self.ENTRIES, target_events_per_chunk=1000)
+        events = [sum(self.ENTRIES[(d, u)] for d, data in c.items() for u in data["files"]) for c in chunks]
+        assert events == [1000, 1000]
+
+    def test_keeps_dataset_fields_and_container_type(self):
+        chunks, _ = balance_fileset(self.FILESET, self.ENTRIES, percentage=50)
+        merged = {}
+        for c in chunks:
+            for dataset, data in c.items():
+                merged.setdefault(dataset, []).append(data)
+        assert all(d["metadata"] == {"xsec": 1.0} and isinstance(d["files"], dict) for d in merged["A"])
+        assert all(isinstance(d["files"], list) and d["treename"] == "Events" for d in merged["B"])
+
+
+def _root_file(path, n_entries):
+    with uproot.recreate(path) as f:
+        f["Events"] = {"x": np.arange(n_entries, dtype="f8")}
+    return str(path)
+
+
+class TestChunkingProducer:
+    def _deps(self, upstream_dir):
+        deps = MagicMock(spec=Deps)
+        deps.need.return_value = upstream_dir
+        deps.coffea_executor.return_value = object()  # no Dask client
+        return deps
+
+    def test_balanced_fileset_manifest(self, tmp_path):
+        fileset = {
+            "big": {"files": {_root_file(tmp_path / "big.root", 400): "Events"}},
+            "small": {"files": {_root_file(tmp_path / f"s{i}.root", 100): "Events" for i in range(4)}},
+        }
+        upstream = tmp_path / "upstream"
+        upstream.mkdir()
+        (upstream / "fileset.json").write_text(json.dumps(fileset))
+        chunking = Chunking(fileset=Fileset(name="fs", builder="mod:fn"), split_strategy="balanced",
+                            percentage=None, target_events_per_chunk=400)
+        cfg = RunConfig(cache_dir=tmp_path / "cache", strategy="balanced", target_events_per_chunk=400)
+
+        split_fileset(art=chunking, deps=self._deps(upstream), out=tmp_path / "out", config=cfg)
+
+        manifest = json.loads((tmp_path / "out" / "manifest.json").read_text())
+        assert manifest["n_chunks"] == 2
+        assert manifest["balance"]["events_per_chunk"] == [400, 400]
+        assert manifest["balance"]["stddev"] == 0.0
+        assert (tmp_path / "cache" / "file_metadata.sqlite").exists()
+
+    def test_workitem_chunks_always_record_balance(self, tmp_path):
+        upstream = tmp_path / "upstream"
+        upstream.mkdir()
+        (upstream / "workitems.json").write_text(json.dumps(_records([30, 10]) + _records([20], "B")))
+        pre = Preprocessed(name="pre", fileset=Fileset(name="fs", builder="mod:fn"))
+        chunking = Chunking(fileset=pre, split_strategy="by_dataset", percentage=None)
+        cfg = RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset")
+
+        split_fileset(art=chunking, deps=self._deps(upstream), out=tmp_path / "out", config=cfg)
+
+        manifest = json.loads((tmp_path / "out" / "manifest.json").read_text())
+        assert manifest["balance"]["events_per_chunk"] == [40, 20]
+
+    def test_unbalanced_fileset_has_no_stats(self, tmp_path):
+        upstream = tmp_path / "upstream"
+        upstream.mkdir()
+        (upstream / "fileset.json").write_text(json.dumps({"A": {"files": {"a.root": "Events"}}}))
+        chunking = Chunking(fileset=Fileset(name="fs", builder="mod:fn"), split_strategy=None, percentage=None)
+
+        split_fileset(art=chunking, deps=self._deps(upstream), out=tmp_path / "out",
+                      config=RunConfig(cache_dir=tmp_path / "cache"))
+
+        assert "balance" not in json.loads((tmp_path / "out" / "manifest.json").read_text())
@@ -0,0 +1,48 @@
+"""
+Tests for coffea_workflow/bisection.py
+
+  - chunk_units lists (dataset, file) pairs of fileset chunks and the records
+    of WorkItem chunks, in chunk file order
+  - chunk_part keeps file metadata and drops datasets left without files
+  - unit_label names a unit for failure reports
+"""
+from coffea_workflow.bisection import chunk_part, chunk_units, halves, unit_label
+
+FILESET_CHUNK = {
+    "A": {"files": {"a1.root": "Events", "a2.root": "Events"}, "metadata": {"xsec": 1.0}},
+    "B": {"files": {"b1.root": "Events"}},
+}
+WORKITEM_CHUNK = [
+    {"dataset": "A", "filename": "a1.root", "treename": "Events", "entrystart": 0, "entrystop": 100},
+    {"dataset": "A", "filename": "a1.root", "treename": "Events", "entrystart": 100, "entrystop": 200},
+]
+
+
+def test_chunk_units_of_fileset_chunk():
+    assert chunk_units(FILESET_CHUNK) == [("A", "a1.root"), ("A", "a2.root"), ("B", "b1.root")]
+
+
+def test_chunk_units_of_workitem_chunk():
+    assert chunk_units(WORKITEM_CHUNK) == WORKITEM_CHUNK
+
+
+def test_chunk_part_keeps_metadata_and_drops_empty_datasets():
+    assert chunk_part(FILESET_CHUNK, 1, 2) == {
+        "A": {"files": {"a2.root": "Events"}, "metadata": {"xsec": 1.0}},
+    }
+    assert chunk_part(FILESET_CHUNK, 1, 3)["B"] == {"files": {"b1.root": "Events"}}
+
+
+def test_chunk_part_of_workitem_chunk():
+    assert chunk_part(WORKITEM_CHUNK, 1, 2) == WORKITEM_CHUNK[1:]
+
+
+def test_parts_cover_every_unit_once():
+    left, right = halves(0, 3)
+    assert chunk_units(chunk_part(FILESET_CHUNK, *left)) + chunk_units(chunk_part(FILESET_CHUNK, *right)) \
+        == chunk_units(FILESET_CHUNK)
+
+
+def test_unit_label():
+    assert unit_label(FILESET_CHUNK, 2) == "B: b1.root"
+    assert unit_label(WORKITEM_CHUNK, 1) == "A: a1.root [100:200]"
@@ -0,0 +1,158 @@
+"""
+Tests for coffea_workflow/cache_index.py
+
+CacheIndex keeps <cache_dir>/index.sqlite so Executor.exists() answers from
+one query:
+  - materialize() records the produced artifact's status
+  - exists() trusts indexed entries without touching the artifact directory
+  - un-indexed complete entries found on disk are added on first lookup
+  - an indexed entry whose directory was deleted by hand is produced again
+  - a missing or corrupt index is rebuilt from a directory scan
+  - RunConfig(cache_index=False) keeps the plain filesystem checks
+"""
+import pytest
+from unittest.mock import patch
+
+from coffea_workflow.cache_index import CacheIndex, INDEX_FILE, COMPLETE, INCOMPLETE
+from coffea_workflow.executor import Executor
+from coffea_workflow.config import RunConfig
+from coffea_workflow.artifacts import Fileset, Chunking, ChunkAnalysis, Analysis
+
+
+def _make_executor(tmp_path, **config_kwargs):
+    cfg = RunConfig(cache_dir=tmp_path, **config_kwargs)
+    return Executor(tmp_path, cfg)
+
+
+def _fileset_producer(*, art, deps, out, config):
+    out.mkdir(parents=True, exist_ok=True)
+    (out / "fileset.json").write_text("{}")
+
+
+def _chunk_art():
+    fs = Fileset(name="x", builder="mod:fn")
+    ch = Chunking(fileset=fs, split_strategy=None, percentage=None)
+    return ChunkAnalysis(chunk_file="c.json", chunk_hash="abc123", chunking=ch, analysis_builder="mod:run")
+
+
+class TestIndexLifecycle:
+    def test_constructing_executor_does_not_touch_cache_dir(self, tmp_path):
+        cache = tmp_path / "cache"
+        Executor(cache, RunConfig(cache_dir=cache))
+        assert not cache.exists()
+
+    def test_materialize_records_entry(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer):
+            ex.materialize(fs)
+
+        assert (tmp_path / INDEX_FILE).exists()
+        entry = ex._index.lookup("Fileset", fs.identity())
+        assert entry["status"] == COMPLETE
+        assert entry["size"] == 2
+
+    def test_failed_chunk_recorded_as_incomplete(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        ca = _chunk_art()
+
+        def failing_producer(*, art, deps, out, config):
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(b"err")  # no .success
+
+        with patch("coffea_workflow.executor.get_producer", return_value=failing_producer):
+            ex.materialize(ca)
+
+        assert ex._index.lookup("ChunkAnalysis", ca.identity())["status"] == INCOMPLETE
+        assert ex.exists(ca) is False
+
+
+class TestExistsFromIndex:
+    def test_indexed_entry_answered_without_scanning(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer):
+            ex.materialize(fs)
+
+        with patch.object(Executor, "_scan", side_effect=AssertionError("scanned")):
+            assert ex.exists(fs) is True
+
+    def test_unindexed_entry_on_disk_is_indexed_on_lookup(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        _fileset_producer(art=fs, deps=None, out=ex.path_for(fs), config=None)
+
+        assert ex.exists(fs) is True
+        assert ex._index.lookup("Fileset", fs.identity())["status"] == COMPLETE
+
+    def test_deleted_directory_is_produced_again(self, tmp_path):
+        import shutil
+        fs = Fileset(name="x", builder="mod:fn")
+        ex = _make_executor(tmp_path)
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer):
+            ex.materialize(fs)
+        ex.close()
+        shutil.rmtree(ex.path_for(fs))
+
+        rerun = _make_executor(tmp_path)
+        assert rerun.exists(fs) is False
+        assert rerun._index.lookup("Fileset", fs.identity()) is None
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer) as mock_get:
+            out = rerun.materialize(fs)
+        mock_get.assert_called_once()
+        assert (out / "fileset.json").exists()
+
+    def test_analysis_chunk_fraction_compared_from_index(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        an = Analysis(name="an", fileset=Fileset(name="fs", builder="mod:fn"), builder="mod:run")
+        p = ex.path_for(an)
+        p.mkdir(parents=True)
+        (p / "payload.pkl").write_bytes(b"data")
+        (p / ".chunk_fraction").write_text("0.5")
+
+        assert ex.exists(an, config=RunConfig(cache_dir=tmp_path, chunk_fraction=0.5)) is True
+        assert ex.exists(an, config=RunConfig(cache_dir=tmp_path, chunk_fraction=0.25)) is False
+
+
+class TestRebuild:
+    def test_missing_index_rebuilt_from_existing_cache(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        _fileset_producer(art=fs, deps=None, out=ex.path_for(fs), config=None)
+
+        index = CacheIndex(tmp_path, ex._scan)
+        assert index.lookup("Fileset", fs.identity())["status"] == COMPLETE
+
+    def test_corrupt_index_is_rebuilt(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        _fileset_producer(art=fs, deps=None, out=ex.path_for(fs), config=None)
+        (tmp_path / INDEX_FILE).write_bytes(b"this is not a sqlite database" * 100)
+
+        index = CacheIndex(tmp_path, ex._scan)
+        assert index.enabled
+        assert index.lookup("Fileset", fs.identity())["status"] == COMPLETE
+
+    def test_rebuild_index_forgets_deleted_entries(self, tmp_path):
+        import shutil
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer):
+            ex.materialize(fs)
+        shutil.rmtree(ex.path_for(fs))
+
+        ex.rebuild_index()
+        assert ex._index.lookup("Fileset", fs.identity()) is None
+        assert ex.exists(fs) is False
+
+
+class TestIndexDisabled:
+    def test_cache_index_false_uses_filesystem_only(self, tmp_path):
+        ex = _make_executor(tmp_path, cache_index=False)
+        fs = Fileset(name="x", builder="mod:fn")
+        with patch("coffea_workflow.executor.get_producer", return_value=_fileset_producer):
+            ex.materialize(fs)
+
+        assert ex._index is None
+        assert not (tmp_path / INDEX_FILE).exists()
+        assert ex.exists(fs) is True
@@ -0,0 +1,171 @@
+"""
+Tests for coffea_workflow/cache_manager.py
+
+  - evict(): least-recently-used entries go first, pinned (session) entries stay
+  - cache hits in materialize() refresh the access time used for LRU order
+  - gc(): removes ChunkAnalysis dirs whose chunk hash no Chunking manifest lists
+  - evict() keeps a Chunking entry while chunk results it lists are cached, so a
+    later gc() does not orphan them
+  - RunConfig(max_cache_bytes=...) validation
+"""
+import json
+import os
+import pytest
+
+from coffea_workflow.cache_manager import CacheManager, gc
+from coffea_workflow.executor import Executor
+from coffea_workflow.config import RunConfig
+from coffea_workflow.artifacts import Fileset
+
+
+def _make_executor(tmp_path, **config_kwargs):
+    cfg = RunConfig(cache_dir=tmp_path, **config_kwargs)
+    return Executor(tmp_path, cfg)
+
+
+def _write_entry(root, type_name, identity, n_bytes, mtime=None, **files):
+    d = root / type_name / identity
+    d.mkdir(parents=True)
+    (d / "payload.pkl").write_bytes(b"x" * n_bytes)
+    for name, content in files.items():
+        (d / name).write_text(content)
+    if mtime is not None:
+        os.utime(d, (mtime, mtime))
+    return d
+
+
+def _write_chunking(root, identity, hashes):
+    d = root / "Chunking" / identity
+    d.mkdir(parents=True)
+    output_files = {str(i): {"file": f"fileset_chunk_{i}.json", "hash": h} for i, h in enumerate(hashes)}
+    (d / "manifest.json").write_text(json.dumps({"output_files": output_files, "n_chunks": len(hashes)}))
+    return d
+
+
+class TestEvict:
+    def test_evicts_least_recently_used_first(self, tmp_path):
+        old = _write_entry(tmp_path, "CustomArtifact", "old", 100, mtime=1_000)
+        new = _write_entry(tmp_path, "CustomArtifact", "new", 100, mtime=2_000)
+        ex = _make_executor(tmp_path)
+
+        removed = CacheManager(ex).evict(150)
+
+        assert removed == [old]
+        assert not old.exists()
+        assert new.exists()
+
+    def test_pinned_entries_are_kept(self, tmp_path):
+        old = _write_entry(tmp_path, "CustomArtifact", "old", 100, mtime=1_000)
+        new = _write_entry(tmp_path, "CustomArtifact", "new", 100, mtime=2_000)
+        ex = _make_executor(tmp_path)
+        ex._session_cache.add(old)
+
+        CacheManager(ex).evict(150)
+
+        assert old.exists()
+        assert not new.exists()
+
+    def test_nothing_removed_under_quota(self, tmp_path):
+        _write_entry(tmp_path, "CustomArtifact", "a", 100)
+        ex = _make_executor(tmp_path)
+        assert CacheManager(ex).evict(10_000) == []
+
+    def test_cache_hit_refreshes_access_time(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        hit = ex.path_for(fs)
+        hit.mkdir(parents=True)
+        (hit / "fileset.json").write_text("{" + " " * 98 + "}")
+        os.utime(hit, (1_000, 1_000))
+        other = _write_entry(tmp_path, "CustomArtifact", "other", 100, mtime=2_000)
+
+        ex.materialize(fs)  # cache hit
+        ex.close()
+
+        fresh = _make_executor(tmp_path)  # new run: nothing pinned
+        removed = CacheManager(fresh).evict(150)
+        assert removed == [other]
+
+    def test_works_without_index(self, tmp_path):
+        old = _write_entry(tmp_path, "CustomArtifact", "old", 100, mtime=1_000)
+        _write_entry(tmp_path, "CustomArtifact", "new", 100, mtime=2_000)
+        ex = _make_executor(tmp_path, cache_index=False)
+        assert CacheManager(ex).evict(150) == [old]
+
+
+class TestGc:
+    def test_removes_orphaned_chunk_results(self, tmp_path):
+        _write_chunking(tmp_path, "ch", ["live"])
+        live = _write_entry(tmp_path, "ChunkAnalysis", "c1", 10, **{".chunk_hash": "live"})
+        orphan = _write_entry(tmp_path, "ChunkAnalysis", "c2", 10, **{".chunk_hash": "gone"})
+
+        result = gc(tmp_path)
+
+        assert result["removed"] == [orphan]
+        assert result["freed_bytes"] == 10 + len("gone")  # payload + .chunk_hash stamp
+        assert live.exists()
+        assert not orphan.exists()
+
+    def test_unstamped_chunk_results_are_kept(self, tmp_path):
+        legacy = _write_entry(tmp_path, "ChunkAnalysis", "c1", 10)
+        gc(tmp_path)
+        assert legacy.exists()
+
+    def test_dry_run_removes_nothing(self, tmp_path):
+        orphan = _write_entry(tmp_path, "ChunkAnalysis", "c2", 10, **{".chunk_hash": "gone"})
+        old = _write_entry(tmp_path, "CustomArtifact", "old", 100, mtime=1_000)
+        result = gc(tmp_path, max_cache_bytes=0, dry_run=True)
+        assert set(result["removed"]) == {orphan, old}
+        assert orphan.exists() and old.exists()
+
+    def test_quota_applied_after_orphans(self, tmp_path):
+        old = _write_entry(tmp_path, "CustomArtifact", "old", 100, mtime=1_000)
+        new = _write_entry(tmp_path, "CustomArtifact", "new", 100, mtime=2_000)
+        result = gc(tmp_path, max_cache_bytes=150)
+        assert result["removed"] == [old]
+        assert new.exists()
+
+
+class TestEvictKeepsChunkingOfLiveChunks:
+    def test_evict_then_gc_keeps_valid_chunk_results(self, tmp_path):
+        chunking = _write_chunking(tmp_path, "ch", ["h1", "h2"])
+        os.utime(chunking, (1_000, 1_000))
+        c1 = _write_entry(tmp_path, "ChunkAnalysis", "c1", 100, mtime=2_000, **{".chunk_hash": "h1"})
+        c2 = _write_entry(tmp_path, "ChunkAnalysis", "c2", 100, mtime=3_000, **{".chunk_hash": "h2"})
+        other = _write_entry(tmp_path, "CustomArtifact", "other", 100, mtime=1_500)
+        ex = _make_executor(tmp_path)
+
+        removed = CacheManager(ex).evict(CacheManager(ex).total_bytes() - 50)
+        assert removed == [other]
+        assert chunking.exists()
+
+        assert gc(tmp_path)["removed"] == []
+        assert c1.exists() and c2.exists()
+
+    def test_chunking_evicted_once_its_chunks_are_gone(self, tmp_path):
+        chunking = _write_chunking(tmp_path, "ch", ["h1"])
+        os.utime(chunking, (1_000, 1_000))
+        c1 = _write_entry(tmp_path, "ChunkAnalysis", "c1", 100, mtime=2_000, **{".chunk_hash": "h1"})
+        ex = _make_executor(tmp_path)
+
+        removed = CacheManager(ex).evict(0)
+        assert removed == [c1, chunking]
+
+    def test_chunking_of_pinned_chunk_is_kept(self, tmp_path):
+        chunking = _write_chunking(tmp_path, "ch", ["h1"])
+        os.utime(chunking, (1_000, 1_000))
+        c1 = _write_entry(tmp_path, "ChunkAnalysis", "c1", 100, mtime=2_000, **{".chunk_hash": "h1"})
+        ex = _make_executor(tmp_path)
+        ex._session_cache.add(c1)
+
+        assert CacheManager(ex).evict(0) == []
+        assert chunking.exists()
+
+
+class TestMaxCacheBytesConfig:
+    def test_default_is_none(self):
+        assert RunConfig().max_cache_bytes is None
+
+    def test_negative_raises(self):
+        with pytest.raises(ValueError, match="max_cache_bytes"):
+            RunConfig(max_cache_bytes=-1)
@@ -0,0 +1,216 @@
+"""
+Tests for coffea_workflow/code_version.py
+
+  - source_fingerprint() changes when a builder's body changes, not when
+    an unrelated function in the same file changes
+  - module_fingerprint() covers single modules and whole packages
+  - fingerprints are cached by file mtime/size, across processes in
+    <cache_dir>/fingerprints.sqlite
+  - code_version enters Analysis/ChunkAnalysis identity only when set
+  - run() fills in code_version with RunConfig(code_fingerprint=True)
+"""
+import importlib
+import os
+import sys
+import textwrap
+
+import pytest
+from unittest.mock import patch
+
+from coffea_workflow import code_version
+from coffea_workflow.code_version import code_fingerprint, module_fingerprint, source_fingerprint
+from coffea_workflow.artifacts import Analysis, ChunkAnalysis, Chunking, Fileset
+from coffea_workflow.config import RunConfig
+
+
+@pytest.fixture
+def user_module(tmp_path, monkeypatch):
+    """Write tmp_path/cw_user_mod.py; returns a function that (re)writes and reloads it."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "cw_user_mod.py"
+    counter = [0]
+
+    def write(source):
+        path.write_text(textwrap.dedent(source))
+        counter[0] += 1
+        # distinct mtimes even on filesystems with coarse timestamps
+        os.utime(path, ns=(counter[0] * 10**9, counter[0] * 10**9))
+        sys.modules.pop("cw_user_mod", None)
+        importlib.invalidate_caches()
+        return importlib.import_module("cw_user_mod")
+
+    yield write
+    sys.modules.pop("cw_user_mod", None)
+
+
+BASE = """
+    def build(fileset):
+        return 1
+
+    def other():
+        return 1
+"""
+
+
+class TestSourceFingerprint:
+    def test_changes_with_builder_body(self, user_module):
+        user_module(BASE)
+        before = source_fingerprint("cw_user_mod:build")
+        user_module(BASE.replace("return 1", "return 2", 1))
+        assert source_fingerprint("cw_user_mod:build") != before
+
+    def test_unrelated_edit_keeps_fingerprint(self, user_module):
+        user_module(BASE)
+        before = source_fingerprint("cw_user_mod:build")
+        user_module(BASE.replace("def other():\n        return 1", "def other():\n        return 3"))
+        assert source_fingerprint("cw_user_mod:build") == before
+
+    def test_accepts_callables(self, user_module):
+        mod = user_module(BASE)
+        assert source_fingerprint(mod.build) == source_fingerprint("cw_user_mod:build")
+
+    def test_without_source_falls_back_to_name(self):
+        assert source_fingerprint(len) == source_fingerprint(len)
+
+    def test_cached_by_mtime(self, user_module):
+        user_module(BASE)
+        source_fingerprint("cw_user_mod:build")
+        with patch.object(code_version.inspect, "getsource", side_effect=AssertionError("re-read")):
+            source_fingerprint("cw_user_mod:build")
+
+
+class TestFingerprintStore:
+    SCRIPT = textwrap.dedent("""
+        import sys
+        from unittest.mock import patch
+        from coffea_workflow import code_version
+        from coffea_workflow.code_version import FingerprintStore, code_fingerprint
+        store = FingerprintStore(sys.argv[1])
+        if sys.argv[2] == "offline":
+            # a second process must answer from the store without reading any source
+            patch.object(code_version.inspect, "getsource", side_effect=AssertionError("re-read")).start()
+            patch.object(code_version.Path, "read_bytes", side_effect=AssertionError("re-read")).start()
+        print(code_fingerprint(["cw_user_mod:build"], ["cw_user_mod"], store))
+        store.close()
+    """)
+
+    def _run(self, tmp_path, mode):
+        import subprocess
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(tmp_path), *sys.path])}
+        proc = subprocess.run([sys.executable, "-c", self.SCRIPT, str(tmp_path / "cache"), mode],
+                              capture_output=True, text=True, env=env, check=True)
+        return proc.stdout.strip()
+
+    def test_second_process_reuses_fingerprints(self, tmp_path, user_module):
+        user_module(BASE)
+        first = self._run(tmp_path, "compute")
+        assert (tmp_path / "cache" / code_version.FINGERPRINT_FILE).exists()
+        assert self._run(tmp_path, "offline") == first
+
+    def test_changed_file_is_read_again(self, tmp_path, user_module):
+        user_module(BASE)
+        store = code_version.FingerprintStore(tmp_path)
+        before = source_fingerprint("cw_user_mod:build", store)
+        store.close()
+        user_module(BASE.replace("return 1", "return 2", 1))
+        store = code_version.FingerprintStore(tmp_path)
+        assert source_fingerprint("cw_user_mod:build", store) != before
+        store.close()
+
+    def test_corrupt_file_is_recreated(self, tmp_path, user_module, monkeypatch):
+        user_module(BASE)
+        (tmp_path / code_version.FINGERPRINT_FILE).write_bytes(b"not a database" * 100)
+        store = code_version.FingerprintStore(tmp_path)
+        before = source_fingerprint("cw_user_mod:build", store)
+        store.close()
+        monkeypatch.setattr(code_version, "_FINGERPRINTS", {})
+        store = code_version.FingerprintStore(tmp_path)
+        with patch.object(code_version.inspect, "getsource", side_effect=AssertionError("re-read")):
+            assert source_fingerprint("cw_user_mod:build", store) == before
+        store.close()
+
+
+class TestModuleFingerprint:
+    def test_module_file(self, user_module):
+        user_module(BASE)
+        before = module_fingerprint("cw_user_mod")
+        user_module(BASE + "\n    X = 1\n")
+        assert module_fingerprint("cw_user_mod") != before
+
+    def test_package_covers_all_files(self, tmp_path, monkeypatch):
+        pkg = tmp_path / "cw_user_pkg"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text("")
+        (pkg / "corrections.py").write_text("SF = 1.0\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        importlib.invalidate_caches()
+        before = module_fingerprint("cw_user_pkg")
+        (pkg / "corrections.py").write_text("SF = 1.1\n")
+        os.utime(pkg / "corrections.py", ns=(10**9, 10**9))
+        assert module_fingerprint("cw_user_pkg") != before
+
+    def test_unknown_module_raises(self):
+        with pytest.raises(ValueError, match="cannot find module"):
+            module_fingerprint("cw_no_such_module_anywhere")
+
+    def test_code_fingerprint_combines_modules(self, user_module):
+        user_module(BASE)
+        assert code_fingerprint(["cw_user_mod:build"]) != code_fingerprint(
+            ["cw_user_mod:build"], ["cw_user_mod"]
+        )
+
+
+class TestIdentity:
+    def test_unset_code_version_keeps_identity(self):
+        fs = Fileset(name="fs", builder="mod:fn")
+        an = Analysis(name="an", fileset=fs, builder="mod:run")
+        assert "code_version" not in an.keys()
+
+    def test_code_version_changes_identities(self):
+        fs = Fileset(name="fs", builder="mod:fn")
+        ch = Chunking(fileset=fs, split_strategy=None, percentage=None)
+        assert Analysis(name="an", fileset=fs, builder="mod:run", code_version="a").identity() \
+            != Analysis(name="an", fileset=fs, builder="mod:run", code_version="b").identity()
+        assert ChunkAnalysis(chunk_file="c", chunk_hash="h", chunking=ch, analysis_builder="mod:run",
+                             code_version="a").identity() \
+            != ChunkAnalysis(chunk_file="c", chunk_hash="h", chunking=ch, analysis_builder="mod:run",
+                             code_version="b").identity()
+
+
+class TestRunConfig:
+    def test_off_by_default(self):
+        assert RunConfig().code_fingerprint is False
+
+    def test_modules_list_converted_to_tuple(self):
+        cfg = RunConfig(code_fingerprint=True, code_fingerprint_modules=["a", "b"])
+        assert cfg.code_fingerprint_modules == ("a", "b")
+
+    def test_modules_require_fingerprint(self):
+        with pytest.raises(ValueError, match="code_fingerprint"):
+            RunConfig(code_fingerprint_modules=("a",))
+
+
+class TestRunFillsCodeVersion:
+    def test_analysis_artifact_gets_fingerprint(self, tmp_path, user_module):
+        from coffea_workflow.render import run
+        from coffea_workflow.workflow import Step, Workflow
+        user_module(BASE)
+        seen = []
+
+        def fake_producer(*, art, deps, out, config):
+            seen.append(art)
+            out.mkdir(parents=True, exist_ok=True)
+            if art.type_name == "Fileset":
+                (out / "fileset.json").write_text("{}")
+            else:
+                from coffea_workflow.payload import write_payload
+                write_payload(out / "payload.pkl", {"n_chunks_ok": 0, "n_chunks_total": 0, "failures": []})
+
+        wf = Workflow()
+        fs = wf.add(Step(name="fs", step_type=Fileset, builder="cw_user_mod:other"))
+        wf.add(Step(name="an", step_type=Analysis, builder="cw_user_mod:build"), depends_on=[fs])
+        with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
+            run(wf, RunConfig(cache_dir=tmp_path, code_fingerprint=True))
+
+        analysis = next(a for a in seen if a.type_name == "Analysis")
+        assert analysis.code_version == code_fingerprint(["cw_user_mod:build"])
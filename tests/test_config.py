@@ -2,14 +2,15 @@
 Tests for coffea_workflow/config.py
  
 RunConfig is a frozen dataclass. __post_init__ validates:
-  - strategy must be None or "by_dataset"
+  - strategy must be None, "by_dataset" or "balanced"; "balanced" needs
+    target_events_per_chunk or percentage
   - percentage (when set) must be an int, 1-100, and divide 100 evenly
   - datasets list is auto-converted to tuple for hashability
   - chunk_fraction (when set) must be a float in (0.0, 1.0]
 """
 import pytest
 from pathlib import Path
-from coffea_workflow.config import RunConfig, ExecutorConfig, FacilityBase
+from coffea_workflow.config import RunConfig, ExecutorConfig, FacilityBase, RetryPolicy
 from coffea_workflow.facilities import LocalFactory, CoffeaCasaFactory
  
  
@@ -46,6 +47,26 @@ class TestRunConfigStrategy:
     def test_unknown_strategy_raises_value_error(self):
         with pytest.raises(ValueError, match="Invalid strategy"):
             RunConfig(strategy="by_file")
+
+    def test_balanced_with_target(self):
+        cfg = RunConfig(strategy="balanced", target_events_per_chunk=1_000_000)
+        assert cfg.target_events_per_chunk == 1_000_000
+
+    def test_balanced_with_percentage(self):
+        assert RunConfig(strategy="balanced", percentage=25).strategy == "balanced"
+
+    def test_balanced_needs_chunk_count(self):
+        with pytest.raises(ValueError, match="target_events_per_chunk, target_seconds_per_chunk or percentage"):
+            RunConfig(strategy="balanced")
+
+    def test_target_requires_balanced(self):
+        with pytest.raises(ValueError, match="requires strategy='balanced'"):
+            RunConfig(strategy="by_dataset", target_events_per_chunk=100)
+
+    @pytest.mark.parametrize("target", [0, -5, 1.5])
+    def test_invalid_target(self, target):
+        with pytest.raises(ValueError, match="positive int"):
+            RunConfig(strategy="balanced", target_events_per_chunk=target)
  
  
 class TestRunConfigPercentage:
@@ -119,6 +140,22 @@ class TestRunConfigChunkFraction:
             RunConfig(chunk_fraction=-0.5)
  
  
+class TestRunConfigMaxConcurrentSteps:
+    def test_default_is_one(self):
+        assert RunConfig().max_concurrent_steps == 1
+
+    def test_valid_value(self):
+        assert RunConfig(max_concurrent_steps=4).max_concurrent_steps == 4
+
+    def test_zero_raises(self):
+        with pytest.raises(ValueError, match="max_concurrent_steps"):
+            RunConfig(max_concurrent_steps=0)
+
+    def test_float_raises(self):
+        with pytest.raises(ValueError, match="max_concurrent_steps"):
+            RunConfig(max_concurrent_steps=2.0)
+
+
 class TestRunConfigFrozen:
     def test_cannot_mutate_strategy(self):
         cfg = RunConfig()
@@ -187,6 +224,103 @@ class TestExecutorConfigValidation:
         ec = ExecutorConfig(executor_type="spark", workers=-99, executor=fake)
         assert ec.executor is fake
 
+    def test_tree_reduce_requires_parallel_chunks(self):
+        with pytest.raises(ValueError, match="tree_reduce"):
+            ExecutorConfig(executor_type="DaskExecutor", tree_reduce=True)
+
+    def test_tree_reduce_fanin_below_two_raises(self):
+        with pytest.raises(ValueError, match="tree_reduce_fanin"):
+            ExecutorConfig(executor_type="DaskExecutor", parallel_chunks=True,
+                           tree_reduce=True, tree_reduce_fanin=1)
+
+    def test_parallel_chunks_backend_defaults_to_auto(self):
+        assert ExecutorConfig().parallel_chunks_backend == "auto"
+
+    def test_invalid_parallel_chunks_backend_raises(self):
+        with pytest.raises(ValueError, match="parallel_chunks_backend"):
+            ExecutorConfig(parallel_chunks=True, parallel_chunks_backend="threads")
+
+    def test_tree_reduce_with_process_backend_raises(self):
+        with pytest.raises(ValueError, match="tree_reduce"):
+            ExecutorConfig(parallel_chunks=True, parallel_chunks_backend="processes", tree_reduce=True)
+
+    def test_chunk_memory_limit_must_be_positive(self):
+        with pytest.raises(ValueError, match="chunk_memory_limit"):
+            ExecutorConfig(parallel_chunks=True, chunk_memory_limit=0)
+
+    def test_worker_writes_payload_requires_parallel_chunks(self):
+        with pytest.raises(ValueError, match="worker_writes_payload"):
+            ExecutorConfig(worker_writes_payload=True)
+
+    def test_worker_cache_dir_requires_worker_writes_payload(self):
+        with pytest.raises(ValueError, match="worker_cache_dir"):
+            ExecutorConfig(parallel_chunks=True, worker_cache_dir="/mnt/cache")
+
+
+class TestRetryPolicy:
+    def test_backoff_is_exponential_and_capped(self):
+        policy = RetryPolicy(backoff=1.0, backoff_factor=2.0, max_backoff=5.0)
+        assert [policy.delay(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
+
+    def test_retries_listed_exception_classes(self):
+        policy = RetryPolicy(max_attempts=3)
+        assert policy.should_retry(FileNotFoundError("root://x"), 1)
+        assert not policy.should_retry(ValueError("bad cut"), 1)
+
+    def test_retries_matching_messages(self):
+        policy = RetryPolicy(retry_on=(), retry_patterns=(r"XRootD", r"timed out"))
+        assert policy.should_retry("Worker exception: XRootD error on b1.root", 1)
+        assert policy.should_retry(RuntimeError("read timed out"), 1)
+        assert not policy.should_retry(RuntimeError("KeyError: 'Muon_pt'"), 1)
+
+    def test_stops_at_max_attempts(self):
+        policy = RetryPolicy(max_attempts=2)
+        assert policy.should_retry(OSError(), 1)
+        assert not policy.should_retry(OSError(), 2)
+
+    def test_single_values_become_tuples(self):
+        policy = RetryPolicy(retry_on=OSError, retry_patterns="XRootD")
+        assert policy.retry_on == (OSError,) and policy.retry_patterns == ("XRootD",)
+
+    @pytest.mark.parametrize("kwargs", [{"max_attempts": 0}, {"backoff": -1}, {"backoff_factor": 0.5}])
+    def test_invalid_values_raise(self, kwargs):
+        with pytest.raises(ValueError):
+            RetryPolicy(**kwargs)
+
+    def test_retry_on_must_be_exceptions(self):
+        with pytest.raises(TypeError, match="retry_on"):
+            RetryPolicy(retry_on=(str,))
+
+    def test_not_supported_with_tree_reduce(self):
+        with pytest.raises(ValueError, match="retry"):
+            ExecutorConfig(executor_type="DaskExecutor", parallel_chunks=True, tree_reduce=True, retry=RetryPolicy())
+
+
+class TestSpeculateStragglers:
+    def test_valid(self):
+        ec = ExecutorConfig(executor_type="DaskExecutor", parallel_chunks=True, speculate_stragglers=3.0)
+        assert ec.speculate_after == 0.75
+
+    @pytest.mark.parametrize("kwargs", [
+        {"speculate_stragglers": 2.0},
+        {"parallel_chunks": True, "speculate_stragglers": 1.0},
+        {"parallel_chunks": True, "speculate_stragglers": 2.0, "tree_reduce": True},
+        {"parallel_chunks": True, "speculate_stragglers": 2.0, "parallel_chunks_backend": "processes"},
+        {"parallel_chunks": True, "speculate_stragglers": 2.0, "speculate_after": 0.0},
+    ])
+    def test_invalid_raises(self, kwargs):
+        with pytest.raises(ValueError, match="speculate"):
+            ExecutorConfig(executor_type="DaskExecutor", **kwargs)
+
+
+class TestRunConfigBisectFailures:
+    def test_default_off(self):
+        assert RunConfig().bisect_failures is False
+
+    def test_rejected_with_hist_client(self):
+        with pytest.raises(ValueError, match="bisect_failures"):
+            RunConfig(bisect_failures=True, hist_client=object(), hist_template="mod:fn")
+
 
 class TestRunConfigExecutorConfig:
     def test_default_executor_config_is_none(self):
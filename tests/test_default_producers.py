@@ -15,8 +15,8 @@ from unittest.mock import MagicMock, patch
 
 from coffea_workflow.producers_utils import _call_builder, _load_object, _split_fileset, build_executor
 from coffea_workflow.default_producers import make_fileset, split_fileset
-from coffea_workflow.artifacts import Fileset, Chunking, CustomArtifact
-from coffea_workflow.config import RunConfig, ExecutorConfig
+from coffea_workflow.artifacts import Fileset, Chunking, CustomArtifact, _builder_key
+from coffea_workflow.config import RunConfig, ExecutorConfig, RetryPolicy
 from coffea_workflow.facilities import LocalFactory, CoffeaCasaFactory
 from coffea_workflow.deps import Deps
  
@@ -427,4 +427,642 @@ class TestBuildExecutor:
         monkeypatch.setitem(sys.modules, "dask.distributed", mock_dd)
         fc = CoffeaCasaFactory(scheduler_address="tcp://custom:8786")
         build_executor(None, fc)
-        mock_dd.Client.assert_called_once_with("tcp://custom:8786")
\ No newline at end of file
+        mock_dd.Client.assert_called_once_with("tcp://custom:8786")
+
+# ---------------------------------------------------------------------------
+# execute_analysis with parallel_chunks (fake Dask client, runs in-process)
+# ---------------------------------------------------------------------------
+
+def _two_dataset_builder():
+    return {
+        "A": {"files": {"a1.root": "Events", "a2.root": "Events"}},
+        "B": {"files": {"b1.root": "Events"}},
+    }
+
+
+def _count_files(fileset):
+    from coffea.processor import Ok
+    return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+
+
+def _hist_per_dataset(fileset):
+    import hist
+    from coffea.processor import Ok
+    h = hist.Hist.new.StrCat([], name="dataset", growth=True).Int64()
+    for ds, spec in fileset.items():
+        h.fill(dataset=[ds] * len(spec["files"]))
+    return Ok({"n_files": h})
+
+
+def _count_files_with_metrics(fileset):
+    from coffea.processor import Ok
+    n = sum(len(spec["files"]) for spec in fileset.values())
+    return Ok(({"n_files": n}, {"entries": 100 * n, "processtime": 0.5 * n}))
+
+
+def _fail_on_b(fileset):
+    from coffea.processor import Ok
+    if "B" in fileset:
+        raise OSError("XRootD error on b1.root")
+    return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+
+
+class _FakeFuture:
+    def __init__(self, fn, args):
+        self.released = False
+        try:
+            self._value, self._exc = fn(*args), None
+        except Exception as exc:
+            self._value, self._exc = None, exc
+
+    def result(self):
+        if self._exc is not None:
+            raise self._exc
+        return self._value
+
+    def done(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _FakeClient:
+    def __init__(self):
+        self.submitted = []
+        self.scattered = []
+
+    def scatter(self, data, broadcast=False, hash=True):
+        fut = _FakeFuture(lambda: data, ())
+        self.scattered.append(fut)
+        return fut
+
+    def submit(self, fn, *args, **kwargs):
+        # like Dask, futures passed as arguments are resolved to their results
+        fut = _FakeFuture(
+            lambda *a: fn(*[x.result() if isinstance(x, _FakeFuture) else x for x in a]), args
+        )
+        self.submitted.append(fut)
+        return fut
+
+
+class _FakeDaskExecutor:
+    def __init__(self):
+        self.client = _FakeClient()
+
+
+@pytest.fixture
+def fake_dask(monkeypatch):
+    """Patch dask.distributed.as_completed to yield futures in reverse submission order."""
+    import sys
+    import types
+    mod = types.ModuleType("dask.distributed")
+    mod.as_completed = lambda futures: list(reversed(list(futures)))
+    monkeypatch.setitem(sys.modules, "dask.distributed", mod)
+    return _FakeDaskExecutor()
+
+
+def _run_parallel_analysis(tmp_path, coffea_exec, builder, run_kwargs=None,
+                           executor_type="DaskExecutor", **ec_kwargs):
+    from coffea_workflow.default_producers import execute_analysis
+    from coffea_workflow.artifacts import Analysis
+    from coffea_workflow.executor import Executor
+    from coffea_workflow.payload import read_payload
+
+    ec = ExecutorConfig(executor_type=executor_type, parallel_chunks=True, **ec_kwargs)
+    cfg = RunConfig(cache_dir=tmp_path, strategy="by_dataset", executor_config=ec, **(run_kwargs or {}))
+    ex = Executor(tmp_path, cfg)
+    ex._coffea_executor = coffea_exec
+    art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_dataset_builder), builder=builder)
+    out = ex.path_for(art)
+    execute_analysis(art=art, deps=Deps(ex, config=cfg), out=out, config=cfg)
+    return ex, read_payload(out / "payload.pkl")
+
+
+class TestExecuteAnalysisParallel:
+    def test_merges_chunks_as_they_complete(self, tmp_path, fake_dask):
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _count_files)
+        acc, _ = payload["processor_result"]
+        assert acc == {"n_files": {"A": 2, "B": 1}}
+        assert payload["n_chunks_ok"] == 2
+        assert payload["failures"] == []
+
+    def test_writes_per_chunk_payload_and_success(self, tmp_path, fake_dask):
+        ex, _ = _run_parallel_analysis(tmp_path, fake_dask, _count_files)
+        chunk_dirs = list((tmp_path / "ChunkAnalysis").iterdir())
+        assert len(chunk_dirs) == 2
+        for d in chunk_dirs:
+            assert (d / "payload.pkl").exists()
+            assert (d / ".success").exists()
+
+    def test_releases_futures_by_default(self, tmp_path, fake_dask):
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files)
+        assert all(f.released for f in fake_dask.client.submitted)
+
+    def test_keeps_futures_when_release_disabled(self, tmp_path, fake_dask):
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files, release_chunk_results=False)
+        assert not any(f.released for f in fake_dask.client.submitted)
+
+    def test_worker_exception_recorded_as_failure(self, tmp_path, fake_dask):
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b)
+        acc, _ = payload["processor_result"]
+        assert acc == {"n_files": {"A": 2}}
+        assert len(payload["failures"]) == 1
+        assert "XRootD error" in payload["failures"][0]["error"]
+
+    def test_cached_chunks_are_not_resubmitted(self, tmp_path, fake_dask):
+        _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b)
+        fake_dask.client.submitted.clear()
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b)
+        # only the failed chunk (dataset B) is retried
+        assert len(fake_dask.client.submitted) == 1
+        assert payload["processor_result"][0] == {"n_files": {"A": 2}}
+
+    def test_hist_storage_mmap_writes_npy_bins(self, tmp_path, fake_dask):
+        from coffea_workflow.histstore import HIST_DIR, LazyHistDict
+        ex, payload = _run_parallel_analysis(
+            tmp_path, fake_dask, _hist_per_dataset, run_kwargs={"hist_storage": "mmap"}
+        )
+        acc, _ = payload["processor_result"]
+        assert isinstance(acc, LazyHistDict)
+        assert acc["n_files"]["A"] == 2 and acc["n_files"]["B"] == 1
+        analysis_dir = next((tmp_path / "Analysis").iterdir())
+        assert [p.name for p in (analysis_dir / HIST_DIR).iterdir()] == ["0.npy"]
+
+    def test_tree_reduce_merges_on_workers(self, tmp_path, fake_dask):
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _count_files, tree_reduce=True)
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        assert payload["n_chunks_ok"] == 2
+
+    def test_tree_reduce_keeps_per_chunk_cache_and_failures(self, tmp_path, fake_dask):
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b, tree_reduce=True)
+        assert payload["processor_result"][0] == {"n_files": {"A": 2}}
+        assert len(payload["failures"]) == 1
+        assert "XRootD error" in payload["failures"][0]["error"]
+        assert payload["failures"][0]["attempts"] == 1
+        n_success = sum((d / ".success").exists() for d in (tmp_path / "ChunkAnalysis").iterdir())
+        assert n_success == 1
+        # the workers write the payloads; chunk tasks only return status records
+        statuses = [f.result() for f in fake_dask.client.submitted[:2]]
+        assert sorted(s[0] for s in statuses) == [False, True]
+        assert not any(isinstance(x, bytes) for s in statuses for x in s)
+
+    def test_tree_reduce_payload_not_visible_on_driver_raises(self, tmp_path, fake_dask):
+        with pytest.raises(RuntimeError, match="shared with the workers"):
+            _run_parallel_analysis(tmp_path, fake_dask, _count_files, tree_reduce=True,
+                                   worker_cache_dir=str(tmp_path / "elsewhere"))
+
+    @pytest.mark.parametrize("tree_reduce", [False, True])
+    def test_records_chunk_throughput(self, tmp_path, fake_dask, tree_reduce):
+        from coffea_workflow.throughput import ThroughputHistory
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files_with_metrics, tree_reduce=tree_reduce)
+        history = ThroughputHistory(tmp_path)
+        assert history.rates(_builder_key(_count_files_with_metrics)) == {"A": 200.0, "B": 200.0}
+        history.close()
+
+    @pytest.mark.parametrize("tree_reduce", [False, True])
+    def test_chunk_records_in_run_report(self, tmp_path, fake_dask, tree_reduce):
+        from coffea_workflow.artifacts import Analysis
+        ex, _ = _run_parallel_analysis(tmp_path, fake_dask, _count_files, tree_reduce=tree_reduce)
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_dataset_builder), builder=_count_files)
+        (tmp_path / "step").mkdir()
+        step = ex.report.add_step("an", art, tmp_path / "step", 0.0, 0.0)
+        assert [c["cache"] for c in step["chunks"]] == ["miss", "miss"]
+        assert all(c["status"] == "ok" and c["payload_bytes"] > 0 for c in step["chunks"])
+        waits = [c["queue_wait_seconds"] for c in step["chunks"]]
+        assert all(w is None for w in waits) if tree_reduce else all(w >= 0 for w in waits)
+
+    def test_hooks_fire_on_driver(self, tmp_path, fake_dask):
+        from coffea_workflow.hooks import Hook
+        events = []
+
+        class Recorder(Hook):
+            def on_chunk_start(self, ctx): events.append(("start", ctx.attrs["remote"]))
+            def on_chunk_end(self, ctx): events.append(("end", ctx.attrs["ok"]))
+            def on_merge(self, ctx): events.append(("merge", ctx.seconds >= 0))
+
+        _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b, run_kwargs={"hooks": (Recorder(),)})
+        assert sorted(events) == [("end", False), ("end", True), ("merge", True), ("start", True), ("start", True)]
+
+    def test_worker_spans_join_driver_trace(self, tmp_path, fake_dask):
+        from coffea_workflow.hooks import HookContext
+        from coffea_workflow.tracing import TracingHook
+        hook = TracingHook(tmp_path / "trace.json")
+        hook.on_run_start(HookContext(kind="run", art=None, name="run"))
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files, run_kwargs={"hooks": (hook,)})
+        spans = {s["span_id"]: s for s in hook.tracer.spans}
+        workers = [s for s in spans.values() if s["name"].startswith("worker ")]
+        assert len(workers) == 2
+        for w in workers:
+            task = spans[w["parent_span_id"]]
+            assert task["name"] == f"task {w['attributes']['chunk_file']}"
+            assert w["trace_id"] == task["trace_id"] == hook.tracer.trace_id
+            assert w["attributes"]["process.pid"] and w["attributes"]["host.name"]
+
+    def test_code_scattered_once_per_run(self, tmp_path, fake_dask):
+        from coffea_workflow.default_producers import execute_analysis
+        from coffea_workflow.artifacts import Analysis
+        from coffea_workflow.executor import Executor
+        cfg = RunConfig(cache_dir=tmp_path, strategy="by_dataset",
+                        executor_config=ExecutorConfig(executor_type="DaskExecutor", parallel_chunks=True))
+        ex = Executor(tmp_path, cfg)
+        ex._coffea_executor = fake_dask
+        for name in ("nominal", "variation"):  # two Analysis steps with the same builder
+            art = Analysis(name=name, fileset=Fileset(name="fs", builder=_two_dataset_builder),
+                           builder=_count_files, builder_params={"tag": name})
+            execute_analysis(art=art, deps=Deps(ex, config=cfg), out=ex.path_for(art), config=cfg)
+        assert len(fake_dask.client.submitted) == 4
+        assert len(fake_dask.client.scattered) == 1
+
+    def test_worker_unpickles_code_once(self, tmp_path, fake_dask, monkeypatch):
+        import sys
+        import cloudpickle
+        monkeypatch.delitem(sys.modules, "_coffea_workflow_worker", raising=False)
+        code = cloudpickle.dumps(_count_files)
+        loads = []
+        real_loads = cloudpickle.loads
+        monkeypatch.setattr(cloudpickle, "loads", lambda data, *a, **kw: (loads.append(data), real_loads(data, *a, **kw))[1])
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files)
+        assert loads.count(code) == 1  # two chunks, one deserialization
+        assert len(sys.modules["_coffea_workflow_worker"].code_cache) == 1
+
+    @pytest.mark.parametrize("tree_reduce", [False, True])
+    def test_worker_writes_payload(self, tmp_path, fake_dask, tree_reduce):
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _fail_on_b, tree_reduce=tree_reduce,
+                                            worker_writes_payload=True)
+        assert payload["processor_result"][0] == {"n_files": {"A": 2}}
+        assert len(payload["failures"]) == 1
+        assert "XRootD error" in payload["failures"][0]["error"]
+        chunk_dirs = list((tmp_path / "ChunkAnalysis").iterdir())
+        assert all((d / "payload.pkl").exists() and (d / ".chunk_hash").exists() for d in chunk_dirs)
+        assert sum((d / ".success").exists() for d in chunk_dirs) == 1
+        # chunk tasks return status records, not payloads
+        chunk_results = [f.result() for f in fake_dask.client.submitted[:2]]
+        statuses = [r if tree_reduce else r[2] for r in chunk_results]
+        assert sorted(s[0] for s in statuses) == [False, True]
+        assert not any(isinstance(x, bytes) for s in statuses for x in s)
+
+    def test_worker_writes_payload_then_cache_hit(self, tmp_path, fake_dask):
+        _run_parallel_analysis(tmp_path, fake_dask, _count_files, worker_writes_payload=True)
+        fake_dask.client.submitted.clear()
+        _, payload = _run_parallel_analysis(tmp_path, fake_dask, _count_files, worker_writes_payload=True)
+        assert fake_dask.client.submitted == []
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+
+    def test_worker_cache_dir_maps_the_shared_mount(self, tmp_path, fake_dask):
+        (tmp_path / "mnt").symlink_to(tmp_path / "cache")
+        (tmp_path / "cache").mkdir()
+        _, payload = _run_parallel_analysis(tmp_path / "cache", fake_dask, _count_files,
+                                            worker_writes_payload=True, worker_cache_dir=str(tmp_path / "mnt"))
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+
+    def test_worker_payload_not_visible_on_driver_raises(self, tmp_path, fake_dask):
+        with pytest.raises(RuntimeError, match="shared with the workers"):
+            _run_parallel_analysis(tmp_path, fake_dask, _count_files, worker_writes_payload=True,
+                                   worker_cache_dir=str(tmp_path / "elsewhere"))
+
+    def test_tree_reduce_with_wide_fanin(self, tmp_path, fake_dask):
+        _, payload = _run_parallel_analysis(
+            tmp_path, fake_dask, _count_files, tree_reduce=True, tree_reduce_fanin=8,
+        )
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+
+
+# ---------------------------------------------------------------------------
+# execute_analysis retries (ExecutorConfig.retry)
+# ---------------------------------------------------------------------------
+
+def _flaky_on_b(counter_dir, fail_times, exc_type=OSError, as_err=False):
+    """Fails dataset B's first fail_times runs; runs are counted in files, so they survive worker processes."""
+    def flaky(fileset):
+        from coffea.processor import Err, Ok
+        for ds in fileset:
+            path = counter_dir / ds
+            n = int(path.read_text()) if path.exists() else 0
+            path.write_text(str(n + 1))
+            if ds == "B" and n < fail_times:
+                exc = exc_type(f"XRootD error on b1.root (run {n + 1})")
+                if as_err:
+                    return Err(exc)
+                raise exc
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+    return flaky
+
+
+def _run_sequential_analysis(tmp_path, builder, retry=None, **run_kwargs):
+    from coffea_workflow.default_producers import execute_analysis
+    from coffea_workflow.artifacts import Analysis
+    from coffea_workflow.executor import Executor
+    from coffea_workflow.payload import read_payload
+
+    cfg = RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset",
+                    executor_config=ExecutorConfig(executor_type="IterativeExecutor", retry=retry),
+                    **run_kwargs)
+    ex = Executor(tmp_path / "cache", cfg)
+    ex._coffea_executor = object()
+    art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_dataset_builder), builder=builder)
+    out = ex.path_for(art)
+    execute_analysis(art=art, deps=Deps(ex, config=cfg), out=out, config=cfg)
+    return ex, read_payload(out / "payload.pkl")
+
+
+class TestExecuteAnalysisRetry:
+    # backoff=0 keeps these fast; RetryPolicy.delay is covered in test_config.py
+
+    @pytest.mark.parametrize("as_err", [False, True])
+    def test_sequential_retry_succeeds(self, tmp_path, as_err):
+        builder = _flaky_on_b(tmp_path, fail_times=2, as_err=as_err)
+        ex, payload = _run_sequential_analysis(tmp_path, builder, RetryPolicy(max_attempts=3, backoff=0))
+        assert payload["failures"] == []
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        assert (tmp_path / "B").read_text() == "3"
+        assert (tmp_path / "A").read_text() == "1"
+
+    def test_sequential_gives_up_after_max_attempts(self, tmp_path):
+        builder = _flaky_on_b(tmp_path, fail_times=5, as_err=True)
+        _, payload = _run_sequential_analysis(tmp_path, builder, RetryPolicy(max_attempts=2, backoff=0))
+        assert [(f["attempts"], "XRootD" in f["error"]) for f in payload["failures"]] == [(2, True)]
+        assert (tmp_path / "B").read_text() == "2"
+
+    def test_sequential_unclassified_exception_is_not_retried(self, tmp_path):
+        builder = _flaky_on_b(tmp_path, fail_times=1, exc_type=ValueError)
+        with pytest.raises(ValueError, match="XRootD"):
+            _run_sequential_analysis(tmp_path, builder, RetryPolicy(max_attempts=3, backoff=0))
+        assert (tmp_path / "B").read_text() == "1"
+
+    def test_parallel_retry_succeeds(self, tmp_path, fake_dask):
+        builder = _flaky_on_b(tmp_path, fail_times=1)
+        ex, payload = _run_parallel_analysis(tmp_path / "cache", fake_dask, builder,
+                                             retry=RetryPolicy(max_attempts=3, backoff=0))
+        assert payload["failures"] == []
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        assert len(fake_dask.client.submitted) == 3
+        from coffea_workflow.artifacts import Analysis
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_dataset_builder), builder=builder)
+        step = ex.report.add_step("an", art, tmp_path, 0.0, 0.0)
+        assert [c["attempts"] for c in step["chunks"]] == [1, 2]
+        from coffea_workflow.report import format_chunk_totals
+        assert "1 retried" in format_chunk_totals(step)
+
+    def test_parallel_pattern_match_with_worker_writes(self, tmp_path, fake_dask):
+        builder = _flaky_on_b(tmp_path, fail_times=5, exc_type=RuntimeError, as_err=True)
+        retry = RetryPolicy(max_attempts=3, backoff=0, retry_on=(), retry_patterns=(r"XRootD error",))
+        _, payload = _run_parallel_analysis(tmp_path / "cache", fake_dask, builder, retry=retry,
+                                            worker_writes_payload=True)
+        assert [f["attempts"] for f in payload["failures"]] == [3]
+        assert "run 3" in payload["failures"][0]["error"]
+
+    def test_parallel_retry_in_local_processes(self, tmp_path):
+        builder = _flaky_on_b(tmp_path, fail_times=1)
+        _, payload = _run_parallel_analysis(tmp_path / "cache", object(), builder, executor_type="FuturesExecutor",
+                                            workers=2, retry=RetryPolicy(backoff=0))
+        assert payload["failures"] == []
+        assert (tmp_path / "B").read_text() == "2"
+
+
+# ---------------------------------------------------------------------------
+# execute_analysis speculative re-execution (ExecutorConfig.speculate_stragglers)
+# ---------------------------------------------------------------------------
+
+class _HungFuture(_FakeFuture):
+    """A task stuck on a slow node: never done, until cancelled."""
+
+    def __init__(self):
+        self.released = self.cancelled = False
+
+    def done(self):
+        return False
+
+    def result(self):
+        raise AssertionError("a hung task's result was collected")
+
+
+class _StragglerClient(_FakeClient):
+    """The first submission of dataset B's chunk hangs; later ones run normally."""
+
+    def __init__(self):
+        super().__init__()
+        self.hung = None
+
+    def submit(self, fn, *args, **kwargs):
+        if self.hung is None and any(isinstance(a, dict) and "B" in a for a in args):
+            self.hung = _HungFuture()
+            self.hung.call = (fn, args)  # to play the cancelled task finishing late
+            self.submitted.append(self.hung)
+            return self.hung
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def straggler_dask(fake_dask, monkeypatch):
+    from coffea_workflow import default_producers
+    monkeypatch.setattr(default_producers, "_SPECULATION_POLL_SECONDS", 0.01)
+    fake_dask.client = _StragglerClient()
+    return fake_dask
+
+
+class TestExecuteAnalysisSpeculation:
+    def test_duplicate_of_straggler_wins(self, tmp_path, straggler_dask):
+        ex, payload = _run_parallel_analysis(tmp_path, straggler_dask, _count_files,
+                                             speculate_stragglers=2.0, speculate_after=0.5)
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        assert payload["failures"] == []
+        client = straggler_dask.client
+        assert len(client.submitted) == 3
+        assert client.hung.cancelled
+        from coffea_workflow.artifacts import Analysis
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_dataset_builder), builder=_count_files)
+        step = ex.report.add_step("an", art, tmp_path, 0.0, 0.0)
+        assert [c["speculated"] for c in step["chunks"]] == [False, True]
+
+    def test_late_failing_duplicate_keeps_good_payload(self, tmp_path, straggler_dask):
+        from coffea_workflow.payload import read_payload
+        _, payload = _run_parallel_analysis(tmp_path, straggler_dask, _count_files, worker_writes_payload=True,
+                                            speculate_stragglers=2.0, speculate_after=0.5)
+        assert payload["failures"] == []
+        # the cancelled original was already running: it fails on a transient error afterwards
+        _, args = straggler_dask.client.hung.call
+        persist, out_dir, chunk_hash, guarded = args[2:6]
+
+        def flaky(*_):
+            raise OSError("XRootD error on b1.root")
+
+        assert persist(out_dir, chunk_hash, guarded, flaky)[0] is False
+        from pathlib import Path
+        assert (Path(out_dir) / ".success").exists()
+        assert read_payload(Path(out_dir) / "payload.pkl").is_ok()
+
+    def test_no_duplicate_before_enough_chunks_finished(self, tmp_path, straggler_dask, monkeypatch):
+        from coffea_workflow import default_producers
+
+        class StopPolling(Exception):
+            pass
+
+        polls = []
+
+        def sleep(seconds):
+            polls.append(seconds)
+            if len(polls) == 5:
+                raise StopPolling
+
+        monkeypatch.setattr(default_producers.time, "sleep", sleep)
+        with pytest.raises(StopPolling):
+            _run_parallel_analysis(tmp_path, straggler_dask, _count_files,
+                                   speculate_stragglers=2.0, speculate_after=1.0)
+        assert len(straggler_dask.client.submitted) == 2  # one of two chunks done: no duplicate yet
+
+    def test_placement_avoids_the_busy_worker(self):
+        from coffea_workflow.default_producers import _placement_elsewhere, _worker_slots
+        client = MagicMock()
+        client.nthreads.return_value = {"tcp://a": 2, "tcp://b": 2}
+        client.processing.return_value = {"tcp://a": ["chunk-1"], "tcp://b": []}
+        future = MagicMock(key="chunk-1")
+        assert _placement_elsewhere(client, future) == {"workers": ["tcp://b"], "allow_other_workers": True}
+        assert _worker_slots(client, 1) == 4
+        assert _placement_elsewhere(object(), future) == {}
+
+    def test_process_backend_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="speculate_stragglers needs a DaskExecutor"):
+            _run_parallel_analysis(tmp_path, object(), _count_files, executor_type="FuturesExecutor",
+                                   speculate_stragglers=2.0)
+
+
+def _local_count_files():
+    # defined in a closure so cloudpickle ships it by value to the spawned workers,
+    # which (like Dask workers) never import this test module
+    def count_files(fileset):
+        from coffea.processor import Ok
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+    return count_files
+
+
+def _local_fail_on_b():
+    def fail_on_b(fileset):
+        from coffea.processor import Ok
+        if "B" in fileset:
+            raise OSError("XRootD error on b1.root")
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+    return fail_on_b
+
+
+class TestExecuteAnalysisLocalProcesses:
+    def test_auto_backend_runs_chunks_in_processes(self, tmp_path):
+        _, payload = _run_parallel_analysis(
+            tmp_path, object(), _local_count_files(), executor_type="FuturesExecutor", workers=2
+        )
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        assert payload["n_chunks_ok"] == 2
+        for d in (tmp_path / "ChunkAnalysis").iterdir():
+            assert (d / ".success").exists()
+
+    def test_failures_recorded_and_cached_chunks_reused(self, tmp_path):
+        builder = _local_fail_on_b()
+        _, payload = _run_parallel_analysis(tmp_path, object(), builder,
+                                            executor_type="FuturesExecutor", workers=2)
+        assert len(payload["failures"]) == 1
+        assert "XRootD error" in payload["failures"][0]["error"]
+
+        from coffea_workflow.producers_utils import LocalChunkClient
+        real_submit = LocalChunkClient.submit
+        with patch.object(LocalChunkClient, "submit", autospec=True, side_effect=real_submit) as submit:
+            _, payload = _run_parallel_analysis(tmp_path, object(), builder,
+                                                executor_type="FuturesExecutor", workers=2)
+        # dataset A is cached, only the failed chunk (B) is resubmitted
+        assert submit.call_count == 1
+        assert payload["processor_result"][0] == {"n_files": {"A": 2}}
+
+    def test_worker_writes_payload(self, tmp_path):
+        _, payload = _run_parallel_analysis(tmp_path, object(), _local_count_files(), executor_type="FuturesExecutor",
+                                            workers=2, worker_writes_payload=True)
+        assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+        for d in (tmp_path / "ChunkAnalysis").iterdir():
+            assert (d / ".success").exists()
+
+    def test_pool_shut_down_when_run_raises(self, tmp_path):
+        from coffea_workflow.producers_utils import LocalChunkClient
+        real_shutdown = LocalChunkClient.shutdown
+        with patch.object(LocalChunkClient, "submit", side_effect=RuntimeError("submit failed")), \
+                patch.object(LocalChunkClient, "shutdown", autospec=True, side_effect=real_shutdown) as shutdown:
+            with pytest.raises(RuntimeError, match="submit failed"):
+                _run_parallel_analysis(tmp_path, object(), _local_count_files(),
+                                       executor_type="FuturesExecutor", workers=2)
+        shutdown.assert_called_once()
+
+    def test_dask_backend_without_client_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="requires a DaskExecutor"):
+            _run_parallel_analysis(tmp_path, object(), _count_files, executor_type="FuturesExecutor",
+                                   parallel_chunks_backend="dask")
+
+
+# ---------------------------------------------------------------------------
+# execute_analysis with RunConfig.bisect_failures
+# ---------------------------------------------------------------------------
+
+def _fail_on_file(counter_dir, bad, raise_exc=False):
+    """Counts the runs of every file and fails each chunk or part that contains bad."""
+    def builder(fileset):
+        from coffea.processor import Err, Ok
+        files = [f for spec in fileset.values() for f in spec["files"]]
+        for f in files:
+            path = counter_dir / f
+            path.write_text(str(int(path.read_text()) + 1 if path.exists() else 1))
+        if bad in files:
+            exc = OSError(f"XRootD error on {bad}")
+            if raise_exc:
+                raise exc
+            return Err(exc)
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+    return builder
+
+
+def _runs(counter_dir):
+    return {f: int((counter_dir / f).read_text()) for f in ("a1.root", "a2.root", "b1.root")
+            if (counter_dir / f).exists()}
+
+
+class TestExecuteAnalysisBisect:
+    @pytest.mark.parametrize("raise_exc", [False, True])
+    def test_sequential_isolates_failing_file(self, tmp_path, raise_exc):
+        builder = _fail_on_file(tmp_path, "a2.root", raise_exc)
+        _, payload = _run_sequential_analysis(tmp_path, builder, bisect_failures=True)
+        assert [(f["file"], "XRootD" in f["error"]) for f in payload["failures"]] == [("A: a2.root", True)]
+        assert payload["processor_result"][0] == {"n_files": {"A": 1, "B": 1}}
+        assert payload["n_chunks_ok"] == 1
+        assert _runs(tmp_path) == {"a1.root": 2, "a2.root": 2, "b1.root": 1}
+
+    def test_rerun_only_runs_failing_unit(self, tmp_path):
+        builder = _fail_on_file(tmp_path, "a2.root")
+        _run_sequential_analysis(tmp_path, builder, bisect_failures=True)
+        _, payload = _run_sequential_analysis(tmp_path, builder, bisect_failures=True)
+        assert [f["file"] for f in payload["failures"]] == ["A: a2.root"]
+        assert payload["processor_result"][0] == {"n_files": {"A": 1, "B": 1}}
+        assert _runs(tmp_path) == {"a1.root": 2, "a2.root": 3, "b1.root": 1}
+
+    def test_file_entries_keep_the_chunk_attempts(self, tmp_path):
+        builder = _fail_on_file(tmp_path, "a2.root")
+        _, payload = _run_sequential_analysis(tmp_path, builder, retry=RetryPolicy(max_attempts=3, backoff=0),
+                                              bisect_failures=True)
+        assert [(f["file"], f["attempts"]) for f in payload["failures"]] == [("A: a2.root", 3)]
+
+    def test_single_file_chunk_reports_its_file(self, tmp_path):
+        builder = _fail_on_file(tmp_path, "b1.root")
+        _, payload = _run_sequential_analysis(tmp_path, builder, bisect_failures=True)
+        assert [f["file"] for f in payload["failures"]] == ["B: b1.root"]
+        assert _runs(tmp_path)["b1.root"] == 1
+
+    def test_without_bisect_whole_chunk_fails(self, tmp_path):
+        builder = _fail_on_file(tmp_path, "a2.root")
+        _, payload = _run_sequential_analysis(tmp_path, builder)
+        assert "file" not in payload["failures"][0]
+        assert payload["processor_result"][0] == {"n_files": {"B": 1}}
+
+    def test_parallel_isolates_failing_file(self, tmp_path, fake_dask):
+        builder = _fail_on_file(tmp_path, "a2.root")
+        _, payload = _run_parallel_analysis(tmp_path / "cache", fake_dask, builder,
+                                            run_kwargs={"bisect_failures": True})
+        assert [f["file"] for f in payload["failures"]] == ["A: a2.root"]
+        assert payload["processor_result"][0] == {"n_files": {"A": 1, "B": 1}}
+        assert _runs(tmp_path) == {"a1.root": 2, "a2.root": 2, "b1.root": 1}
@@ -6,8 +6,14 @@ Executor.exists() checks whether the expected sentinel file is present and
 handles Analysis-specific flags (.has_failures, .chunk_fraction).
 Executor.materialize() short-circuits on the session cache, falls back to
 the disk cache, calls the producer otherwise, and raises if the producer
-creates no output.
+creates no output. Entries cached under the old identity scheme are moved to
+their current path on first lookup. Concurrent requests for the same work run
+the producer once; an Analysis differing from one produced this run only by
+name gets a copy of its output.
 """
+import threading
+import time
+
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -321,4 +327,129 @@ class TestMaterializeWithConfig:
         with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
             ex.materialize(fs)
 
-        assert received["config"].chunk_fraction == 0.3
\ No newline at end of file
+        assert received["config"].chunk_fraction == 0.3
+
+
+# ---------------------------------------------------------------------------
+# legacy identity migration
+# ---------------------------------------------------------------------------
+
+class TestMigrateLegacy:
+    def _legacy_entry(self, tmp_path, art, sentinel):
+        legacy = tmp_path / art.type_name / art.legacy_identity()
+        legacy.mkdir(parents=True)
+        (legacy / sentinel).write_text("{}")
+        return legacy
+
+    def test_legacy_entry_moved_and_reused(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        ch = Chunking(fileset=fs, split_strategy=None, percentage=None)
+        legacy = self._legacy_entry(tmp_path, ch, "manifest.json")
+
+        assert ex.exists(ch) is True
+        assert not legacy.exists()
+        assert (ex.path_for(ch) / "manifest.json").exists()
+
+    def test_current_entry_wins_over_legacy(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        fs = Fileset(name="x", builder="mod:fn")
+        ch = Chunking(fileset=fs, split_strategy=None, percentage=None)
+        legacy = self._legacy_entry(tmp_path, ch, "manifest.json")
+        _touch_sentinel(ex, ch, "manifest.json")
+
+        assert ex.migrate_legacy(ch) is False
+        assert legacy.exists()
+
+    def test_no_legacy_entry(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        assert ex.migrate_legacy(Fileset(name="x", builder="mod:fn")) is False
+
+
+# ---------------------------------------------------------------------------
+# single flight and twins
+# ---------------------------------------------------------------------------
+
+class TestSingleFlight:
+    def _analysis(self, name="an"):
+        return Analysis(name=name, fileset=Fileset(name="fs", builder="mod:fn"), builder="mod:proc")
+
+    def _counting_producer(self, calls, delay=0.0):
+        def producer(*, art, deps, out, config):
+            calls.append(art.name)
+            time.sleep(delay)
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(art.name.encode())
+            (out / ".success").write_text("")
+        return producer
+
+    def _materialize_concurrently(self, ex, arts):
+        results, errors = {}, []
+
+        def work(i, art):
+            try:
+                results[i] = ex.materialize(art)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work, args=(i, a)) for i, a in enumerate(arts)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results, errors
+
+    def test_concurrent_requests_run_producer_once(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        art = self._analysis()
+        calls = []
+        with patch("coffea_workflow.executor.get_producer", return_value=self._counting_producer(calls, 0.2)):
+            results, errors = self._materialize_concurrently(ex, [art] * 4)
+        assert errors == []
+        assert calls == ["an"]
+        assert set(results.values()) == {ex.path_for(art)}
+
+    def test_twin_differing_by_name_gets_a_copy(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        first, second = self._analysis("nominal"), self._analysis("nominal_again")
+        assert first.identity() != second.identity()
+        assert first.work_identity() == second.work_identity()
+        calls = []
+        with patch("coffea_workflow.executor.get_producer", return_value=self._counting_producer(calls, 0.2)):
+            results, errors = self._materialize_concurrently(ex, [first, second])
+        assert errors == []
+        assert len(calls) == 1
+        for art in (first, second):
+            out = ex.path_for(art)
+            assert (out / ".success").exists()
+            assert (out / "payload.pkl").read_bytes() == calls[0].encode()
+        assert sorted(ex.report.artifact(a)["cache"] for a in (first, second)) == ["hit", "miss"]
+
+    def test_twins_not_shared_with_hist_client(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        calls = []
+        cfg = RunConfig(cache_dir=tmp_path, hist_client=MagicMock(), hist_template=MagicMock())
+        with patch("coffea_workflow.executor.get_producer", return_value=self._counting_producer(calls)):
+            ex.materialize(self._analysis("a"), config=cfg)
+            ex.materialize(self._analysis("b"), config=cfg)
+        assert sorted(calls) == ["a", "b"]
+
+    def test_waiter_runs_producer_after_leader_fails(self, tmp_path):
+        ex = _make_executor(tmp_path)
+        art = self._analysis()
+        calls = []
+
+        def flaky(*, art, deps, out, config):
+            calls.append(art.name)
+            time.sleep(0.2)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            out.mkdir(parents=True, exist_ok=True)
+            (out / ".success").write_text("")
+
+        with patch("coffea_workflow.executor.get_producer", return_value=flaky):
+            results, errors = self._materialize_concurrently(ex, [art, art])
+        assert len(calls) == 2
+        assert [str(e) for e in errors] == ["boom"]
+        assert list(results.values()) == [ex.path_for(art)]
+        assert ex._inflight == {}
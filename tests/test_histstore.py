@@ -0,0 +1,140 @@
+"""
+Tests for coffea_workflow/histstore.py
+
+  - write_mapped_payload() moves histogram bins to hists/*.npy and read_payload()
+    rebuilds identical histograms
+  - histograms are only built when their key is accessed
+  - loaded histograms are writable and merge with accumulate()
+  - LazyHistDict pickles/copies as a plain dict of histograms, and
+    resolve_mapped_hists() turns it into one
+  - execute_analysis honours RunConfig(hist_storage=...)
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from coffea_workflow.histstore import (
+    HIST_DIR, LazyHistDict, MappedHist, resolve_mapped_hists, write_mapped_payload,
+)
+from coffea_workflow.payload import read_payload, write_payload
+from coffea_workflow.config import RunConfig
+
+
+@pytest.fixture
+def analysis_payload():
+    import hist
+    pt = hist.Hist.new.StrCat(["nominal", "jes_up"], name="variation") \
+        .Reg(50, 0, 500, name="pt").Weight(metadata="pt", label="jet pT")
+    pt.fill(variation="nominal", pt=np.linspace(0, 499, 1000))
+    njet = hist.Hist.new.Reg(10, 0, 10, name="njet").Int64()
+    njet.fill(np.arange(10))
+    acc = {"ttbar": {"pt": pt, "njet": njet, "cutflow": {"all": 1000}}}
+    return {"n_chunks_ok": 1, "failures": [], "processor_result": (acc, {"entries": 1000})}
+
+
+def _write(tmp_path, payload, compression=None):
+    path = tmp_path / "payload.pkl"
+    write_mapped_payload(path, payload, compression)
+    return path
+
+
+class TestRoundTrip:
+    @pytest.mark.parametrize("compression", [None, "zlib"])
+    def test_histograms_rebuilt_identically(self, tmp_path, analysis_payload, compression):
+        loaded = read_payload(_write(tmp_path, analysis_payload, compression))
+        acc, metrics = loaded["processor_result"]
+        orig = analysis_payload["processor_result"][0]["ttbar"]
+
+        assert acc["ttbar"]["pt"] == orig["pt"]
+        assert acc["ttbar"]["njet"] == orig["njet"]
+        assert acc["ttbar"]["pt"].label == "jet pT"
+        assert acc["ttbar"]["pt"].metadata == "pt"
+        assert acc["ttbar"]["cutflow"] == {"all": 1000}
+        assert metrics == {"entries": 1000}
+
+    def test_bins_stored_outside_payload(self, tmp_path, analysis_payload):
+        path = _write(tmp_path, analysis_payload)
+        assert sorted(p.name for p in (tmp_path / HIST_DIR).iterdir()) == ["0.npy", "1.npy"]
+        # the stubs only carry axes/metadata, not the bins
+        assert path.stat().st_size < (tmp_path / HIST_DIR / "0.npy").stat().st_size
+
+    def test_no_hist_dir_without_histograms(self, tmp_path):
+        path = _write(tmp_path, {"a": 1})
+        assert not (tmp_path / HIST_DIR).exists()
+        assert read_payload(path) == {"a": 1}
+
+    def test_rewrite_drops_stale_files(self, tmp_path, analysis_payload):
+        (tmp_path / HIST_DIR).mkdir()
+        (tmp_path / HIST_DIR / "7.npy").write_bytes(b"stale")
+        _write(tmp_path, analysis_payload)
+        assert not (tmp_path / HIST_DIR / "7.npy").exists()
+
+
+class TestLazyLoading:
+    def test_histograms_built_on_first_access(self, tmp_path, analysis_payload):
+        ttbar = read_payload(_write(tmp_path, analysis_payload))["processor_result"][0]["ttbar"]
+        assert isinstance(ttbar, LazyHistDict)
+        assert not ttbar.is_loaded("pt") and not ttbar.is_loaded("njet")
+
+        ttbar["pt"]
+        assert ttbar.is_loaded("pt")
+        assert not ttbar.is_loaded("njet")
+
+    def test_untouched_histograms_are_never_read(self, tmp_path, analysis_payload):
+        path = _write(tmp_path, analysis_payload)
+        (tmp_path / HIST_DIR / "1.npy").unlink()  # njet
+        ttbar = read_payload(path)["processor_result"][0]["ttbar"]
+        assert ttbar["pt"].sum().value > 0
+
+    def test_mapped_view_reads_bins_without_building(self, tmp_path, analysis_payload):
+        ttbar = read_payload(_write(tmp_path, analysis_payload))["processor_result"][0]["ttbar"]
+        view = ttbar.mapped_view("njet")
+        assert isinstance(view, np.memmap)
+        assert view.sum() == 10
+        assert not ttbar.is_loaded("njet")
+
+    def test_items_and_values_hand_out_histograms(self, tmp_path, analysis_payload):
+        ttbar = read_payload(_write(tmp_path, analysis_payload))["processor_result"][0]["ttbar"]
+        assert not any(isinstance(v, MappedHist) for v in ttbar.values())
+        assert not any(isinstance(v, MappedHist) for _, v in ttbar.items())
+        assert not any(isinstance(v, MappedHist) for v in dict(ttbar).values())
+
+
+class TestInterop:
+    def test_loaded_histograms_are_writable_and_mergeable(self, tmp_path, analysis_payload):
+        from coffea.processor import accumulate
+        ttbar = read_payload(_write(tmp_path, analysis_payload))["processor_result"][0]["ttbar"]
+        orig = analysis_payload["processor_result"][0]["ttbar"]
+
+        merged = accumulate([ttbar, orig])
+        assert merged["njet"].sum() == 2 * orig["njet"].sum()
+        ttbar["njet"].fill([1.5])  # mmap is read-only, the rebuilt histogram is not
+
+    def test_pickles_as_plain_dict(self, tmp_path, analysis_payload):
+        ttbar = read_payload(_write(tmp_path, analysis_payload))["processor_result"][0]["ttbar"]
+        clone = pickle.loads(pickle.dumps(ttbar))
+        assert type(clone) is dict
+        assert clone["pt"] == analysis_payload["processor_result"][0]["ttbar"]["pt"]
+
+    def test_resolve_survives_rewrite(self, tmp_path, analysis_payload):
+        path = _write(tmp_path, analysis_payload)
+        acc = resolve_mapped_hists(read_payload(path)["processor_result"][0])
+        assert type(acc["ttbar"]) is dict
+        write_mapped_payload(path, {"other": 1})  # drops the .npy files acc was read from
+        assert acc["ttbar"]["pt"] == analysis_payload["processor_result"][0]["ttbar"]["pt"]
+
+    def test_plain_payloads_unaffected(self, tmp_path, analysis_payload):
+        path = tmp_path / "payload.pkl"
+        write_payload(path, analysis_payload)
+        ttbar = read_payload(path)["processor_result"][0]["ttbar"]
+        assert type(ttbar) is dict
+
+
+class TestHistStorageConfig:
+    def test_default_is_pickle(self):
+        assert RunConfig().hist_storage == "pickle"
+
+    def test_invalid_raises(self):
+        with pytest.raises(ValueError, match="hist_storage"):
+            RunConfig(hist_storage="hdf5")
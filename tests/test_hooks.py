@@ -0,0 +1,121 @@
+"""
+Tests for coffea_workflow/hooks.py and RunConfig.hooks
+
+  - step hooks fire around every produced artifact (cache misses only),
+    chunk hooks around the user's code, on_merge per merged chunk
+  - CProfileHook / SamplingHook / TracemallocHook write one file per step
+    (outermost materialize only) or per chunk
+"""
+import pstats
+import time
+import tracemalloc
+
+import pytest
+
+from coffea_workflow.artifacts import Analysis, Fileset
+from coffea_workflow.config import RunConfig
+from coffea_workflow.executor import Executor
+from coffea_workflow.hooks import CProfileHook, Hook, SamplingHook, TracemallocHook
+from coffea_workflow.render import run
+from coffea_workflow.workflow import Step, Workflow
+
+
+def _fileset():
+    return {"A": {"files": {"a1.root": "Events"}}, "B": {"files": {"b1.root": "Events"}}}
+
+
+def _slow_count(fileset):
+    from coffea.processor import Ok
+    time.sleep(0.02)
+    return Ok({"n": sum(len(spec["files"]) for spec in fileset.values())})
+
+
+class _Recorder(Hook):
+    def __init__(self):
+        self.events = []
+
+    def on_step_start(self, ctx): self.events.append(("step_start", ctx.art.type_name))
+    def on_step_end(self, ctx): self.events.append(("step_end", ctx.art.type_name, ctx.seconds))
+    def on_chunk_start(self, ctx): self.events.append(("chunk_start", ctx.name, ctx.attrs.get("remote", False)))
+    def on_chunk_end(self, ctx): self.events.append(("chunk_end", ctx.name, ctx.seconds))
+    def on_merge(self, ctx): self.events.append(("merge", ctx.name, ctx.seconds))
+
+
+def _workflow():
+    wf = Workflow()
+    fs = wf.add(Step(name="fs", step_type=Fileset, builder=_fileset))
+    wf.add(Step(name="an", step_type=Analysis, builder=_slow_count), depends_on=[fs])
+    return wf
+
+
+def _run(tmp_path, hooks, monkeypatch):
+    monkeypatch.setattr(Executor, "get_coffea_executor", lambda self, config=None: object())
+    return run(_workflow(), RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset", hooks=hooks))
+
+
+class TestHookEvents:
+    def test_sequential_order(self, tmp_path, monkeypatch):
+        rec = _Recorder()
+        _run(tmp_path, [rec], monkeypatch)
+        kinds = [e[0] for e in rec.events]
+        assert kinds.count("step_start") == kinds.count("step_end")
+        assert kinds.count("chunk_start") == kinds.count("chunk_end") == 2
+        assert kinds.count("merge") == 2
+        chunk_ends = [e for e in rec.events if e[0] == "chunk_end"]
+        assert all(e[2] >= 0.02 for e in chunk_ends)
+        analysis_end = next(e for e in rec.events if e[:2] == ("step_end", "Analysis"))
+        assert analysis_end[2] >= sum(e[2] for e in chunk_ends)
+        # Analysis wraps its chunks: its step_start comes before the first chunk
+        assert rec.events.index(("step_start", "Analysis")) < kinds.index("chunk_start")
+
+    def test_cache_hits_fire_nothing(self, tmp_path, monkeypatch):
+        _run(tmp_path, [], monkeypatch)
+        rec = _Recorder()
+        _run(tmp_path, [rec], monkeypatch)
+        assert rec.events == []
+
+    def test_invalid_hook_rejected(self):
+        with pytest.raises(TypeError, match="hook methods"):
+            RunConfig(hooks=[object()])
+
+    def test_hook_exception_propagates(self, tmp_path, monkeypatch):
+        class Boom(Hook):
+            def on_chunk_start(self, ctx):
+                raise RuntimeError("hook failed")
+        with pytest.raises(RuntimeError, match="hook failed"):
+            _run(tmp_path, [Boom()], monkeypatch)
+
+
+class TestBuiltinHooks:
+    def test_cprofile_one_dump_per_step(self, tmp_path, monkeypatch):
+        hook = CProfileHook(tmp_path / "profiles")
+        _run(tmp_path, [hook], monkeypatch)
+        names = sorted(p.name.split("-")[0] for p in hook.written)
+        assert names == ["Analysis", "Fileset"]
+        stats = pstats.Stats(str(next(p for p in hook.written if p.name.startswith("Analysis"))))
+        assert any(func[2] == "_slow_count" for func in stats.stats)
+
+    def test_cprofile_chunk_scope(self, tmp_path, monkeypatch):
+        hook = CProfileHook(tmp_path / "profiles", scope="chunk")
+        _run(tmp_path, [hook], monkeypatch)
+        assert [p.name.split("-")[0] for p in hook.written] == ["ChunkAnalysis", "ChunkAnalysis"]
+
+    def test_sampling_writes_folded_stacks(self, tmp_path, monkeypatch):
+        hook = SamplingHook(tmp_path / "profiles", scope="chunk", interval=0.001)
+        _run(tmp_path, [hook], monkeypatch)
+        text = "".join(p.read_text() for p in hook.written)
+        assert "_slow_count" in text
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in text.splitlines())
+
+    def test_tracemalloc_snapshot_and_stops_tracing(self, tmp_path, monkeypatch):
+        hook = TracemallocHook(tmp_path / "profiles", top=5)
+        _run(tmp_path, [hook], monkeypatch)
+        assert len(hook.written) == 2
+        for path in hook.written:
+            tracemalloc.Snapshot.load(str(path))
+            assert (path.parent / f"{path.name}.txt").exists()
+        assert not tracemalloc.is_tracing()
+
+    def test_invalid_scope(self):
+        with pytest.raises(ValueError, match="scope"):
+            CProfileHook(scope="run")
@@ -0,0 +1,139 @@
+"""
+Tests for coffea_workflow/incremental.py and strategy="incremental"
+
+  - content-defined groups cover every unit once, average the target size
+    and respect the size cap
+  - appending files to a dataset leaves every chunk but the last unchanged
+  - incremental_fileset / incremental_workitems keep dataset fields, the
+    files container type and the datasets filter
+  - execute_analysis on a grown fileset only runs the new files' chunks
+"""
+import json
+
+import pytest
+
+from coffea_workflow.artifacts import Analysis, Fileset
+from coffea_workflow.config import ExecutorConfig, RunConfig
+from coffea_workflow.deps import Deps
+from coffea_workflow.incremental import (
+    MAX_CHUNK_FACTOR, content_defined_groups, incremental_fileset, incremental_workitems,
+)
+
+
+def _fileset(n, dataset="A"):
+    return {dataset: {"files": {f"root://eos//{dataset}/{i:04d}.root": "Events" for i in range(n)},
+                      "metadata": {"xsec": 1.0}}}
+
+
+class TestContentDefinedGroups:
+    def test_every_index_once_in_order(self):
+        groups = content_defined_groups([str(i) for i in range(500)], 10)
+        assert [i for g in groups for i in g] == list(range(500))
+
+    def test_average_size_near_target(self):
+        groups = content_defined_groups([str(i) for i in range(5000)], 10)
+        assert 7 < 5000 / len(groups) < 13
+
+    def test_cap(self):
+        groups = content_defined_groups([str(i) for i in range(5000)], 10)
+        assert max(len(g) for g in groups) <= MAX_CHUNK_FACTOR * 10
+
+    def test_target_one_is_one_unit_per_group(self):
+        assert content_defined_groups(["a", "b", "c"], 1) == [[0], [1], [2]]
+
+
+class TestIncrementalFileset:
+    def test_append_only_changes_last_chunk(self):
+        before = incremental_fileset(_fileset(200), 10)
+        after = incremental_fileset(_fileset(230), 10)
+        assert after[:len(before) - 1] == before[:-1]
+        assert sum(len(c["A"]["files"]) for c in after) == 230
+
+    def test_insert_changes_one_chunk(self):
+        fileset = _fileset(200)
+        before = incremental_fileset(fileset, 10)
+        fileset["A"]["files"]["root://eos//A/0100x.root"] = "Events"
+        after = incremental_fileset(fileset, 10)
+        changed = [c for c in after if c not in before]
+        assert len(changed) in (1, 2)  # 2 when the new file is itself a boundary
+
+    def test_keeps_dataset_fields_and_list_files(self):
+        fileset = {"A": {"files": ["b.root", "a.root"], "metadata": {"xsec": 2.0}}, **_fileset(3, "B")}
+        chunks = incremental_fileset(fileset, 100, datasets=["A"])
+        assert chunks == [{"A": {"files": ["a.root", "b.root"], "metadata": {"xsec": 2.0}, "treename": "Events"}}]
+
+    def test_chunks_never_span_datasets(self):
+        chunks = incremental_fileset({**_fileset(50, "A"), **_fileset(50, "B")}, 10)
+        assert all(len(c) == 1 for c in chunks)
+
+
+class TestIncrementalWorkitems:
+    def _records(self, n_files, dataset="A"):
+        return [
+            {"dataset": dataset, "filename": f"{dataset}{i:03d}.root", "treename": "Events",
+             "entrystart": s, "entrystop": s + 100, "fileuuid": "AAAA", "usermeta": {}}
+            for i in range(n_files) for s in (0, 100)
+        ]
+
+    def test_append_only_changes_last_chunk(self):
+        before = incremental_workitems(self._records(100), 10)
+        after = incremental_workitems(self._records(120), 10)
+        assert after[:len(before) - 1] == before[:-1]
+
+    def test_datasets_filter(self):
+        chunks = incremental_workitems(self._records(5, "A") + self._records(5, "B"), 4, datasets=["B"])
+        assert {r["dataset"] for c in chunks for r in c} == {"B"}
+
+
+def test_incremental_requires_target():
+    with pytest.raises(ValueError, match="target_files_per_chunk"):
+        RunConfig(strategy="incremental")
+    with pytest.raises(ValueError, match="strategy='incremental'"):
+        RunConfig(strategy="by_dataset", target_files_per_chunk=10)
+    with pytest.raises(ValueError, match="percentage"):
+        RunConfig(strategy="incremental", target_files_per_chunk=10, percentage=20)
+
+
+def _growing_fileset(n):
+    return _fileset(n)
+
+
+def _count_runs(counter):
+    def builder(fileset):
+        from coffea.processor import Ok
+        files = [f for spec in fileset.values() for f in spec["files"]]
+        counter.extend(files)
+        return Ok({"n_files": len(files)})
+    return builder
+
+
+def test_grown_fileset_only_runs_new_chunks(tmp_path):
+    from coffea_workflow.default_producers import execute_analysis
+    from coffea_workflow.executor import Executor
+    from coffea_workflow.payload import read_payload
+
+    runs = []
+    builder = _count_runs(runs)
+    cfg = RunConfig(cache_dir=tmp_path, strategy="incremental", target_files_per_chunk=5,
+                    executor_config=ExecutorConfig(executor_type="IterativeExecutor"))
+
+    def run(n):
+        ex = Executor(tmp_path, cfg)
+        ex._coffea_executor = object()
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder=_growing_fileset,
+                                                  builder_params={"n": n}), builder=builder)
+        out = ex.path_for(art)
+        execute_analysis(art=art, deps=Deps(ex, config=cfg), out=out, config=cfg)
+        return read_payload(out / "payload.pkl")
+
+    assert run(60)["processor_result"][0] == {"n_files": 60}
+    assert len(runs) == 60
+    runs.clear()
+    payload = run(70)
+    assert payload["processor_result"][0] == {"n_files": 70}
+    before = incremental_fileset(_fileset(60), 5)
+    new_chunks = [c for c in incremental_fileset(_fileset(70), 5) if c not in before]
+    assert sorted(runs) == sorted(f for c in new_chunks for f in c["A"]["files"])
+    assert len(runs) < 70
+    manifests = list((tmp_path / "Chunking").glob("*/manifest.json"))
+    assert len(manifests) == 2 and all(json.loads(m.read_text())["n_chunks"] > 1 for m in manifests)
@@ -0,0 +1,124 @@
+"""
+Tests for coffea_workflow/mergecache.py and RunConfig(merge_cache=True)
+
+  - find_merge_base picks the largest recorded merge whose chunks are all
+    wanted, and skips supersets, empty records and entries without payload
+  - a rerun after a failed chunk starts from the earlier merge and merges
+    only the retried chunk, without reading the other chunks' payloads
+  - results with bisected sub-chunks, or merge_cache=False, record nothing
+"""
+import json
+
+from coffea_workflow.artifacts import Analysis, Fileset
+from coffea_workflow.config import ExecutorConfig, RunConfig
+from coffea_workflow.deps import Deps
+from coffea_workflow.mergecache import MERGE_RECORD, find_merge_base, write_merge_record
+
+
+def _entry(cache_dir, name, ids, payload=True):
+    out = cache_dir / "Analysis" / name
+    out.mkdir(parents=True)
+    write_merge_record(out, ids)
+    if payload:
+        (out / "payload.pkl").write_bytes(b"x")
+    return out
+
+
+class TestFindMergeBase:
+    def test_largest_subset_wins(self, tmp_path):
+        _entry(tmp_path, "small", ["a"])
+        big = _entry(tmp_path, "big", ["a", "b"])
+        _entry(tmp_path, "superset", ["a", "b", "c", "z"])
+        assert find_merge_base(tmp_path, ["a", "b", "c"]) == (big, {"a", "b"})
+
+    def test_skips_entries_without_payload_or_chunks(self, tmp_path):
+        _entry(tmp_path, "no_payload", ["a", "b"], payload=False)
+        _entry(tmp_path, "empty", [])
+        (tmp_path / "Analysis" / "broken").mkdir()
+        (tmp_path / "Analysis" / "broken" / MERGE_RECORD).write_text("{")
+        assert find_merge_base(tmp_path, ["a", "b"]) is None
+
+    def test_no_cache(self, tmp_path):
+        assert find_merge_base(tmp_path, ["a"]) is None
+
+
+def _two_datasets():
+    return {
+        "A": {"files": {"a1.root": "Events", "a2.root": "Events"}},
+        "B": {"files": {"b1.root": "Events"}},
+    }
+
+
+def _fail_b_once(counter_dir):
+    def builder(fileset):
+        from coffea.processor import Err, Ok
+        marker = counter_dir / "b_failed"
+        if "B" in fileset and not marker.exists():
+            marker.touch()
+            return Err(OSError("XRootD error on b1.root"))
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+    return builder
+
+
+def _run(tmp_path, builder, **run_kwargs):
+    from coffea_workflow.default_producers import execute_analysis
+    from coffea_workflow.executor import Executor
+    from coffea_workflow.payload import read_payload
+
+    cfg = RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset",
+                    executor_config=ExecutorConfig(executor_type="IterativeExecutor"), **run_kwargs)
+    ex = Executor(tmp_path / "cache", cfg)
+    ex._coffea_executor = object()
+    art = Analysis(name="an", fileset=Fileset(name="fs", builder=_two_datasets), builder=builder)
+    out = ex.path_for(art)
+    execute_analysis(art=art, deps=Deps(ex, config=cfg), out=out, config=cfg)
+    return ex, art, out, read_payload(out / "payload.pkl")
+
+
+def test_rerun_merges_only_retried_chunk(tmp_path):
+    builder = _fail_b_once(tmp_path)
+    _, _, out, first = _run(tmp_path, builder)
+    assert first["processor_result"][0] == {"n_files": {"A": 2}}
+    assert json.loads((out / MERGE_RECORD).read_text())["chunks"] == first["merged_chunks"]
+    assert len(first["merged_chunks"]) == 1
+
+    # chunk A's payload is never read again: it is already in the stored merge
+    for d in (tmp_path / "cache" / "ChunkAnalysis").iterdir():
+        if (d / ".success").exists():
+            (d / "payload.pkl").unlink()
+    ex, art, out, second = _run(tmp_path, builder)
+    assert second["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+    assert second["failures"] == [] and second["n_chunks_ok"] == 2
+    assert len(second["merged_chunks"]) == 2
+    step = ex.report.add_step("an", art, out, 0.0, 0.0)
+    assert sorted(c["cache"] for c in step["chunks"]) == ["merged", "miss"]
+
+
+def test_rewritten_base_is_ignored(tmp_path):
+    builder = _fail_b_once(tmp_path)
+    _, _, out, _ = _run(tmp_path, builder)
+    # a record claiming both chunks, next to a payload that only holds A
+    write_merge_record(out, [d.name for d in (tmp_path / "cache" / "ChunkAnalysis").iterdir()])
+    ex, art, out, payload = _run(tmp_path, builder)
+    assert payload["processor_result"][0] == {"n_files": {"A": 2, "B": 1}}
+    step = ex.report.add_step("an", art, out, 0.0, 0.0)
+    assert "merged" not in [c["cache"] for c in step["chunks"]]
+
+
+def test_bisected_result_records_nothing(tmp_path):
+    def fail_on_a2(fileset):
+        from coffea.processor import Err, Ok
+        if any("a2.root" in spec["files"] for spec in fileset.values()):
+            return Err(OSError("XRootD error on a2.root"))
+        return Ok({"n_files": {ds: len(spec["files"]) for ds, spec in fileset.items()}})
+
+    _, _, out, payload = _run(tmp_path, fail_on_a2, bisect_failures=True)
+    assert payload["processor_result"][0] == {"n_files": {"A": 1, "B": 1}}
+    assert "merged_chunks" not in payload
+    assert not (out / MERGE_RECORD).exists()
+
+
+def test_disabled_records_nothing(tmp_path):
+    _, _, out, payload = _run(tmp_path, _fail_b_once(tmp_path), merge_cache=False)
+    assert "merged_chunks" not in payload
+    assert not (out / MERGE_RECORD).exists()
@@ -0,0 +1,211 @@
+"""
+Tests for coffea_workflow/preprocessing.py and the Preprocessed artifact
+
+  - WorkItem <-> JSON records round trip, hash_workitems stability
+  - split_workitems mirrors split_fileset (by_dataset, percentage, datasets)
+  - build_workitems cuts files into step_size ranges with entry counts/UUIDs
+  - the persistent metadata cache: known files are not reopened, new or
+    rewritten ones are
+  - files are opened on the Dask client when one is given
+  - make_preprocessed/split_fileset producers and Step(artifact_params=...)
+"""
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+import uproot
+from unittest.mock import patch
+
+from coffea_workflow.preprocessing import (
+    METADATA_CACHE_FILE, build_workitems, hash_workitems, split_workitems,
+    workitems_from_json, workitems_to_json,
+)
+from coffea_workflow.artifacts import Fileset, Preprocessed, Chunking
+from coffea_workflow.config import RunConfig
+from coffea_workflow.executor import Executor
+
+
+def _root_file(path, n_entries):
+    with uproot.recreate(path) as f:
+        f["Events"] = {"x": np.arange(n_entries, dtype="f8")}
+    return str(path)
+
+
+@pytest.fixture
+def fileset(tmp_path):
+    return {
+        "ttbar": {"files": {_root_file(tmp_path / "tt.root", 250): "Events"}, "metadata": {"xsec": 1.0}},
+        "wjets": {"files": [_root_file(tmp_path / "wj.root", 40)]},
+    }
+
+
+def _records(dataset, n):
+    return [
+        {"dataset": dataset, "filename": f"{dataset}.root", "treename": "Events",
+         "entrystart": i * 10, "entrystop": (i + 1) * 10, "fileuuid": "AAAA", "usermeta": {}}
+        for i in range(n)
+    ]
+
+
+class TestJson:
+    def test_round_trip(self, fileset, tmp_path):
+        workitems = build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        records = workitems_to_json(workitems)
+        json.dumps(records)  # plain JSON
+        assert workitems_from_json(records) == workitems
+
+    def test_hash_is_stable_and_content_sensitive(self):
+        a = _records("A", 2)
+        assert hash_workitems(a) == hash_workitems(json.loads(json.dumps(a)))
+        b = [dict(a[0], entrystop=11), a[1]]
+        assert hash_workitems(a) != hash_workitems(b)
+
+
+class TestSplitWorkitems:
+    def test_no_strategy_single_chunk(self):
+        records = _records("A", 2) + _records("B", 1)
+        assert split_workitems(records) == [records]
+
+    def test_by_dataset(self):
+        chunks = split_workitems(_records("A", 2) + _records("B", 1), strategy="by_dataset")
+        assert [len(c) for c in chunks] == [2, 1]
+
+    def test_percentage_per_dataset(self):
+        chunks = split_workitems(_records("A", 4) + _records("B", 2), strategy="by_dataset", percentage=50)
+        assert [len(c) for c in chunks] == [2, 2, 1, 1]
+
+    def test_datasets_filter(self):
+        chunks = split_workitems(_records("A", 2) + _records("B", 1), datasets=["B"])
+        assert {r["dataset"] for c in chunks for r in c} == {"B"}
+
+    def test_invalid_percentage(self):
+        with pytest.raises(ValueError, match="percentage"):
+            split_workitems(_records("A", 1), percentage=30)
+
+
+class TestBuildWorkitems:
+    def test_cuts_files_into_step_size_ranges(self, fileset, tmp_path):
+        workitems = build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        tt = [wi for wi in workitems if wi.dataset == "ttbar"]
+        assert sum(len(wi) for wi in tt) == 250
+        # coffea evens out the ranges: 250 entries at step 100 -> 2 x 125
+        assert [len(wi) for wi in tt] == [125, 125]
+        assert [len(wi) for wi in workitems if wi.dataset == "wjets"] == [40]
+        assert len(tt[0].fileuuid) == 16
+        assert tt[0].usermeta == {"xsec": 1.0}
+
+    def test_custom_metadata(self, fileset, tmp_path):
+        workitems = build_workitems(fileset, step_size=1000, cache_dir=tmp_path / "cache",
+                                    custom_func=lambda tree: {"branches": len(tree.keys())})
+        assert all(wi.usermeta["branches"] == 1 for wi in workitems)
+
+    def test_missing_file_raises_and_keeps_the_rest(self, fileset, tmp_path):
+        fileset["broken"] = {"files": {str(tmp_path / "nope.root"): "Events"}}
+        with pytest.raises(RuntimeError, match="failed to open 1 file"):
+            build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        del fileset["broken"]
+        with patch.object(uproot, "open", side_effect=AssertionError("reopened")):
+            build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+
+
+class TestMetadataCache:
+    def test_known_files_are_not_reopened(self, fileset, tmp_path):
+        first = build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        assert (tmp_path / "cache" / METADATA_CACHE_FILE).exists()
+        with patch.object(uproot, "open", side_effect=AssertionError("reopened")):
+            assert build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache") == first
+
+    def test_only_new_files_are_opened(self, fileset, tmp_path):
+        build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        new = _root_file(tmp_path / "tt2.root", 10)
+        fileset["ttbar"]["files"][new] = "Events"
+        real_open = uproot.open
+        opened = []
+
+        def spy(files, **kwargs):
+            opened.extend(files)
+            return real_open(files, **kwargs)
+
+        with patch.object(uproot, "open", side_effect=spy):
+            build_workitems(fileset, step_size=100, cache_dir=tmp_path / "cache")
+        assert opened == [new]
+
+    def test_rewritten_local_file_is_reopened(self, fileset, tmp_path):
+        build_workitems(fileset, step_size=1000, cache_dir=tmp_path / "cache")
+        _root_file(tmp_path / "wj.root", 75)
+        workitems = build_workitems(fileset, step_size=1000, cache_dir=tmp_path / "cache")
+        assert [len(wi) for wi in workitems if wi.dataset == "wjets"] == [75]
+
+    def test_corrupt_cache_is_recreated(self, fileset, tmp_path):
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        (cache / METADATA_CACHE_FILE).write_bytes(b"not sqlite" * 100)
+        assert build_workitems(fileset, step_size=100, cache_dir=cache)
+
+
+class _FakeFuture:
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+    def release(self):
+        pass
+
+
+class _FakeClient:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args, pure=True):
+        self.submitted += 1
+        return _FakeFuture(fn(*args))
+
+
+class TestDaskClient:
+    def test_files_opened_through_client(self, fileset, tmp_path, monkeypatch):
+        mod = types.ModuleType("dask.distributed")
+        mod.as_completed = lambda futures: list(futures)
+        monkeypatch.setitem(sys.modules, "dask.distributed", mod)
+        client = _FakeClient()
+        workitems = build_workitems(fileset, step_size=100, client=client, cache_dir=tmp_path / "cache")
+        assert client.submitted == 2
+        assert sum(len(wi) for wi in workitems) == 290
+
+
+class TestProducers:
+    def test_preprocessed_feeds_chunking(self, fileset, tmp_path):
+        cfg = RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset")
+        ex = Executor(cfg.cache_dir, cfg)
+        ex._coffea_executor = object()  # no .client: files are opened in-process
+        fs = Fileset(name="fs", builder=lambda: fileset)
+        pre = Preprocessed(name="pre", fileset=fs, step_size=100)
+
+        pre_dir = ex.materialize(pre)
+        records = json.loads((pre_dir / "workitems.json").read_text())
+        assert len(records) == 3  # 250 entries -> 2 ranges, 40 -> 1
+
+        chunk_dir = ex.materialize(Chunking(fileset=pre, split_strategy="by_dataset", percentage=None))
+        manifest = json.loads((chunk_dir / "manifest.json").read_text())
+        assert manifest["n_chunks"] == 2
+        first = manifest["output_files"]["0"]
+        assert first["file"] == "workitems_chunk_0.json"
+        assert first["hash"] == hash_workitems(json.loads((chunk_dir / first["file"]).read_text()))
+
+    def test_step_artifact_params(self):
+        from coffea_workflow.render import _build_artifact
+        from coffea_workflow.workflow import Step
+        fs = Fileset(name="fs", builder="mod:fn")
+        step = Step(name="pre", step_type=Preprocessed, artifact_params={"step_size": 5, "treename": "t"})
+        pre = _build_artifact(Preprocessed, "pre", step, [fs])
+        assert (pre.fileset, pre.step_size, pre.treename) == (fs, 5, "t")
+
+    def test_unknown_artifact_params_raise(self):
+        from coffea_workflow.render import _build_artifact
+        from coffea_workflow.workflow import Step
+        step = Step(name="pre", step_type=Preprocessed, artifact_params={"stepsize": 5})
+        with pytest.raises(TypeError, match="stepsize"):
+            _build_artifact(Preprocessed, "pre", step, [Fileset(name="fs", builder="mod:fn")])
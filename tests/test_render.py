@@ -1,12 +1,15 @@
 """
-Tests for render._resolve_step_config.
+Tests for render._resolve_step_config and the step scheduler in render.run.
 """
+import threading
+import cloudpickle
 import pytest
+from unittest.mock import patch
 from coffea_workflow.config import RunConfig, ExecutorConfig
 from coffea_workflow.facilities import LocalFactory, CoffeaCasaFactory
-from coffea_workflow.workflow import Step
-from coffea_workflow.artifacts import Fileset
-from coffea_workflow.render import _resolve_step_config
+from coffea_workflow.workflow import Step, Workflow
+from coffea_workflow.artifacts import Fileset, CustomArtifact
+from coffea_workflow.render import _resolve_step_config, run
 
 
 @pytest.fixture
@@ -77,3 +80,82 @@ class TestResolveStepConfig:
     def test_workflow_executor_used_when_step_has_none(self, workflow_config, bare_step):
         result = _resolve_step_config(workflow_config, bare_step)
         assert result.executor_config is workflow_config.executor_config
+
+
+# ---------------------------------------------------------------------------
+# run() scheduling
+# ---------------------------------------------------------------------------
+
+def _diamond_workflow():
+    """root -> (left, right) -> join; left and right are independent."""
+    wf = Workflow()
+    root = wf.add(Step(name="root", step_type=CustomArtifact, builder="m:root"))
+    left = wf.add(Step(name="left", step_type=CustomArtifact, builder="m:left"), depends_on=[root])
+    right = wf.add(Step(name="right", step_type=CustomArtifact, builder="m:right"), depends_on=[root])
+    wf.add(Step(name="join", step_type=CustomArtifact, builder="m:join"), depends_on=[left, right])
+    return wf
+
+
+class TestRunScheduler:
+    def test_sequential_default_follows_topological_order(self, tmp_path):
+        started = []
+
+        def fake_producer(*, art, deps, out, config):
+            started.append(art.name)
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(cloudpickle.dumps(art.name))
+
+        with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
+            result = run(_diamond_workflow(), RunConfig(cache_dir=tmp_path))
+
+        assert started == ["root", "left", "right", "join"]
+        assert result["order"] == ["root", "left", "right", "join"]
+        assert result["results"] == {"root": "root", "left": "left", "right": "right", "join": "join"}
+        assert set(result["paths"]) == {"root", "left", "right", "join"}
+
+    def test_independent_steps_run_concurrently(self, tmp_path):
+        # left and right only get past the barrier if they are in flight at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_producer(*, art, deps, out, config):
+            if art.name in ("left", "right"):
+                barrier.wait()
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(cloudpickle.dumps(art.name))
+
+        with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
+            result = run(_diamond_workflow(), RunConfig(cache_dir=tmp_path, max_concurrent_steps=2))
+
+        assert result["results"]["join"] == "join"
+        assert list(result["results"]) == ["root", "left", "right", "join"]
+
+    def test_step_failure_is_raised(self, tmp_path):
+        def fake_producer(*, art, deps, out, config):
+            if art.name == "right":
+                raise RuntimeError("boom")
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(cloudpickle.dumps(art.name))
+
+        with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
+            with pytest.raises(RuntimeError, match="boom"):
+                run(_diamond_workflow(), RunConfig(cache_dir=tmp_path, max_concurrent_steps=2))
+
+    def test_step_override_reaches_producer(self, tmp_path):
+        ec = ExecutorConfig(executor_type="IterativeExecutor")
+        received = {}
+
+        def fake_producer(*, art, deps, out, config):
+            received[art.name] = config.executor_config
+            out.mkdir(parents=True, exist_ok=True)
+            (out / "payload.pkl").write_bytes(cloudpickle.dumps(art.name))
+
+        wf = Workflow()
+        root = wf.add(Step(name="root", step_type=CustomArtifact, builder="m:root"))
+        wf.add(Step(name="a", step_type=CustomArtifact, builder="m:a", executor_config=ec), depends_on=[root])
+        wf.add(Step(name="b", step_type=CustomArtifact, builder="m:b"), depends_on=[root])
+
+        with patch("coffea_workflow.executor.get_producer", return_value=fake_producer):
+            run(wf, RunConfig(cache_dir=tmp_path, max_concurrent_steps=2))
+
+        assert received["a"] is ec
+        assert received["b"] is None
@@ -0,0 +1,112 @@
+"""
+Tests for coffea_workflow/report.py and the run report written by render.run
+
+  - RunReport assembles step records from what Executor.materialize and
+    execute_analysis recorded, and writes them atomically to run_report.json
+  - run() returns the report, one entry per step in topological order, with
+    cache hit/miss, timings and sizes; an empty workflow writes an empty report
+  - Analysis steps carry per-chunk records with bytes_read from coffea metrics
+"""
+import json
+
+import cloudpickle
+from unittest.mock import patch
+
+from coffea_workflow.artifacts import Analysis, CustomArtifact, Fileset
+from coffea_workflow.config import RunConfig
+from coffea_workflow.render import run
+from coffea_workflow.report import REPORT_FILE, RunReport, format_chunk_totals, format_step_line
+from coffea_workflow.workflow import Step, Workflow
+
+
+class TestRunReport:
+    def test_step_combines_artifact_and_analysis_records(self, tmp_path):
+        report = RunReport()
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder="m:fn"), builder="m:an")
+        chunks = [
+            {"file": "c0", "cache": "miss", "seconds": 2.0, "queue_wait_seconds": 0.5,
+             "merge_seconds": 0.1, "bytes_read": 100},
+            {"file": "c1", "cache": "hit", "seconds": 0.1, "queue_wait_seconds": None,
+             "merge_seconds": 0.1, "bytes_read": None},
+        ]
+        report.record_artifact(art, "miss", 3.0, bytes_written=42)
+        report.record_analysis(art, chunks, merge_seconds=0.2)
+        (tmp_path / "payload.pkl").write_bytes(b"x" * 10)
+
+        step = report.add_step("an", art, tmp_path, materialize_seconds=3.0, load_seconds=0.5)
+
+        assert (step["cache"], step["seconds"], step["bytes_written"]) == ("miss", 3.5, 42)
+        assert (step["payload_bytes"], step["bytes_read"], step["merge_seconds"]) == (10, 100, 0.2)
+        assert step["chunks"] == chunks
+        assert "2 chunks (1 cached)" in format_chunk_totals(step)
+        assert "queue wait max 0.50s" in format_chunk_totals(step)
+        chunks.append({"file": "c2", "cache": "merged", "seconds": 0.0, "queue_wait_seconds": None,
+                       "merge_seconds": 0.0, "bytes_read": None})
+        assert "3 chunks (1 cached, 1 already merged)" in format_chunk_totals(step)
+        assert format_step_line(step).startswith("miss")
+
+    def test_unrecorded_artifact_is_a_hit(self, tmp_path):
+        report = RunReport()
+        step = report.add_step("fs", Fileset(name="fs", builder="m:fn"), tmp_path, 0.0, 0.0)
+        assert step["cache"] == "hit"
+        assert step["payload_bytes"] is None
+        assert "chunks" not in step
+
+    def test_write_orders_steps(self, tmp_path):
+        report = RunReport()
+        for name in ("b", "a"):
+            report.add_step(name, CustomArtifact(name=name, builder="m:fn"), tmp_path, 0.0, 0.0)
+        written = report.write(tmp_path, order=["a", "b"])
+        assert [s["name"] for s in written["steps"]] == ["a", "b"]
+        assert json.loads((tmp_path / REPORT_FILE).read_text())["steps"][0]["name"] == "a"
+
+
+def _fileset():
+    return {"A": {"files": {"a1.root": "Events"}}, "B": {"files": {"b1.root": "Events"}}}
+
+
+def _count_with_bytes(fileset):
+    from coffea.processor import Ok
+    n = sum(len(spec["files"]) for spec in fileset.values())
+    return Ok(({"n_files": n}, {"entries": 10 * n, "processtime": 0.1, "bytesread": 1000 * n}))
+
+
+def _workflow():
+    wf = Workflow()
+    fs = wf.add(Step(name="fs", step_type=Fileset, builder=_fileset))
+    wf.add(Step(name="an", step_type=Analysis, builder=_count_with_bytes), depends_on=[fs])
+    return wf
+
+
+class TestRunWritesReport:
+    def _run(self, tmp_path):
+        cfg = RunConfig(cache_dir=tmp_path, strategy="by_dataset")
+        with patch("coffea_workflow.executor.Executor.get_coffea_executor", return_value=object()):
+            return run(_workflow(), cfg)
+
+    def test_report_returned_and_written(self, tmp_path):
+        report = self._run(tmp_path)["report"]
+        assert [s["name"] for s in report["steps"]] == ["fs", "an"]
+        assert all(s["cache"] == "miss" for s in report["steps"])
+        assert json.loads((tmp_path / REPORT_FILE).read_text())["steps"] == report["steps"]
+        assert report["cache_lookups"]["count"] > 0
+
+    def test_analysis_chunks(self, tmp_path):
+        an = self._run(tmp_path)["report"]["steps"][1]
+        assert [c["status"] for c in an["chunks"]] == ["ok", "ok"]
+        assert [c["cache"] for c in an["chunks"]] == ["miss", "miss"]
+        assert an["bytes_read"] == 2000
+        assert all(c["payload_bytes"] > 0 and c["queue_wait_seconds"] is None for c in an["chunks"])
+
+    def test_empty_workflow_returns_empty_report(self, tmp_path):
+        (tmp_path / REPORT_FILE).write_text(json.dumps({"steps": [{"name": "previous run"}]}))
+        report = run(Workflow(), RunConfig(cache_dir=tmp_path))["report"]
+        assert report["steps"] == []
+        assert report["cache_lookups"]["count"] == 0
+        assert json.loads((tmp_path / REPORT_FILE).read_text())["steps"] == []
+
+    def test_second_run_hits_cache(self, tmp_path):
+        self._run(tmp_path)
+        report = self._run(tmp_path)["report"]
+        assert [s["cache"] for s in report["steps"]] == ["hit", "hit"]
+        assert "chunks" not in report["steps"][1]  # execute_analysis did not run
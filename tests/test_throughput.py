@@ -0,0 +1,174 @@
+"""
+Tests for coffea_workflow/throughput.py and target_seconds_per_chunk
+
+  - ThroughputHistory records samples, averages them into events/s and keeps
+    only the newest MAX_SAMPLES per (processor, dataset)
+  - the SQLite file is only created when there is something to record
+  - quantize_rate absorbs small fluctuations
+  - chunk_samples splits a chunk's metrics across its datasets
+  - the balanced chunker sizes chunks by expected seconds given rates
+  - run() records history from chunk metrics and uses it on the next run,
+    through one connection per run shared by every chunk
+"""
+import json
+
+import pytest
+
+from coffea_workflow import throughput
+from coffea_workflow.throughput import (
+    THROUGHPUT_FILE, ThroughputHistory, chunk_samples, chunk_throughput, quantize_rate,
+)
+from coffea_workflow.balancing import balance_workitems
+from coffea_workflow.artifacts import Analysis, Fileset, _builder_key
+from coffea_workflow.config import RunConfig
+from coffea_workflow.deps import Deps
+from coffea_workflow.executor import Executor
+
+
+def _records(sizes, dataset):
+    out, start = [], 0
+    for n in sizes:
+        out.append({"dataset": dataset, "filename": f"{dataset}.root", "treename": "Events",
+                    "entrystart": start, "entrystop": start + n, "fileuuid": "AAAA", "usermeta": {}})
+        start += n
+    return out
+
+
+class TestThroughputHistory:
+    def test_rates_average_samples(self, tmp_path):
+        h = ThroughputHistory(tmp_path)
+        h.record("mod:Proc", {"A": (1000, 1.0)})
+        h.record("mod:Proc", {"A": (3000, 3.0), "B": (100, 1.0)})
+        assert h.rates("mod:Proc") == {"A": 1000.0, "B": 100.0}
+        assert h.rates("mod:Proc", ["B"]) == {"B": 100.0}
+        assert h.rates("mod:Other") == {}
+        h.close()
+
+    def test_keeps_newest_samples(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(throughput, "MAX_SAMPLES", 2)
+        h = ThroughputHistory(tmp_path)
+        for rate in (1, 10, 10):
+            h.record("p", {"A": (rate, 1.0)})
+        assert h.rates("p") == {"A": 10.0}
+        h.close()
+
+    def test_lazy_file_creation(self, tmp_path):
+        h = ThroughputHistory(tmp_path)
+        assert h.rates("p") == {}
+        h.record("p", {})
+        h.close()
+        assert not (tmp_path / THROUGHPUT_FILE).exists()
+
+    def test_corrupt_file_is_recreated(self, tmp_path):
+        (tmp_path / THROUGHPUT_FILE).write_bytes(b"not sqlite" * 100)
+        h = ThroughputHistory(tmp_path)
+        h.record("p", {"A": (10, 1.0)})
+        assert h.rates("p") == {"A": 10.0}
+        h.close()
+
+
+class TestHelpers:
+    def test_quantize_is_stable(self):
+        assert quantize_rate(1000.0) == quantize_rate(1030.0)
+        assert quantize_rate(1000.0) != quantize_rate(1500.0)
+
+    def test_chunk_samples_workitems_split_by_entries(self):
+        chunk = _records([300], "A") + _records([100], "B")
+        assert chunk_samples(chunk, 400.0, 8.0) == {"A": (300.0, 6.0), "B": (100.0, 2.0)}
+
+    def test_chunk_samples_fileset_shares_rate(self):
+        samples = chunk_samples({"A": {}, "B": {}}, 400.0, 8.0)
+        assert samples == {"A": (200.0, 4.0), "B": (200.0, 4.0)}
+
+    def test_chunk_throughput_needs_metrics(self):
+        assert chunk_throughput({}) is None
+        assert chunk_throughput({"entries": 10, "processtime": 0.0}) is None
+        assert chunk_throughput({"entries": 10, "processtime": 2}) == (10.0, 2.0)
+
+
+class TestSecondsBalancing:
+    def test_slow_dataset_gets_fewer_events_per_chunk(self):
+        records = _records([100] * 8, "fast") + _records([100] * 8, "slow")
+        chunks, seconds = balance_workitems(records, target_seconds_per_chunk=1.0,
+                                            rates={"fast": 400.0, "slow": 100.0})
+        # 800/400 + 800/100 = 10 s of work -> 10 chunks of ~1 s
+        assert len(chunks) == 10
+        assert max(seconds) == pytest.approx(1.0)
+        assert all(len(c) == 1 for c in chunks if c[0]["dataset"] == "slow")
+
+    def test_unknown_dataset_uses_mean_rate(self):
+        records = _records([100], "A") + _records([100], "new")
+        _, seconds = balance_workitems(records, target_seconds_per_chunk=10.0, rates={"A": 100.0})
+        assert seconds == [2.0]
+
+    def test_cold_start_falls_back_to_events(self):
+        records = _records([100] * 4, "A")
+        chunks, seconds = balance_workitems(records, target_events_per_chunk=200, target_seconds_per_chunk=1.0)
+        assert (len(chunks), seconds) == (2, None)
+
+    def test_cold_start_without_fallback_one_chunk_per_unit(self):
+        chunks, _ = balance_workitems(_records([100] * 3, "A"), target_seconds_per_chunk=1.0)
+        assert len(chunks) == 3
+
+
+class TestRunConfig:
+    def test_requires_balanced(self):
+        with pytest.raises(ValueError, match="requires strategy='balanced'"):
+            RunConfig(target_seconds_per_chunk=60)
+
+    @pytest.mark.parametrize("value", [0, -1, True, "60"])
+    def test_invalid_values(self, value):
+        with pytest.raises(ValueError, match="positive number"):
+            RunConfig(strategy="balanced", target_seconds_per_chunk=value)
+
+
+def _fileset():
+    return {
+        "A": {"files": {f"a{i}.root": "Events" for i in range(4)}},
+        "B": {"files": {"b1.root": "Events"}},
+    }
+
+
+def _count_with_metrics(fileset):
+    from coffea.processor import Ok
+    n = sum(len(spec["files"]) for spec in fileset.values())
+    return Ok(({"n_files": n}, {"entries": 1000 * n, "processtime": 2.0 * n}))
+
+
+class TestRunRecordsHistory:
+    def _run(self, tmp_path, cfg):
+        from coffea_workflow.default_producers import execute_analysis
+        ex = Executor(tmp_path, cfg)
+        ex._coffea_executor = object()
+        art = Analysis(name="an", fileset=Fileset(name="fs", builder=_fileset), builder=_count_with_metrics)
+        execute_analysis(art=art, deps=Deps(ex, config=cfg), out=ex.path_for(art), config=cfg)
+        return ex
+
+    def test_one_connection_per_run(self, tmp_path):
+        from unittest.mock import patch
+        real_connect = ThroughputHistory._connect
+        with patch.object(ThroughputHistory, "_connect", autospec=True, side_effect=real_connect) as connect:
+            ex = self._run(tmp_path, RunConfig(cache_dir=tmp_path, strategy="by_dataset"))
+        assert connect.call_count == 1  # two chunks recorded
+        ex.close()
+        assert ex.throughput_history()._conn is None
+
+    def test_history_recorded_then_used(self, tmp_path, monkeypatch):
+        self._run(tmp_path, RunConfig(cache_dir=tmp_path, strategy="by_dataset"))
+        h = ThroughputHistory(tmp_path)
+        assert h.rates(_builder_key(_count_with_metrics)) == {"A": 500.0, "B": 500.0}
+        h.close()
+
+        # 5 files x 1000 events at ~500 ev/s = ~10 s; with 4 s per chunk -> 3 chunks
+        entries = {f"a{i}.root": 1000 for i in range(4)} | {"b1.root": 1000}
+        monkeypatch.setattr(
+            "coffea_workflow.default_producers.read_file_metadata",
+            lambda fileset, **kw: [(ds, url, "Events", {}, {"numentries": entries[url]})
+                                   for ds, data in fileset.items() for url in data["files"]],
+        )
+        self._run(tmp_path, RunConfig(cache_dir=tmp_path, strategy="balanced", target_seconds_per_chunk=4.0))
+        manifests = [json.loads(p.read_text()) for p in (tmp_path / "Chunking").glob("*/manifest.json")]
+        balanced = next(m for m in manifests if "balance" in m)
+        assert balanced["n_chunks"] == 3
+        expected = balanced["balance"]["expected_seconds"]["seconds_per_chunk"]
+        assert sum(expected) == pytest.approx(5000 / quantize_rate(500.0))
@@ -0,0 +1,96 @@
+"""
+Tests for coffea_workflow/tracing.py
+
+  - TracingHook writes one trace per run with run -> step -> chunk/merge
+    nesting and artifact attributes, in Chrome and OTLP/JSON format
+  - worker spans shipped back with parallel_chunks results join the trace
+    under their task span (see also test_default_producers)
+"""
+import json
+
+import pytest
+
+from coffea_workflow.artifacts import Analysis, Fileset
+from coffea_workflow.config import RunConfig
+from coffea_workflow.executor import Executor
+from coffea_workflow.render import run
+from coffea_workflow.tracing import Tracer, TracingHook
+from coffea_workflow.workflow import Step, Workflow
+
+
+def _fileset():
+    return {"A": {"files": {"a1.root": "Events"}}, "B": {"files": {"b1.root": "Events"}}}
+
+
+def _count(fileset):
+    from coffea.processor import Ok
+    return Ok({"n": sum(len(spec["files"]) for spec in fileset.values())})
+
+
+def _run(tmp_path, hook, monkeypatch):
+    monkeypatch.setattr(Executor, "get_coffea_executor", lambda self, config=None: object())
+    wf = Workflow()
+    fs = wf.add(Step(name="fs", step_type=Fileset, builder=_fileset))
+    wf.add(Step(name="an", step_type=Analysis, builder=_count), depends_on=[fs])
+    return run(wf, RunConfig(cache_dir=tmp_path / "cache", strategy="by_dataset", hooks=[hook]))
+
+
+class TestTracingHook:
+    def test_span_tree(self, tmp_path, monkeypatch):
+        hook = TracingHook(tmp_path / "trace.json")
+        _run(tmp_path, hook, monkeypatch)
+        spans = {s["span_id"]: s for s in hook.tracer.spans}
+        assert len({s["trace_id"] for s in spans.values()}) == 1
+        root = next(s for s in spans.values() if s["name"] == "run")
+        assert root["parent_span_id"] is None
+        assert root["attributes"]["facility"] == "local"
+
+        def parent(span):
+            return spans[span["parent_span_id"]]["name"]
+
+        analysis = next(s for s in spans.values() if s["name"] == "step Analysis an")
+        assert parent(analysis) == "run"
+        assert analysis["attributes"]["artifact.identity"]
+        chunks = [s for s in spans.values() if s["name"].startswith("chunk ")]
+        assert len(chunks) == 2
+        assert all(parent(c).startswith("step ChunkAnalysis") and c["attributes"]["chunk_file"] for c in chunks)
+        merges = [s for s in spans.values() if s["name"].startswith("merge ")]
+        assert len(merges) == 2 and all(parent(m) == "step Analysis an" for m in merges)
+        assert all(s["start_ns"] <= s["end_ns"] for s in spans.values())
+
+    def test_chrome_file(self, tmp_path, monkeypatch):
+        _run(tmp_path, TracingHook(tmp_path / "trace.json"), monkeypatch)
+        data = json.loads((tmp_path / "trace.json").read_text())
+        complete = [e for e in data["traceEvents"] if e["ph"] == "X"]
+        assert {"run", "step Analysis an"} <= {e["name"] for e in complete}
+        assert any(e["ph"] == "M" and e["args"]["name"].startswith("driver:") for e in data["traceEvents"])
+
+    def test_otlp_file(self, tmp_path, monkeypatch):
+        _run(tmp_path, TracingHook(tmp_path / "trace.otlp.json", format="otlp"), monkeypatch)
+        data = json.loads((tmp_path / "trace.otlp.json").read_text())
+        spans = data["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert len(spans[0]["traceId"]) == 32 and len(spans[0]["spanId"]) == 16
+        root = next(s for s in spans if s["name"] == "run")
+        assert "parentSpanId" not in root
+        keys = {a["key"] for s in spans for a in s["attributes"]}
+        assert {"artifact.type", "artifact.identity", "chunk_file", "executor"} <= keys
+
+    def test_each_run_is_a_new_trace(self, tmp_path, monkeypatch):
+        hook = TracingHook(tmp_path / "trace.json")
+        _run(tmp_path, hook, monkeypatch)
+        first = hook.tracer.trace_id
+        _run(tmp_path, hook, monkeypatch)
+        assert hook.tracer.trace_id != first
+        assert [s["name"] for s in hook.tracer.spans] == ["run"]  # everything cached
+
+    def test_invalid_format(self):
+        with pytest.raises(ValueError, match="format"):
+            TracingHook(format="jaeger")
+
+
+def test_otlp_attribute_types():
+    tracer = Tracer()
+    tracer.end(tracer.start("s", n=3, x=1.5, ok=True, label="a"))
+    attrs = {a["key"]: a["value"] for a in tracer.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["attributes"]}
+    assert attrs == {"n": {"intValue": "3"}, "x": {"doubleValue": 1.5}, "ok": {"boolValue": True},
+                     "label": {"stringValue": "a"}}